@@ -0,0 +1,176 @@
+from typing import Dict, List, Any, Optional, Tuple
+from concurrent.futures import ProcessPoolExecutor
+import atexit
+import hashlib
+import logging
+import threading
+import numpy as np
+import pandas as pd
+from prophet import Prophet
+from ..core.cache import LRUCache
+
+def series_fingerprint(df: pd.DataFrame) -> str:
+    """Hash the timestamps and values of a ds/y frame"""
+    digest = hashlib.sha256()
+    digest.update(pd.to_datetime(df['ds']).values.astype('int64').tobytes())
+    digest.update(df['y'].to_numpy(dtype=float).tobytes())
+    return digest.hexdigest()
+
+def _warm_start_params(model: Prophet) -> Dict[str, Any]:
+    """Extract fitted parameters in the shape Prophet.fit(init=...) expects"""
+    params = {}
+    for name in ['k', 'm', 'sigma_obs']:
+        params[name] = float(model.params[name][0][0])
+    for name in ['delta', 'beta']:
+        params[name] = model.params[name][0].tolist()
+    return params
+
+def _fit_prophet(series_id: str, ds: np.ndarray, y: np.ndarray,
+                 forecast_period: int, freq: str,
+                 init: Optional[Dict[str, Any]]) -> Tuple[str, Dict[str, Any], Dict[str, Any]]:
+    """Fit one series in a worker process and return its forecast and parameters"""
+    df = pd.DataFrame({'ds': pd.to_datetime(ds), 'y': y})
+    model = Prophet()
+    try:
+        if init:
+            model.fit(df, init=init)
+        else:
+            model.fit(df)
+    except Exception:
+        # Warm start can fail when the changepoint count changed; refit cold
+        model = Prophet()
+        model.fit(df)
+
+    future = model.make_future_dataframe(periods=forecast_period, freq=freq)
+    forecast = model.predict(future)
+    result = {
+        "forecast": forecast[['ds', 'yhat', 'yhat_lower', 'yhat_upper']].to_dict(),
+        "trend": model.params['trend'].tolist(),
+        "model": "prophet"
+    }
+    return series_id, result, _warm_start_params(model)
+
+def _linear_forecasts(frames: Dict[str, pd.DataFrame], forecast_period: int,
+                      freq: str) -> Dict[str, Dict[str, Any]]:
+    """Least-squares trend forecasts for short or flat series; empty series are skipped"""
+    results = {}
+    for series_id, df in frames.items():
+        if df.empty:
+            continue
+        y = df['y'].to_numpy(dtype=float)
+        x = np.arange(len(y), dtype=float)
+        if len(y) >= 2 and np.ptp(y) > 0:
+            x_mean, y_mean = x.mean(), y.mean()
+            slope = ((x - x_mean) * (y - y_mean)).sum() / ((x - x_mean) ** 2).sum()
+            intercept = y_mean - slope * x_mean
+        else:
+            slope, intercept = 0.0, float(y.mean()) if len(y) else 0.0
+
+        steps = np.arange(len(y) + forecast_period, dtype=float)
+        yhat = intercept + slope * steps
+        residual = np.std(y - yhat[:len(y)]) if len(y) else 0.0
+        last = pd.to_datetime(df['ds']).iloc[-1]
+        future = pd.date_range(last, periods=forecast_period + 1, freq=freq)[1:]
+        ds = pd.to_datetime(df['ds']).tolist() + list(future)
+        forecast = pd.DataFrame({
+            'ds': ds,
+            'yhat': yhat,
+            'yhat_lower': yhat - 1.96 * residual,
+            'yhat_upper': yhat + 1.96 * residual
+        })
+        results[series_id] = {
+            "forecast": forecast.to_dict(),
+            "trend": (intercept + slope * steps[:len(y)]).tolist(),
+            "model": "linear"
+        }
+    return results
+
+class MultiSeriesForecaster:
+    """Forecast many metric series with cached, warm-started Prophet fits
+
+    Fits fan out over a process pool. Forecasts are cached per series and
+    keyed by a fingerprint of the data, so an unchanged series is served
+    from the cache and a changed one is refit starting from its previous
+    parameters. Series that are too short or flat for Prophet use a
+    least-squares trend instead.
+    """
+
+    def __init__(self, max_workers: Optional[int] = None,
+                 min_points: int = 48,
+                 cache_size: int = 2048):
+        self.logger = logging.getLogger(__name__)
+        self.max_workers = max_workers
+        self.min_points = min_points
+        self.cache = LRUCache(max_entries=cache_size)
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._pool_lock = threading.Lock()
+
+    def _executor(self) -> ProcessPoolExecutor:
+        with self._pool_lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(max_workers=self.max_workers)
+                atexit.register(self.close)
+            return self._pool
+
+    def forecast(self, series: Dict[str, pd.DataFrame],
+                 forecast_period: int = 24,
+                 freq: str = 'H') -> Dict[str, Dict[str, Any]]:
+        results: Dict[str, Dict[str, Any]] = {}
+        fallback: Dict[str, pd.DataFrame] = {}
+        fingerprints: Dict[str, str] = {}
+        to_fit: List[Tuple[str, pd.DataFrame, Optional[Dict[str, Any]]]] = []
+
+        for series_id, metric_data in series.items():
+            df = metric_data.reset_index()
+            df.columns = ['ds', 'y']
+            fingerprint = series_fingerprint(df)
+            fingerprints[series_id] = fingerprint
+            cached = self.cache.get(series_id)
+            if cached and cached["key"] == (fingerprint, forecast_period, freq):
+                results[series_id] = cached["result"]
+            elif len(df) < self.min_points or df['y'].nunique() <= 1:
+                fallback[series_id] = df
+            else:
+                to_fit.append((series_id, df, cached["params"] if cached else None))
+
+        for series_id, result in _linear_forecasts(fallback, forecast_period, freq).items():
+            results[series_id] = result
+            self.cache.set(series_id, {
+                "key": (fingerprints[series_id], forecast_period, freq),
+                "result": result,
+                "params": None
+            })
+
+        if to_fit:
+            pool = self._executor()
+            futures = [
+                pool.submit(
+                    _fit_prophet, series_id,
+                    pd.to_datetime(df['ds']).values, df['y'].to_numpy(dtype=float),
+                    forecast_period, freq, params
+                )
+                for series_id, df, params in to_fit
+            ]
+            for (series_id, _, _), future in zip(to_fit, futures):
+                try:
+                    _, result, params = future.result()
+                except Exception as e:
+                    self.logger.error(f"Error forecasting {series_id}: {e}")
+                    results[series_id] = {"error": str(e)}
+                    continue
+                results[series_id] = result
+                self.cache.set(series_id, {
+                    "key": (fingerprints[series_id], forecast_period, freq),
+                    "result": result,
+                    "params": params
+                })
+
+        return results
+
+    def close(self):
+        """Shut down the worker processes; the next forecast starts a new pool"""
+        with self._pool_lock:
+            if self._pool is not None:
+                self._pool.shutdown()
+                self._pool = None
+                atexit.unregister(self.close)
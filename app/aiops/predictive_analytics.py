@@ -1,17 +1,21 @@
 from typing import Dict, List, Any, Optional
-import boto3
 import pandas as pd
 import numpy as np
 from sklearn.ensemble import IsolationForest
 from prophet import Prophet
 import logging
 from datetime import datetime, timedelta
+from .forecasting import MultiSeriesForecaster
+from ..core.aws import get_client
+from .streaming_anomaly import StreamingAnomalyDetector
 
 class PredictiveAnalytics:
     def __init__(self):
         self.logger = logging.getLogger(__name__)
-        self.cloudwatch = boto3.client('cloudwatch')
-        self.sagemaker = boto3.client('sagemaker')
+        self.cloudwatch = get_client('cloudwatch')
+        self.sagemaker = get_client('sagemaker')
+        self.stream_detector = StreamingAnomalyDetector()
+        self.forecaster = MultiSeriesForecaster()
         
     def detect_anomalies(self, metric_data: pd.DataFrame) -> Dict[str, Any]:
         """Detect anomalies in metric data using Isolation Forest"""
@@ -28,6 +32,18 @@ class PredictiveAnalytics:
             self.logger.error(f"Error in anomaly detection: {e}")
             raise
             
+    def detect_anomalies_stream(self, points: Dict[str, float]) -> Dict[str, Any]:
+        """Score the latest point of each metric series incrementally"""
+        try:
+            scores = self.stream_detector.update(points)
+            return {
+                "anomalies": {k: v for k, v in scores.items() if v["is_anomaly"]},
+                "scores": scores
+            }
+        except Exception as e:
+            self.logger.error(f"Error in streaming anomaly detection: {e}")
+            raise
+
     def forecast_metrics(self, metric_data: pd.DataFrame, 
                         forecast_period: int = 24) -> Dict[str, Any]:
         """Forecast future metric values using Prophet"""
@@ -49,6 +65,15 @@ class PredictiveAnalytics:
             self.logger.error(f"Error in metric forecasting: {e}")
             raise
             
+    def forecast_metrics_batch(self, metric_data: Dict[str, pd.DataFrame],
+                               forecast_period: int = 24) -> Dict[str, Dict[str, Any]]:
+        """Forecast many metric series in parallel, reusing cached fits"""
+        try:
+            return self.forecaster.forecast(metric_data, forecast_period=forecast_period)
+        except Exception as e:
+            self.logger.error(f"Error in batch metric forecasting: {e}")
+            raise
+            
     def optimize_performance(self, current_metrics: Dict[str, float],
                            target_metrics: Dict[str, float]) -> Dict[str, Any]:
         """Generate performance optimization recommendations"""
@@ -106,7 +131,7 @@ class PredictiveAnalytics:
         """Remediate high CPU utilization"""
         try:
             # Scale out ECS service
-            ecs = boto3.client('ecs')
+            ecs = get_client('ecs')
             response = ecs.update_service(
                 cluster=anomaly['cluster'],
                 service=anomaly['service'],
@@ -126,7 +151,7 @@ class PredictiveAnalytics:
         """Remediate high memory utilization"""
         try:
             # Update ECS task definition with higher memory
-            ecs = boto3.client('ecs')
+            ecs = get_client('ecs')
             response = ecs.register_task_definition(
                 family=anomaly['task_family'],
                 memory=str(int(anomaly['current_memory']) * 1.5)
@@ -145,7 +170,7 @@ class PredictiveAnalytics:
         """Remediate high latency"""
         try:
             # Update WAF rules to block suspicious traffic
-            waf = boto3.client('wafv2')
+            waf = get_client('wafv2')
             response = waf.update_web_acl(
                 Name=anomaly['web_acl'],
                 Scope='REGIONAL',
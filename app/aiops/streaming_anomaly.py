@@ -0,0 +1,182 @@
+from typing import Dict, List, Any, Set
+from concurrent.futures import ThreadPoolExecutor
+import logging
+import threading
+import zlib
+import numpy as np
+from sklearn.ensemble import IsolationForest
+
+class StreamingAnomalyDetector:
+    """Incremental anomaly detection over many metric series
+
+    Each series keeps an EWMA of its level and of its absolute deviation, so
+    a new point is scored with a robust z-score in O(1), vectorized across
+    every series updated in the same tick. Outliers are clipped before they
+    update the state so a spike does not drag the baseline with it. Series
+    also get an IsolationForest on (value, delta) that is refit on a ring
+    buffer every `refit_interval` points and cached in between; it is
+    consulted only for borderline points. Refits run on a background
+    executor and the new model is swapped in when ready, and each series
+    starts at its own offset into the interval so series updated every
+    tick do not all come due together.
+    """
+
+    def __init__(self, alpha: float = 0.05,
+                 z_threshold: float = 4.0,
+                 warmup: int = 30,
+                 window: int = 512,
+                 refit_interval: int = 256,
+                 contamination: float = 0.01,
+                 refit_workers: int = 2):
+        self.logger = logging.getLogger(__name__)
+        self.alpha = alpha
+        self.z_threshold = z_threshold
+        self.warmup = warmup
+        self.window = window
+        self.refit_interval = refit_interval
+        self.contamination = contamination
+        self._lock = threading.Lock()
+        self._index: Dict[str, int] = {}
+        self._series: List[str] = []
+        capacity = 16
+        self._mean = np.zeros(capacity)
+        self._deviation = np.zeros(capacity)
+        self._last = np.zeros(capacity)
+        self._count = np.zeros(capacity, dtype=np.int64)
+        self._since_refit = np.zeros(capacity, dtype=np.int64)
+        self._buffer = np.zeros((capacity, window))
+        self._models: Dict[int, IsolationForest] = {}
+        self._generation: Dict[int, int] = {}
+        self._refitting: Set[int] = set()
+        self._executor = ThreadPoolExecutor(max_workers=refit_workers, thread_name_prefix="anomaly-refit")
+
+    def _ensure(self, series_ids: List[str]) -> np.ndarray:
+        new = []
+        for series_id in series_ids:
+            if series_id not in self._index:
+                self._index[series_id] = len(self._series)
+                self._series.append(series_id)
+                new.append(series_id)
+        needed = len(self._series)
+        capacity = len(self._mean)
+        if needed > capacity:
+            while capacity < needed:
+                capacity *= 2
+            grow = capacity - len(self._mean)
+            self._mean = np.concatenate([self._mean, np.zeros(grow)])
+            self._deviation = np.concatenate([self._deviation, np.zeros(grow)])
+            self._last = np.concatenate([self._last, np.zeros(grow)])
+            self._count = np.concatenate([self._count, np.zeros(grow, dtype=np.int64)])
+            self._since_refit = np.concatenate([self._since_refit, np.zeros(grow, dtype=np.int64)])
+            self._buffer = np.vstack([self._buffer, np.zeros((grow, self.window))])
+        for series_id in new:
+            self._since_refit[self._index[series_id]] = self._stagger(series_id)
+        return np.array([self._index[s] for s in series_ids], dtype=np.int64)
+
+    def update(self, points: Dict[str, float]) -> Dict[str, Dict[str, Any]]:
+        """Score one new point per series, then fold it into the series state"""
+        points = {k: float(v) for k, v in points.items() if v is not None and np.isfinite(v)}
+        if not points:
+            return {}
+
+        with self._lock:
+            series_ids = list(points)
+            idx = self._ensure(series_ids)
+            values = np.fromiter(points.values(), dtype=float, count=len(points))
+
+            count = self._count[idx]
+            fresh = count == 0
+            mean = np.where(fresh, values, self._mean[idx])
+            # Mean absolute deviation of a normal is ~0.8 sigma
+            scale = np.maximum(self._deviation[idx] * 1.2533, 1e-6 * np.abs(mean) + 1e-9)
+            deviation = values - mean
+            zscores = np.where(fresh, 0.0, deviation / scale)
+            warm = count >= self.warmup
+            anomalous = warm & (np.abs(zscores) > self.z_threshold)
+
+            # Huber-style update: outliers move the baseline by at most the threshold
+            limit = np.where(warm, self.z_threshold * scale, np.inf)
+            clipped = np.clip(deviation, -limit, limit)
+            self._mean[idx] = mean + self.alpha * clipped
+            self._deviation[idx] = np.where(
+                fresh, 0.0,
+                self._deviation[idx] + self.alpha * (np.abs(clipped) - self._deviation[idx])
+            )
+            deltas = np.where(fresh, 0.0, values - self._last[idx])
+            self._last[idx] = values
+            self._buffer[idx, count % self.window] = values
+            self._count[idx] = count + 1
+            self._since_refit[idx] += 1
+
+            # The forest only decides borderline points, so only those pay
+            # for a model call; everything else is settled by the z-score.
+            isolation_scores: Dict[int, float] = {}
+            borderline = np.flatnonzero(
+                warm & ~anomalous & (np.abs(zscores) > 0.75 * self.z_threshold)
+            )
+            for position in borderline:
+                model = self._models.get(int(idx[position]))
+                if model is not None:
+                    features = np.array([[values[position], deltas[position]]])
+                    isolation_scores[int(position)] = float(model.decision_function(features)[0])
+                    if isolation_scores[int(position)] < 0:
+                        anomalous[position] = True
+
+            due = idx[(self._since_refit[idx] >= self.refit_interval) & (self._count[idx] >= self.warmup)]
+            for series in due:
+                self._schedule_refit(int(series))
+
+        return {
+            series_id: {
+                "value": float(values[i]),
+                "zscore": float(zscores[i]),
+                "isolation_score": isolation_scores.get(i),
+                "is_anomaly": bool(anomalous[i])
+            }
+            for i, series_id in enumerate(series_ids)
+        }
+
+    def _stagger(self, series_id: str) -> int:
+        """Negative start for the refit counter, spreading due times over the interval"""
+        return -(zlib.crc32(series_id.encode()) % self.refit_interval)
+
+    def _schedule_refit(self, series: int):
+        """Copy the series history and fit on the executor; called under the lock"""
+        self._since_refit[series] = 0
+        if series in self._refitting:
+            return
+        count = int(self._count[series])
+        size = min(count, self.window)
+        start = count % self.window if count > self.window else 0
+        history = np.roll(self._buffer[series], -start)[:size]
+        self._refitting.add(series)
+        self._executor.submit(self._refit, series, history, self._generation.get(series, 0))
+
+    def _refit(self, series: int, history: np.ndarray, generation: int):
+        features = np.column_stack([history, np.diff(history, prepend=history[0])])
+        model = None
+        try:
+            model = IsolationForest(contamination=self.contamination, n_estimators=50, random_state=0)
+            model.fit(features)
+        except Exception as e:
+            model = None
+            self.logger.error(f"Error refitting anomaly model for {self._series[series]}: {e}")
+        with self._lock:
+            self._refitting.discard(series)
+            # A reset while fitting makes this model stale
+            if model is not None and self._generation.get(series, 0) == generation:
+                self._models[series] = model
+
+    def reset(self, series_id: str):
+        """Forget the state of a series, e.g. after a deploy shifts its baseline"""
+        with self._lock:
+            series = self._index.get(series_id)
+            if series is not None:
+                self._count[series] = 0
+                self._since_refit[series] = self._stagger(series_id)
+                self._models.pop(series, None)
+                self._generation[series] = self._generation.get(series, 0) + 1
+
+    def close(self):
+        """Wait for running refits and stop the executor"""
+        self._executor.shutdown(wait=True)
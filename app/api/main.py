@@ -1,10 +1,23 @@
-from fastapi import FastAPI, UploadFile, File, HTTPException
+from fastapi import BackgroundTasks, Depends, FastAPI, UploadFile, File, Header, HTTPException, Request, Response
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
-from typing import List
+from fastapi.responses import FileResponse
+from typing import List, Optional
+import hmac
 import os
+import tempfile
+import time
 import uuid
 from pydantic import BaseModel
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
+from ..core.cloudwatch_metrics import get_metrics_emitter
+from ..core.instrumentation import BYTES_PROCESSED, mark_worker_exit, metrics_registry, stage_timer
+from ..core.profiler import ProfilerBusy, sample_profile, to_folded
+from ..core.rate_limit import RateLimitExceeded
+from ..core.tenancy import StorageQuotaExceeded, TenantAuthenticationError, TenantKeys
+from ..core.tracing import get_tracer
 from ..processing.document_processor import DocumentProcessor
+from ..processing.snapshot import SnapshotError, SnapshotUnsupported
 
 app = FastAPI(title="Document Intelligence API")
 
@@ -19,6 +32,39 @@ app.add_middleware(
 
 # Initialize document processor
 processor = DocumentProcessor()
+tenant_keys = TenantKeys.from_env()
+metrics = get_metrics_emitter()
+tracer = get_tracer()
+
+MAX_PROFILE_SECONDS = 60
+
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    """Record per-endpoint latency and status class, and open the request's root span."""
+    start = time.perf_counter()
+    status = 500
+    with tracer.span("http.request", **{"http.method": request.method}) as span:
+        try:
+            response = await call_next(request)
+            status = response.status_code
+            return response
+        finally:
+            endpoint = request.scope.get("endpoint")
+            route = request.scope.get("route")
+            span.set_attribute("http.route", getattr(route, "path", "unmatched"))
+            span.set_attribute("http.status_code", status)
+            dimensions = {
+                "Endpoint": getattr(endpoint, "__name__", "unmatched"),
+                "StatusClass": f"{status // 100}xx"
+            }
+            metrics.put("RequestLatency", (time.perf_counter() - start) * 1000, "Milliseconds", dimensions)
+
+@app.on_event("shutdown")
+def flush_metrics():
+    """Publish buffered metrics and spans before the worker exits."""
+    metrics.close()
+    tracer.close()
+    mark_worker_exit()
 
 class SearchQuery(BaseModel):
     query: str
@@ -29,8 +75,34 @@ class SearchResult(BaseModel):
     metadata: dict
     score: float
 
+class ContextQuery(BaseModel):
+    query: str
+    k: int = 10
+    token_budget: int = 3000
+    model_name: str = "gpt-3.5-turbo"
+
+def _too_many_requests(error: RateLimitExceeded) -> HTTPException:
+    return HTTPException(
+        status_code=429,
+        detail=str(error),
+        headers={"Retry-After": str(max(1, int(error.retry_after)))}
+    )
+
+def tenant_id(x_api_key: Optional[str] = Header(None)) -> Optional[str]:
+    """Resolve the tenant from X-API-Key; without TENANT_API_KEYS everything uses the default namespace."""
+    try:
+        return tenant_keys.resolve(x_api_key)
+    except TenantAuthenticationError as e:
+        raise HTTPException(status_code=401, detail=str(e))
+
+def require_admin(x_admin_token: Optional[str] = Header(None)):
+    """Reject requests whose X-Admin-Token does not match ADMIN_TOKEN."""
+    expected = os.getenv("ADMIN_TOKEN")
+    if not expected or not x_admin_token or not hmac.compare_digest(x_admin_token, expected):
+        raise HTTPException(status_code=403, detail="Forbidden")
+
 @app.post("/upload")
-async def upload_document(file: UploadFile = File(...)):
+async def upload_document(file: UploadFile = File(...), tenant: Optional[str] = Depends(tenant_id)):
     """Upload and process a document."""
     try:
         # Create uploads directory if it doesn't exist
@@ -42,18 +114,26 @@ async def upload_document(file: UploadFile = File(...)):
         file_path = os.path.join("uploads", unique_filename)
         
         # Save the file
-        with open(file_path, "wb") as buffer:
-            content = await file.read()
-            buffer.write(content)
+        with stage_timer("ingest", "upload_write") as span:
+            with open(file_path, "wb") as buffer:
+                content = await file.read()
+                buffer.write(content)
+            span.set_attribute("bytes", len(content))
+        BYTES_PROCESSED.labels(pipeline="ingest", stage="upload_write").inc(len(content))
         
         # Process the document
-        results = processor.process_document(file_path)
+        stats = await run_in_threadpool(processor.ingest_document, file_path, tenant_id=tenant)
         
         return {
             "message": "Document processed successfully",
             "document_id": unique_filename,
-            "chunks": len(results)
+            "chunks": stats["chunks"],
+            "duplicates": stats["duplicates"]
         }
+    except RateLimitExceeded as e:
+        raise _too_many_requests(e)
+    except StorageQuotaExceeded as e:
+        raise HTTPException(status_code=403, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
     finally:
@@ -62,19 +142,130 @@ async def upload_document(file: UploadFile = File(...)):
             os.remove(file_path)
 
 @app.post("/search", response_model=List[SearchResult])
-async def search_documents(query: SearchQuery):
+async def search_documents(query: SearchQuery, tenant: Optional[str] = Depends(tenant_id)):
     """Search for documents using semantic search."""
     try:
-        results = processor.search_documents(query.query, query.k)
+        results = await run_in_threadpool(
+            processor.search_documents, query.query, query.k, tenant_id=tenant
+        )
         return results
+    except RateLimitExceeded as e:
+        raise _too_many_requests(e)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/context")
+async def build_context(query: ContextQuery, tenant: Optional[str] = Depends(tenant_id)):
+    """Build a deduplicated, token-budgeted LLM context for a query."""
+    try:
+        return await run_in_threadpool(
+            processor.build_context,
+            query.query,
+            k=query.k,
+            token_budget=query.token_budget,
+            model_name=query.model_name,
+            tenant_id=tenant
+        )
+    except RateLimitExceeded as e:
+        raise _too_many_requests(e)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/tenant/usage")
+async def tenant_usage(tenant: Optional[str] = Depends(tenant_id)):
+    """Report the calling tenant's stored vectors and quotas."""
+    return await run_in_threadpool(processor.tenant_usage, tenant)
+
+@app.get("/stats/coalescing")
+async def coalescing_stats():
+    """Report how many embedding calls were coalesced."""
+    return processor.coalescing_stats()
+
+@app.get("/stats/batching")
+async def batching_stats():
+    """Report query embedding batch sizes and window."""
+    return processor.batching_stats()
+
+@app.get("/stats/embeddings")
+async def embedding_stats():
+    """Report local embedding throughput and padding."""
+    return processor.embedding_stats()
+
+@app.get("/stats/dedup")
+async def dedup_stats():
+    """Report near-duplicate chunks and the storage they saved."""
+    return processor.dedup_stats()
+
+@app.get("/stats/ocr")
+async def ocr_stats():
+    """Report OCR'd pages, cache hits and failures."""
+    return processor.ocr_stats()
+
+@app.get("/stats/cloudwatch")
+async def cloudwatch_stats():
+    """Report buffered, retried and dropped CloudWatch metrics."""
+    return metrics.stats()
+
+@app.get("/metrics")
+async def prometheus_metrics():
+    """Expose Prometheus metrics, summed over all workers in multiprocess mode."""
+    return Response(generate_latest(metrics_registry()), media_type=CONTENT_TYPE_LATEST)
+
+@app.get("/admin/profile", dependencies=[Depends(require_admin)])
+async def profile_worker(seconds: float = 10.0,
+                         interval_ms: float = 5.0,
+                         output: str = "json",
+                         include_idle: bool = False):
+    """Capture a sampling CPU profile of this worker; requires ADMIN_TOKEN."""
+    if not 0 < seconds <= MAX_PROFILE_SECONDS or interval_ms < 1:
+        raise HTTPException(
+            status_code=400,
+            detail=f"seconds must be in (0, {MAX_PROFILE_SECONDS}] and interval_ms at least 1"
+        )
+    try:
+        profile = await run_in_threadpool(
+            sample_profile, seconds, interval_ms / 1000, include_idle=include_idle
+        )
+    except ProfilerBusy as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    if output == "folded":
+        return Response(to_folded(profile), media_type="text/plain")
+    return profile
+
+@app.get("/admin/snapshot", dependencies=[Depends(require_admin)])
+async def export_index_snapshot(background_tasks: BackgroundTasks, quantize: bool = False):
+    """Download a binary snapshot of the vector index; requires ADMIN_TOKEN."""
+    fd, path = tempfile.mkstemp(suffix=".dvsnap")
+    try:
+        with os.fdopen(fd, "wb") as out:
+            await run_in_threadpool(processor.export_snapshot, out, quantize=quantize)
+    except Exception as e:
+        os.remove(path)
+        # Pinecone indexes cannot be enumerated
+        raise HTTPException(status_code=501 if isinstance(e, SnapshotUnsupported) else 500, detail=str(e))
+    background_tasks.add_task(os.remove, path)
+    return FileResponse(
+        path,
+        media_type="application/octet-stream",
+        filename=f"docuvector_{time.strftime('%Y%m%d_%H%M%S')}.dvsnap",
+        background=background_tasks
+    )
+
+@app.post("/admin/snapshot", dependencies=[Depends(require_admin)])
+async def import_index_snapshot(file: UploadFile = File(...)):
+    """Load a snapshot into the vector index; requires ADMIN_TOKEN."""
+    try:
+        return await run_in_threadpool(processor.import_snapshot, file.file)
+    except SnapshotError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.delete("/documents/{document_id}")
-async def delete_document(document_id: str):
+async def delete_document(document_id: str, tenant: Optional[str] = Depends(tenant_id)):
     """Delete a document from the vector database."""
     try:
-        success = processor.delete_document(document_id)
+        success = await run_in_threadpool(processor.delete_document, document_id, tenant_id=tenant)
         if success:
             return {"message": "Document deleted successfully"}
         else:
@@ -1,10 +1,31 @@
-from typing import Dict, List, Optional
-import boto3
+from typing import Dict, List, Optional, Any, Callable, Tuple
 import json
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 import logging
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from enum import Enum
+from botocore.exceptions import ConnectionError as BotoConnectionError, HTTPClientError
+from ..core.aws import get_account_id, get_client
+from ..core.rate_limit import is_throttling_error
+
+# Chime per-member error codes worth retrying; anything else (BadRequest,
+# Forbidden, NotFound, ...) fails the same way again
+RETRYABLE_ERROR_CODES = {"Throttled", "Throttling", "ThrottlingException", "ServiceFailure", "ServiceUnavailable"}
+
+# Connection failures and timeouts, from botocore or the standard library
+TRANSIENT_ERRORS = (BotoConnectionError, HTTPClientError, ConnectionError, TimeoutError)
+
+def _is_retryable(error: Exception) -> bool:
+    """Throttling, 5xx and connection/timeout errors are retried; anything else fails fast"""
+    if is_throttling_error(error) or isinstance(error, TRANSIENT_ERRORS):
+        return True
+    response = getattr(error, "response", None)
+    if isinstance(response, dict):
+        status = response.get("ResponseMetadata", {}).get("HTTPStatusCode") or 0
+        return status >= 500 or response.get("Error", {}).get("Code") in RETRYABLE_ERROR_CODES
+    return False
 
 class TeamRole(Enum):
     DATA_SCIENTIST = "data_scientist"
@@ -20,13 +41,38 @@ class TeamMember:
     email: str
     permissions: List[str]
 
+@dataclass
+class ProvisioningReport:
+    resource_arn: str
+    succeeded: List[str] = field(default_factory=list)
+    failed: Dict[str, str] = field(default_factory=dict)
+    attempts: int = 0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "resource_arn": self.resource_arn,
+            "succeeded": self.succeeded,
+            "failed": self.failed,
+            "attempts": self.attempts
+        }
+
 class TeamCollaboration:
-    def __init__(self):
+    # Chime accepts at most 100 member ARNs per BatchCreateChannelMembership
+    CHIME_BATCH_SIZE = 100
+
+    def __init__(self, client_factory: Callable[[str], Any] = get_client,
+                 max_workers: int = 10,
+                 max_attempts: int = 3,
+                 retry_backoff: float = 1.0):
         self.logger = logging.getLogger(__name__)
-        self.sns = boto3.client('sns')
-        self.sqs = boto3.client('sqs')
-        self.chime = boto3.client('chime')
-        self.codecommit = boto3.client('codecommit')
+        self.sns = client_factory('sns')
+        self.sqs = client_factory('sqs')
+        self.chime = client_factory('chime')
+        self.codecommit = client_factory('codecommit')
+        self.cloudwatch = client_factory('cloudwatch')
+        self.max_workers = max_workers
+        self.max_attempts = max_attempts
+        self.retry_backoff = retry_backoff
         
     def create_team_channel(self, channel_name: str, team_members: List[TeamMember]):
         """Create a team collaboration channel"""
@@ -38,10 +84,10 @@ class TeamCollaboration:
             )
             
             # Add team members to the channel
-            for member in team_members:
-                self.chime.create_channel_membership(
-                    ChannelArn=response['ChannelArn'],
-                    MemberArn=f"arn:aws:chime:us-east-1:{self.get_account_id()}:user/{member.email}"
+            report = self.provision_channel_members(response['ChannelArn'], team_members)
+            if report.failed:
+                self.logger.warning(
+                    f"Failed to add {len(report.failed)} members to {channel_name}: {report.failed}"
                 )
                 
             return response['ChannelArn']
@@ -55,11 +101,10 @@ class TeamCollaboration:
             response = self.sns.create_topic(Name=topic_name)
             
             # Subscribe team members
-            for member in team_members:
-                self.sns.subscribe(
-                    TopicArn=response['TopicArn'],
-                    Protocol='email',
-                    Endpoint=member.email
+            report = self.provision_topic_subscriptions(response['TopicArn'], team_members)
+            if report.failed:
+                self.logger.warning(
+                    f"Failed to subscribe {len(report.failed)} members to {topic_name}: {report.failed}"
                 )
                 
             return response['TopicArn']
@@ -67,6 +112,81 @@ class TeamCollaboration:
             self.logger.error(f"Error setting up notification topic: {e}")
             raise
             
+    def provision_channel_members(self, channel_arn: str,
+                                  team_members: List[TeamMember]) -> ProvisioningReport:
+        """Add members to a Chime channel in batches of 100, retrying failures"""
+        account_id = self.get_account_id()
+        member_arns = {
+            f"arn:aws:chime:us-east-1:{account_id}:user/{member.email}": member.email
+            for member in team_members
+        }
+
+        def add_batch(batch: List[str]) -> Dict[str, Tuple[str, bool]]:
+            response = self.chime.batch_create_channel_membership(
+                ChannelArn=channel_arn,
+                Type='DEFAULT',
+                MemberArns=batch
+            )
+            return {
+                error['MemberArn']: (
+                    f"{error.get('ErrorCode')}: {error.get('ErrorMessage')}",
+                    error.get('ErrorCode') in RETRYABLE_ERROR_CODES
+                )
+                for error in response.get('Errors', [])
+            }
+
+        report = self._provision(channel_arn, list(member_arns), add_batch, self.CHIME_BATCH_SIZE)
+        report.succeeded = [member_arns.get(arn, arn) for arn in report.succeeded]
+        report.failed = {member_arns.get(arn, arn): error for arn, error in report.failed.items()}
+        return report
+
+    def provision_topic_subscriptions(self, topic_arn: str,
+                                      team_members: List[TeamMember]) -> ProvisioningReport:
+        """Subscribe members to an SNS topic with bounded concurrency, retrying failures"""
+        def subscribe(batch: List[str]) -> Dict[str, Tuple[str, bool]]:
+            self.sns.subscribe(TopicArn=topic_arn, Protocol='email', Endpoint=batch[0])
+            return {}
+
+        return self._provision(topic_arn, [member.email for member in team_members], subscribe, 1)
+
+    def _provision(self, resource_arn: str, items: List[str],
+                   apply: Callable[[List[str]], Dict[str, Tuple[str, bool]]],
+                   batch_size: int) -> ProvisioningReport:
+        """Apply batches concurrently; retryable failures are retried with backoff
+
+        `apply` returns {item: (error message, retryable)} for the items
+        that failed.
+        """
+        report = ProvisioningReport(resource_arn=resource_arn)
+        pending = list(dict.fromkeys(items))
+        retrying: Dict[str, str] = {}
+
+        def run(batch: List[str]) -> Tuple[List[str], Dict[str, Tuple[str, bool]]]:
+            try:
+                errors = apply(batch)
+            except Exception as e:
+                errors = {item: (str(e), _is_retryable(e)) for item in batch}
+            return [item for item in batch if item not in errors], errors
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            while pending and report.attempts < self.max_attempts:
+                if report.attempts:
+                    time.sleep(self.retry_backoff * 2 ** (report.attempts - 1))
+                report.attempts += 1
+                batches = [pending[i:i + batch_size] for i in range(0, len(pending), batch_size)]
+                retrying = {}
+                for succeeded, errors in pool.map(run, batches):
+                    report.succeeded.extend(succeeded)
+                    for item, (message, retryable) in errors.items():
+                        if retryable:
+                            retrying[item] = message
+                        else:
+                            report.failed[item] = message
+                pending = list(retrying)
+
+        report.failed.update(retrying)
+        return report
+
     def create_team_queue(self, queue_name: str):
         """Create SQS queue for team task management"""
         try:
@@ -132,7 +252,7 @@ class TeamCollaboration:
                 ]
             }
             
-            response = boto3.client('cloudwatch').put_dashboard(
+            response = self.cloudwatch.put_dashboard(
                 DashboardName=dashboard_name,
                 DashboardBody=json.dumps(dashboard_body)
             )
@@ -164,8 +284,7 @@ class TeamCollaboration:
             
     def get_account_id(self) -> str:
         """Get AWS account ID"""
-        sts = boto3.client('sts')
-        return sts.get_caller_identity()['Account']
+        return get_account_id()
         
     def log_team_activity(self, activity: str, member: TeamMember):
         """Log team activity for auditing"""
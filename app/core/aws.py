@@ -0,0 +1,61 @@
+from typing import Any, Dict, Optional, Tuple
+from functools import lru_cache
+import os
+import threading
+import boto3
+from botocore.config import Config
+
+CLIENT_CONFIG = Config(
+    max_pool_connections=int(os.getenv("AWS_MAX_POOL_CONNECTIONS", "50")),
+    retries={
+        "mode": "adaptive",
+        "max_attempts": int(os.getenv("AWS_MAX_ATTEMPTS", "8"))
+    },
+    connect_timeout=5,
+    read_timeout=60,
+    tcp_keepalive=True
+)
+
+# For clients behind an AdaptiveRateLimiter. Standard mode keeps botocore's
+# short retries for transient 5xx and connection errors without its own
+# client-side rate limiting; throttles that outlast them reach the limiter,
+# which backs off and retries again.
+RATE_LIMITED_CLIENT_CONFIG = CLIENT_CONFIG.merge(Config(
+    retries={
+        "mode": "standard",
+        "total_max_attempts": int(os.getenv("AWS_RATE_LIMITED_MAX_ATTEMPTS", "3"))
+    }
+))
+
+_clients: Dict[Tuple[str, Optional[str], bool], Any] = {}
+_lock = threading.Lock()
+_session: Optional[boto3.session.Session] = None
+
+def get_client(service_name: str, region_name: Optional[str] = None, rate_limited: bool = False):
+    """Return the shared client for a (service, region)
+
+    Clients are thread-safe and reuse their connection pool, so hot paths
+    should always go through here instead of calling boto3.client(). The
+    session they are built from is not thread-safe, so construction is
+    serialized. Pass `rate_limited` for clients whose calls go through an
+    AdaptiveRateLimiter; they make fewer attempts of their own.
+    """
+    global _session
+    key = (service_name, region_name, rate_limited)
+    client = _clients.get(key)
+    if client is not None:
+        return client
+    with _lock:
+        client = _clients.get(key)
+        if client is None:
+            if _session is None:
+                _session = boto3.session.Session()
+            config = RATE_LIMITED_CLIENT_CONFIG if rate_limited else CLIENT_CONFIG
+            client = _session.client(service_name, region_name=region_name, config=config)
+            _clients[key] = client
+        return client
+
+@lru_cache(maxsize=1)
+def get_account_id() -> str:
+    """AWS account ID of the current credentials, looked up once per process"""
+    return get_client('sts').get_caller_identity()['Account']
@@ -0,0 +1,183 @@
+from typing import Dict, List, Any, Optional, Tuple
+from datetime import datetime, timezone
+import atexit
+import logging
+import threading
+from .aws import get_client
+
+SeriesKey = Tuple[str, str, Tuple[Tuple[str, str], ...]]
+
+class CloudWatchSink:
+    """Deliver metric batches with PutMetricData"""
+
+    def __init__(self, client=None):
+        self.client = client or get_client('cloudwatch')
+
+    def put(self, namespace: str, metric_data: List[Dict[str, Any]]):
+        self.client.put_metric_data(Namespace=namespace, MetricData=metric_data)
+
+class InMemorySink:
+    """Collect metric batches locally, for offline runs and tests"""
+
+    def __init__(self):
+        self.batches: List[Tuple[str, List[Dict[str, Any]]]] = []
+        self._lock = threading.Lock()
+
+    def put(self, namespace: str, metric_data: List[Dict[str, Any]]):
+        with self._lock:
+            self.batches.append((namespace, metric_data))
+
+    def datums(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [datum for _, batch in self.batches for datum in batch]
+
+class MetricsEmitter:
+    """Aggregate metrics in memory and publish them in the background
+
+    Samples are folded into a statistic set (count, sum, min, max) per
+    metric name, unit and dimensions, and flushed every `flush_interval`
+    seconds in batches of up to `max_batch_size` datums. When more than
+    `max_series` distinct series are pending, new series are dropped rather
+    than letting the buffer grow. Batches that fail to publish, e.g. while
+    CloudWatch throttles, are re-sent with the next flush, up to
+    `max_series` datums and `max_attempts` flushes each; the samples in
+    datums given up on are counted in `dropped_datapoints`.
+    """
+
+    def __init__(self, namespace: str = 'Custom/DocuVector',
+                 sink=None,
+                 flush_interval: float = 10.0,
+                 max_batch_size: int = 1000,
+                 max_series: int = 10000,
+                 max_attempts: int = 3):
+        self.logger = logging.getLogger(__name__)
+        self.namespace = namespace
+        self.sink = sink if sink is not None else CloudWatchSink()
+        self.flush_interval = flush_interval
+        self.max_batch_size = max_batch_size
+        self.max_series = max_series
+        self.max_attempts = max_attempts
+        self.dropped = 0
+        self.dropped_datapoints = 0
+        self.failed_batches = 0
+        self._series: Dict[SeriesKey, List[float]] = {}
+        # (failed attempts, datum) left over from failed publishes
+        self._retry: List[Tuple[int, Dict[str, Any]]] = []
+        self._window_start = datetime.now(timezone.utc)
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def put(self, name: str, value: float, unit: str = 'Count',
+            dimensions: Optional[Dict[str, str]] = None):
+        """Record one sample; never blocks on the network"""
+        key = (name, unit, tuple(sorted((dimensions or {}).items())))
+        with self._lock:
+            stats = self._series.get(key)
+            if stats is None:
+                if len(self._series) >= self.max_series:
+                    self.dropped += 1
+                    return
+                self._series[key] = [1, value, value, value]
+                return
+            stats[0] += 1
+            stats[1] += value
+            if value < stats[2]:
+                stats[2] = value
+            if value > stats[3]:
+                stats[3] = value
+
+    def increment(self, name: str, value: float = 1,
+                  dimensions: Optional[Dict[str, str]] = None):
+        self.put(name, value, 'Count', dimensions)
+
+    def flush(self):
+        """Publish everything aggregated since the last flush, and earlier failed batches"""
+        with self._flush_lock:
+            with self._lock:
+                series, self._series = self._series, {}
+                timestamp, self._window_start = self._window_start, datetime.now(timezone.utc)
+            pending, self._retry = self._retry, []
+
+            pending += [(0, {
+                'MetricName': name,
+                'Dimensions': [{'Name': k, 'Value': v} for k, v in dimensions],
+                'Timestamp': timestamp,
+                'Unit': unit,
+                'StatisticValues': {
+                    'SampleCount': stats[0],
+                    'Sum': stats[1],
+                    'Minimum': stats[2],
+                    'Maximum': stats[3]
+                }
+            }) for (name, unit, dimensions), stats in series.items()]
+            if not pending:
+                return
+
+            for i in range(0, len(pending), self.max_batch_size):
+                batch = pending[i:i + self.max_batch_size]
+                try:
+                    self.sink.put(self.namespace, [datum for _, datum in batch])
+                except Exception as e:
+                    self.failed_batches += 1
+                    self.logger.error(f"Failed to publish {len(batch)} metrics, will retry: {e}")
+                    self._requeue(batch)
+
+    def _requeue(self, batch: List[Tuple[int, Dict[str, Any]]]):
+        """Keep a failed batch for the next flush, within max_series and max_attempts"""
+        dropped = 0
+        for attempts, datum in batch:
+            if attempts + 1 < self.max_attempts and len(self._retry) < self.max_series:
+                self._retry.append((attempts + 1, datum))
+            else:
+                dropped += datum['StatisticValues']['SampleCount']
+        if dropped:
+            with self._lock:
+                self.dropped_datapoints += dropped
+            self.logger.error(f"Dropped {dropped} metric samples that could not be published")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "pending_series": len(self._series),
+                "retry_datums": len(self._retry),
+                "dropped_series": self.dropped,
+                "dropped_datapoints": self.dropped_datapoints,
+                "failed_batches": self.failed_batches
+            }
+
+    def start(self):
+        """Start the background flush thread"""
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name="metrics-emitter", daemon=True)
+        self._thread.start()
+
+    def close(self):
+        """Stop the flush thread and publish whatever is still buffered"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.flush_interval)
+            self._thread = None
+        self.flush()
+
+    def _run(self):
+        while not self._stop.wait(self.flush_interval):
+            try:
+                self.flush()
+            except Exception as e:
+                self.logger.error(f"Error flushing metrics: {e}")
+
+_emitter: Optional[MetricsEmitter] = None
+_emitter_lock = threading.Lock()
+
+def get_metrics_emitter() -> MetricsEmitter:
+    """Return the process-wide emitter, started on first use and flushed at exit"""
+    global _emitter
+    with _emitter_lock:
+        if _emitter is None:
+            _emitter = MetricsEmitter()
+            _emitter.start()
+            atexit.register(_emitter.close)
+        return _emitter
@@ -0,0 +1,131 @@
+from typing import Any, Iterable, Iterator
+from contextlib import contextmanager
+import os
+import time
+from prometheus_client import REGISTRY, CollectorRegistry, Counter, Gauge, Histogram, multiprocess
+from .tracing import get_tracer
+
+# Label values are fixed enums (pipeline, stage, provider, operation); never
+# put document ids, tenants or queries in labels.
+STAGE_LATENCY = Histogram(
+    "docuvector_stage_duration_seconds",
+    "Latency of each ingest and search stage",
+    ["pipeline", "stage"],
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+)
+CHUNKS_PROCESSED = Counter(
+    "docuvector_chunks_processed_total",
+    "Chunks produced by the splitter and stored",
+    ["pipeline"]
+)
+BYTES_PROCESSED = Counter(
+    "docuvector_bytes_processed_total",
+    "Bytes handled per stage",
+    ["pipeline", "stage"]
+)
+INGESTIONS_IN_FLIGHT = Gauge(
+    "docuvector_ingestions_in_flight",
+    "Documents currently being ingested",
+    multiprocess_mode="livesum"
+)
+LLM_CALLS_IN_FLIGHT = Gauge(
+    "docuvector_llm_calls_in_flight",
+    "Provider calls currently outstanding",
+    ["provider", "operation"],
+    multiprocess_mode="livesum"
+)
+
+def metrics_registry() -> CollectorRegistry:
+    """Registry to expose on /metrics
+
+    With several workers, set PROMETHEUS_MULTIPROC_DIR to an empty
+    directory before start-up so every worker writes its samples there and
+    /metrics reports the sum over all of them.
+    """
+    if not os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        return REGISTRY
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    return registry
+
+def mark_worker_exit():
+    """Drop this worker's live gauges from the multiprocess directory"""
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        multiprocess.mark_process_dead(os.getpid())
+
+class BusyClock:
+    """Time a streaming stage spends working, as opposed to waiting on its neighbours
+
+    Use it as a context manager around each unit of work, or wrap an
+    iterator in `timed` to count the time taken to produce each item. The
+    stage's own input can be wrapped in `untimed` inside a timed iterator,
+    so time blocked on the upstream stage is subtracted again.
+    """
+
+    def __init__(self):
+        self.seconds = 0.0
+        self.units = 0
+        self.span = None
+        self._start = 0.0
+
+    def __enter__(self) -> "BusyClock":
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.seconds += time.perf_counter() - self._start
+        self.units += 1
+
+    def timed(self, items: Iterable[Any]) -> Iterator[Any]:
+        iterator = iter(items)
+        while True:
+            start = time.perf_counter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+            finally:
+                self.seconds += time.perf_counter() - start
+            self.units += 1
+            yield item
+
+    def untimed(self, items: Iterable[Any]) -> Iterator[Any]:
+        iterator = iter(items)
+        while True:
+            start = time.perf_counter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+            finally:
+                self.seconds -= time.perf_counter() - start
+            yield item
+
+@contextmanager
+def busy_timer(pipeline: str, stage: str, **attributes):
+    """Trace a streaming stage and observe its busy time rather than its lifetime
+
+    Every stage of a concurrent pipeline lives as long as the pipeline,
+    mostly blocked on queues, so only the time recorded on the yielded
+    BusyClock goes to STAGE_LATENCY. The span still covers the lifetime
+    and carries the busy time as an attribute.
+    """
+    clock = BusyClock()
+    with get_tracer().span(f"{pipeline}.{stage}", **attributes) as span:
+        clock.span = span
+        try:
+            yield clock
+        finally:
+            span.set_attribute("busy_seconds", round(clock.seconds, 6))
+            span.set_attribute("units", clock.units)
+            STAGE_LATENCY.labels(pipeline=pipeline, stage=stage).observe(clock.seconds)
+
+@contextmanager
+def stage_timer(pipeline: str, stage: str, **attributes):
+    """Observe the wall time of a pipeline stage and trace it as a span"""
+    start = time.perf_counter()
+    try:
+        with get_tracer().span(f"{pipeline}.{stage}", **attributes) as span:
+            yield span
+    finally:
+        STAGE_LATENCY.labels(pipeline=pipeline, stage=stage).observe(time.perf_counter() - start)
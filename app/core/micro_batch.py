@@ -0,0 +1,126 @@
+from typing import Dict, List, Any, Callable, Optional
+from concurrent.futures import Future, ThreadPoolExecutor
+import contextvars
+import logging
+import queue
+import threading
+import time
+
+class _Pending:
+    __slots__ = ("item", "future", "context")
+
+    def __init__(self, item: Any):
+        self.item = item
+        self.future: Future = Future()
+        self.context = contextvars.copy_context()
+
+class MicroBatcher:
+    """Group concurrent single-item requests into batched calls
+
+    A collector thread takes the first waiting item, then keeps collecting
+    until `max_batch_size` items are queued or the batching window closes.
+    The window adapts to the observed arrival rate: when requests arrive
+    further apart than `max_wait_ms` it closes immediately, so a lone
+    request never waits for company that is not coming.
+    """
+
+    def __init__(self, batch_fn: Callable[[List[Any]], List[Any]],
+                 max_batch_size: int = 32,
+                 max_wait_ms: float = 5.0,
+                 max_concurrent_batches: int = 4,
+                 smoothing: float = 0.2,
+                 name: str = "micro-batcher"):
+        self.logger = logging.getLogger(__name__)
+        self.batch_fn = batch_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.smoothing = smoothing
+        self.name = name
+        self._queue: "queue.Queue[_Pending]" = queue.Queue()
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_concurrent_batches,
+            thread_name_prefix=name
+        )
+        self._lock = threading.Lock()
+        self._interarrival: Optional[float] = None
+        self._last_arrival: Optional[float] = None
+        self._thread: Optional[threading.Thread] = None
+        self.batches = 0
+        self.items = 0
+        self.window = 0.0
+
+    def submit(self, item: Any) -> Future:
+        """Queue an item and return a future for its result"""
+        pending = _Pending(item)
+        now = time.monotonic()
+        with self._lock:
+            if self._last_arrival is not None:
+                gap = now - self._last_arrival
+                if self._interarrival is None:
+                    self._interarrival = gap
+                else:
+                    self._interarrival += self.smoothing * (gap - self._interarrival)
+            self._last_arrival = now
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._collect, name=self.name, daemon=True
+                )
+                self._thread.start()
+        self._queue.put(pending)
+        return pending.future
+
+    def call(self, item: Any, timeout: Optional[float] = None) -> Any:
+        """Submit an item and block until its batch completes"""
+        return self.submit(item).result(timeout=timeout)
+
+    def _window(self) -> float:
+        interarrival = self._interarrival
+        if interarrival is None or interarrival >= self.max_wait:
+            return 0.0
+        return min(self.max_wait, interarrival * (self.max_batch_size - 1))
+
+    def _collect(self):
+        while True:
+            batch = [self._queue.get()]
+            self.window = self._window()
+            deadline = time.monotonic() + self.window
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                try:
+                    if remaining > 0:
+                        batch.append(self._queue.get(timeout=remaining))
+                    else:
+                        batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            self.batches += 1
+            self.items += len(batch)
+            self._executor.submit(self._dispatch, batch)
+
+    def _dispatch(self, batch: List[_Pending]):
+        try:
+            # Run in the first caller's context so request-scoped state
+            # (priority, tracing) follows the batch upstream.
+            results = batch[0].context.run(
+                self.batch_fn, [pending.item for pending in batch]
+            )
+            if len(results) != len(batch):
+                raise ValueError(
+                    f"{self.name} returned {len(results)} results for {len(batch)} items"
+                )
+        except Exception as e:
+            self.logger.error(f"Error in {self.name} batch of {len(batch)}: {e}")
+            for pending in batch:
+                pending.future.set_exception(e)
+            return
+        for pending, result in zip(batch, results):
+            pending.future.set_result(result)
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "batches": self.batches,
+            "items": self.items,
+            "mean_batch_size": self.items / self.batches if self.batches else 0.0,
+            "window_ms": self.window * 1000.0,
+            "queued": self._queue.qsize()
+        }
@@ -0,0 +1,63 @@
+from typing import Dict, Any
+from collections import Counter
+import os
+import sys
+import threading
+import time
+
+# Leaf frames in these modules are threads parked on a lock, queue or
+# socket; they are skipped unless idle stacks are requested.
+IDLE_MODULES = {"threading.py", "queue.py", "selectors.py", "socket.py", "base_events.py"}
+
+class ProfilerBusy(Exception):
+    """Raised when a profile is requested while another one is running"""
+
+_profile_lock = threading.Lock()
+
+def sample_profile(duration: float,
+                   interval: float = 0.005,
+                   max_depth: int = 64,
+                   include_idle: bool = False) -> Dict[str, Any]:
+    """Sample every thread's stack for `duration` seconds
+
+    Stacks are read with sys._current_frames, so the profiled code is not
+    instrumented and pays nothing beyond the GIL time of each sample. The
+    result counts collapsed stacks (thread;outermost;...;innermost), ready
+    to render as a flame graph.
+    """
+    if not _profile_lock.acquire(blocking=False):
+        raise ProfilerBusy("A profile is already running")
+    try:
+        own = threading.get_ident()
+        stacks: Counter = Counter()
+        samples = 0
+        deadline = time.monotonic() + duration
+        while time.monotonic() < deadline:
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                if not include_idle and os.path.basename(frame.f_code.co_filename) in IDLE_MODULES:
+                    continue
+                stack = []
+                while frame is not None and len(stack) < max_depth:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+                    frame = frame.f_back
+                stack.append(names.get(ident, str(ident)))
+                stacks[";".join(reversed(stack))] += 1
+            samples += 1
+            time.sleep(interval)
+    finally:
+        _profile_lock.release()
+
+    return {
+        "duration_s": duration,
+        "interval_ms": interval * 1000,
+        "samples": samples,
+        "stacks": [{"stack": stack, "count": count} for stack, count in stacks.most_common()]
+    }
+
+def to_folded(profile: Dict[str, Any]) -> str:
+    """Render a profile in the folded format read by flamegraph.pl and speedscope"""
+    return "".join(f"{entry['stack']} {entry['count']}\n" for entry in profile["stacks"])
@@ -0,0 +1,236 @@
+from typing import Dict, List, Any, Callable, Optional
+from contextlib import contextmanager
+from contextvars import ContextVar
+from enum import IntEnum
+import heapq
+import itertools
+import logging
+import os
+import random
+import threading
+import time
+
+class Priority(IntEnum):
+    INTERACTIVE = 0
+    BULK = 1
+
+_current_priority: ContextVar[Priority] = ContextVar("rate_limit_priority", default=Priority.BULK)
+
+def current_priority() -> Priority:
+    return _current_priority.get()
+
+@contextmanager
+def priority_scope(priority: Priority):
+    """Run provider calls made in this block at the given priority"""
+    token = _current_priority.set(priority)
+    try:
+        yield
+    finally:
+        _current_priority.reset(token)
+
+class RateLimitExceeded(Exception):
+    """Raised when a call could not be admitted or kept being throttled"""
+
+    def __init__(self, message: str, retry_after: float = 1.0):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+_THROTTLING_CODES = ("ThrottlingException", "TooManyRequestsException",
+                      "Throttling", "RequestLimitExceeded")
+
+def _is_throttling(error: BaseException) -> bool:
+    if getattr(error, "status_code", None) == 429:
+        return True
+    response = getattr(error, "response", None)
+    if isinstance(response, dict):
+        code = response.get("Error", {}).get("Code")
+        status = response.get("ResponseMetadata", {}).get("HTTPStatusCode")
+        return code in _THROTTLING_CODES or status == 429
+    return type(error).__name__ in ("RateLimitError", "ThrottlingException")
+
+def is_throttling_error(error: BaseException) -> bool:
+    """Recognize OpenAI 429s and AWS throttling errors
+
+    LangChain's Bedrock wrappers re-raise botocore errors as a plain
+    ValueError, so the cause/context chain is searched as well.
+    """
+    seen = set()
+    while error is not None and id(error) not in seen:
+        if _is_throttling(error):
+            return True
+        seen.add(id(error))
+        error = error.__cause__ or error.__context__
+    return False
+
+def estimate_tokens(texts: List[str]) -> int:
+    """Cheap token estimate for quota accounting (about four characters per token)"""
+    return sum(len(text) for text in texts) // 4 + 1
+
+class TokenBucket:
+    """Refilling token bucket; callers are expected to hold their own lock"""
+
+    def __init__(self, capacity: float, refill_per_second: float):
+        self.capacity = capacity
+        self.refill_per_second = refill_per_second
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.refill_per_second)
+        self.updated = now
+
+    def wait_time(self, amount: float) -> float:
+        """Seconds until `amount` tokens are available"""
+        self._refill()
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) / self.refill_per_second
+
+    def consume(self, amount: float):
+        self._refill()
+        self.tokens -= amount
+
+class AdaptiveRateLimiter:
+    """Requests/min and tokens/min limiter with AIMD concurrency control
+
+    Admission is strictly by priority, then arrival order, so interactive
+    calls queued behind bulk ingestion go first. The concurrency limit grows
+    by one per window of successful calls and halves on throttling.
+    """
+
+    def __init__(self, name: str,
+                 requests_per_minute: float,
+                 tokens_per_minute: float,
+                 max_concurrency: int = 32,
+                 min_concurrency: int = 1,
+                 max_wait: float = 60.0,
+                 max_retries: int = 5,
+                 backoff_base: float = 0.5,
+                 backoff_max: float = 30.0):
+        self.logger = logging.getLogger(__name__)
+        self.name = name
+        self.requests = TokenBucket(requests_per_minute, requests_per_minute / 60.0)
+        self.tokens = TokenBucket(tokens_per_minute, tokens_per_minute / 60.0)
+        self.max_concurrency = max_concurrency
+        self.min_concurrency = min_concurrency
+        self.concurrency_limit = float(max_concurrency)
+        self.max_wait = max_wait
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.in_flight = 0
+        self.throttled = 0
+        self._last_decrease = 0.0
+        self._waiters: List[Any] = []
+        self._sequence = itertools.count()
+        self._condition = threading.Condition()
+
+    def acquire(self, tokens: int = 1, priority: Optional[Priority] = None):
+        """Block until the call may start; raises RateLimitExceeded on timeout"""
+        priority = current_priority() if priority is None else priority
+        tokens = min(tokens, self.tokens.capacity)
+        entry = (int(priority), next(self._sequence))
+        deadline = time.monotonic() + self.max_wait
+        with self._condition:
+            heapq.heappush(self._waiters, entry)
+            try:
+                while True:
+                    wait = None
+                    if self._waiters[0] == entry and self.in_flight < int(self.concurrency_limit):
+                        wait = max(self.requests.wait_time(1), self.tokens.wait_time(tokens))
+                        if wait == 0.0:
+                            self.requests.consume(1)
+                            self.tokens.consume(tokens)
+                            self.in_flight += 1
+                            return
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise RateLimitExceeded(
+                            f"{self.name} rate limit: no capacity within {self.max_wait}s",
+                            retry_after=wait or 1.0
+                        )
+                    self._condition.wait(min(remaining, wait) if wait else remaining)
+            finally:
+                self._waiters.remove(entry)
+                heapq.heapify(self._waiters)
+                self._condition.notify_all()
+
+    def release(self, throttled: bool = False):
+        with self._condition:
+            self.in_flight -= 1
+            if throttled:
+                self.throttled += 1
+                now = time.monotonic()
+                # Calls already in flight when throttling started all fail
+                # together; count them as a single congestion signal.
+                if now - self._last_decrease > 1.0:
+                    self.concurrency_limit = max(self.min_concurrency, self.concurrency_limit / 2)
+                    self._last_decrease = now
+            else:
+                self.concurrency_limit = min(
+                    self.max_concurrency,
+                    self.concurrency_limit + 1.0 / self.concurrency_limit
+                )
+            self._condition.notify_all()
+
+    def call(self, fn: Callable[[], Any], tokens: int = 1,
+             priority: Optional[Priority] = None) -> Any:
+        """Run fn under the limiter, retrying throttled calls with backoff"""
+        for attempt in range(self.max_retries + 1):
+            self.acquire(tokens, priority)
+            try:
+                result = fn()
+            except Exception as e:
+                throttled = is_throttling_error(e)
+                self.release(throttled=throttled)
+                if not throttled:
+                    raise
+                if attempt == self.max_retries:
+                    raise RateLimitExceeded(
+                        f"{self.name} throttled after {attempt + 1} attempts: {e}"
+                    ) from e
+                delay = min(self.backoff_max, self.backoff_base * 2 ** attempt)
+                delay *= random.uniform(0.5, 1.0)
+                self.logger.warning(f"{self.name} throttled, retrying in {delay:.2f}s")
+                time.sleep(delay)
+                continue
+            self.release()
+            return result
+
+    def stats(self) -> Dict[str, float]:
+        with self._condition:
+            return {
+                "in_flight": self.in_flight,
+                "concurrency_limit": self.concurrency_limit,
+                "waiting": len(self._waiters),
+                "throttled": self.throttled
+            }
+
+_limiters: Dict[str, AdaptiveRateLimiter] = {}
+_limiters_lock = threading.Lock()
+
+_DEFAULT_QUOTAS = {
+    "openai": (3000, 1000000),
+    "bedrock": (600, 400000)
+}
+
+def get_rate_limiter(provider: str) -> AdaptiveRateLimiter:
+    """Return the process-wide limiter for a provider
+
+    Quotas come from <PROVIDER>_REQUESTS_PER_MINUTE, <PROVIDER>_TOKENS_PER_MINUTE
+    and <PROVIDER>_MAX_CONCURRENCY.
+    """
+    with _limiters_lock:
+        limiter = _limiters.get(provider)
+        if limiter is None:
+            prefix = provider.upper()
+            default_rpm, default_tpm = _DEFAULT_QUOTAS.get(provider, (600, 200000))
+            limiter = AdaptiveRateLimiter(
+                provider,
+                requests_per_minute=float(os.getenv(f"{prefix}_REQUESTS_PER_MINUTE", default_rpm)),
+                tokens_per_minute=float(os.getenv(f"{prefix}_TOKENS_PER_MINUTE", default_tpm)),
+                max_concurrency=int(os.getenv(f"{prefix}_MAX_CONCURRENCY", "32"))
+            )
+            _limiters[provider] = limiter
+        return limiter
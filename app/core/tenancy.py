@@ -0,0 +1,240 @@
+from typing import Deque, Dict, Any, List, Optional
+from collections import deque
+from dataclasses import dataclass
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+from .cache import LRUCache
+from .rate_limit import RateLimitExceeded, TokenBucket
+
+TENANT_ID_PATTERN = re.compile(r"^[A-Za-z0-9][A-Za-z0-9_.-]{0,63}$")
+
+class InvalidTenant(ValueError):
+    """Raised for tenant ids that cannot be used as a namespace"""
+
+class TenantAuthenticationError(Exception):
+    """Raised when a request's API key is missing or unknown"""
+
+class StorageQuotaExceeded(Exception):
+    """Raised when an upsert would take a tenant past its vector quota"""
+
+    def __init__(self, message: str, tenant_id: str, limit: int):
+        super().__init__(message)
+        self.tenant_id = tenant_id
+        self.limit = limit
+
+@dataclass
+class TenantQuota:
+    max_vectors: Optional[int] = None
+    queries_per_second: Optional[float] = None
+    burst: Optional[float] = None
+
+def namespace_for(tenant_id: Optional[str]) -> str:
+    """Map a tenant to its index namespace; no tenant is the default namespace"""
+    if tenant_id is None:
+        return ""
+    if not TENANT_ID_PATTERN.match(tenant_id):
+        raise InvalidTenant(f"Invalid tenant id: {tenant_id!r}")
+    return tenant_id
+
+class TenantKeys:
+    """Resolve the tenant a request acts for from its API key
+
+    Tenancy is enabled by configuring keys; each key belongs to exactly one
+    tenant, so a caller can only reach its own namespace. Keys are held as
+    SHA-256 digests and looked up by digest.
+    """
+
+    def __init__(self, keys: Optional[Dict[str, List[str]]] = None):
+        self._tenants: Dict[str, str] = {}
+        for tenant_id, tenant_keys in (keys or {}).items():
+            namespace_for(tenant_id)
+            for key in ([tenant_keys] if isinstance(tenant_keys, str) else tenant_keys):
+                self._tenants[self._digest(key)] = tenant_id
+
+    @classmethod
+    def from_env(cls) -> "TenantKeys":
+        """Keys from TENANT_API_KEYS (JSON: tenant id to a key or list of keys)"""
+        return cls(json.loads(os.getenv("TENANT_API_KEYS", "{}")))
+
+    @staticmethod
+    def _digest(key: str) -> str:
+        return hashlib.sha256(key.encode()).hexdigest()
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self._tenants)
+
+    def resolve(self, api_key: Optional[str]) -> Optional[str]:
+        """Return the key's tenant; None (default namespace) only while tenancy is disabled"""
+        if not self.enabled:
+            return None
+        tenant_id = self._tenants.get(self._digest(api_key)) if api_key else None
+        if tenant_id is None:
+            raise TenantAuthenticationError("Missing or unknown API key")
+        return tenant_id
+
+class TenantQuotas:
+    """Per-tenant query rate and storage limits
+
+    Query rate is a token bucket per tenant. Storage is checked against the
+    namespace vector counts reported by `describe_index_stats`, refreshed
+    at most every `stats_ttl` seconds, plus the vectors this process has
+    reserved, so uploads do not pay for a stats call each. Stats lag
+    writes, so a reservation is kept until a refresh shows the namespace
+    grown by it, or for at most `reservation_ttl` seconds.
+    """
+
+    def __init__(self, index, default: Optional[TenantQuota] = None,
+                 overrides: Optional[Dict[str, TenantQuota]] = None,
+                 stats_ttl: float = 30.0,
+                 reservation_ttl: float = 600.0,
+                 max_buckets: int = 10000):
+        self.logger = logging.getLogger(__name__)
+        self.index = index
+        self.default = default or TenantQuota()
+        self.overrides = overrides or {}
+        self.stats_ttl = stats_ttl
+        self.reservation_ttl = reservation_ttl
+        self._buckets = LRUCache(max_entries=max_buckets)
+        self._counts: Dict[str, int] = {}
+        # Oldest first: [reserved at, vector count]
+        self._reserved: Dict[str, Deque[List[float]]] = {}
+        self._refreshed = 0.0
+        self._refreshing = False
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls, index) -> "TenantQuotas":
+        """Defaults from TENANT_MAX_VECTORS / TENANT_QPS / TENANT_BURST, overrides from TENANT_QUOTAS (JSON)"""
+        def number(name: str, kind):
+            value = os.getenv(name)
+            return kind(value) if value else None
+
+        default = TenantQuota(
+            max_vectors=number("TENANT_MAX_VECTORS", int),
+            queries_per_second=number("TENANT_QPS", float),
+            burst=number("TENANT_BURST", float)
+        )
+        overrides = {
+            tenant_id: TenantQuota(**quota)
+            for tenant_id, quota in json.loads(os.getenv("TENANT_QUOTAS", "{}")).items()
+        }
+        return cls(index, default=default, overrides=overrides)
+
+    def quota(self, namespace: str) -> TenantQuota:
+        return self.overrides.get(namespace, self.default)
+
+    def check_query(self, namespace: str):
+        """Admit one query or raise RateLimitExceeded with the time until the next token"""
+        quota = self.quota(namespace)
+        if not quota.queries_per_second:
+            return
+        with self._lock:
+            bucket = self._buckets.get(namespace)
+            if bucket is None:
+                bucket = TokenBucket(quota.burst or quota.queries_per_second, quota.queries_per_second)
+                self._buckets.set(namespace, bucket)
+            wait = bucket.wait_time(1)
+            if wait > 0:
+                raise RateLimitExceeded(f"Query quota exceeded for tenant {namespace!r}", retry_after=wait)
+            bucket.consume(1)
+
+    def _refresh(self):
+        """Refresh namespace counts when stale; call without holding the lock
+
+        The stats call is a network round trip on Pinecone, so it runs
+        outside the lock and one caller at a time; others keep using the
+        previous counts meanwhile, except before the first load.
+        """
+        with self._lock:
+            started = time.monotonic()
+            if started - self._refreshed < self.stats_ttl or (self._refreshing and self._loaded):
+                return
+            self._refreshing = True
+        try:
+            stats = self.index.describe_index_stats()
+        except Exception:
+            with self._lock:
+                self._refreshing = False
+            raise
+        namespaces = stats.get("namespaces") or {}
+        counts = {name: int(info.get("vector_count", 0)) for name, info in namespaces.items()}
+        with self._lock:
+            self._refreshing = False
+            if self._loaded and self._refreshed > started:
+                return
+            previous, self._counts = self._counts, counts
+            self._refreshed = started
+            self._loaded = True
+            for namespace, reservations in list(self._reserved.items()):
+                grown = counts.get(namespace, 0) - previous.get(namespace, 0)
+                # Reservations made after the stats call started cannot be in it yet
+                while reservations and reservations[0][0] <= started and (
+                        grown >= reservations[0][1] or started - reservations[0][0] > self.reservation_ttl):
+                    grown -= reservations.popleft()[1]
+                if not reservations:
+                    del self._reserved[namespace]
+
+    def _reserved_count(self, namespace: str) -> int:
+        return int(sum(count for _, count in self._reserved.get(namespace, ())))
+
+    def reserve_vectors(self, namespace: str, count: int) -> Optional[List[float]]:
+        """Account for `count` new vectors or raise StorageQuotaExceeded
+
+        Returns a handle for `release_vectors`, or None when nothing was
+        reserved.
+        """
+        quota = self.quota(namespace)
+        if quota.max_vectors is None:
+            return None
+        self._refresh()
+        with self._lock:
+            used = self._counts.get(namespace, 0) + self._reserved_count(namespace)
+            if used + count > quota.max_vectors:
+                raise StorageQuotaExceeded(
+                    f"Tenant {namespace!r} would exceed its quota of {quota.max_vectors} vectors",
+                    tenant_id=namespace, limit=quota.max_vectors
+                )
+            if not count:
+                return None
+            reservation = [time.monotonic(), count]
+            self._reserved.setdefault(namespace, deque()).append(reservation)
+            return reservation
+
+    def release_vectors(self, namespace: str, reservation: Optional[List[float]]):
+        """Return a reservation whose vectors were not stored, or were deleted again"""
+        if reservation is None:
+            return
+        with self._lock:
+            reservations = self._reserved.get(namespace)
+            if not reservations:
+                return
+            for position, held in enumerate(reservations):
+                if held is reservation:
+                    del reservations[position]
+                    break
+            if not reservations:
+                del self._reserved[namespace]
+
+    def invalidate(self):
+        """Force a stats refresh, e.g. after a delete"""
+        with self._lock:
+            self._refreshed = 0.0
+
+    def usage(self, namespace: str) -> Dict[str, Any]:
+        quota = self.quota(namespace)
+        self._refresh()
+        with self._lock:
+            vectors = self._counts.get(namespace, 0) + self._reserved_count(namespace)
+        return {
+            "tenant_id": namespace or None,
+            "vectors": vectors,
+            "max_vectors": quota.max_vectors,
+            "queries_per_second": quota.queries_per_second
+        }
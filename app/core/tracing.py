@@ -0,0 +1,255 @@
+from typing import Dict, List, Any, Optional
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+import atexit
+import json
+import logging
+import os
+import queue
+import random
+import threading
+import time
+import urllib.request
+
+@dataclass
+class Span:
+    name: str
+    trace_id: str
+    span_id: str
+    parent_id: Optional[str] = None
+    start_ns: int = 0
+    end_ns: int = 0
+    attributes: Dict[str, Any] = field(default_factory=dict)
+    error: Optional[str] = None
+
+    def set_attribute(self, key: str, value: Any):
+        self.attributes[key] = value
+
+    def add(self, key: str, value: float):
+        """Accumulate a numeric attribute, e.g. bytes seen across a loop"""
+        self.attributes[key] = self.attributes.get(key, 0) + value
+
+class _NoopSpan:
+    """Stand-in yielded for unsampled traces so callers never branch"""
+
+    def set_attribute(self, key: str, value: Any):
+        pass
+
+    def add(self, key: str, value: float):
+        pass
+
+NOOP_SPAN = _NoopSpan()
+
+# The active span, or NOOP_SPAN inside a trace that was not sampled
+_current: ContextVar[Any] = ContextVar("docuvector_span", default=None)
+
+def _otlp_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+def to_otlp(spans: List[Span], service_name: str) -> Dict[str, Any]:
+    """Encode spans as an OTLP/JSON ExportTraceServiceRequest"""
+    encoded = []
+    for span in spans:
+        record = {
+            "traceId": span.trace_id,
+            "spanId": span.span_id,
+            "name": span.name,
+            "kind": 1,
+            "startTimeUnixNano": str(span.start_ns),
+            "endTimeUnixNano": str(span.end_ns),
+            "attributes": [{"key": k, "value": _otlp_value(v)} for k, v in span.attributes.items()],
+            "status": {"code": 2, "message": span.error} if span.error else {"code": 1}
+        }
+        if span.parent_id:
+            record["parentSpanId"] = span.parent_id
+        encoded.append(record)
+    return {
+        "resourceSpans": [{
+            "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": service_name}}]},
+            "scopeSpans": [{"scope": {"name": "docuvector"}, "spans": encoded}]
+        }]
+    }
+
+class FileExporter:
+    """Append one OTLP/JSON request per line to a local file"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def export(self, payload: Dict[str, Any]):
+        line = json.dumps(payload, separators=(",", ":"))
+        with self._lock:
+            with open(self.path, "a") as f:
+                f.write(line + "\n")
+
+class OTLPHttpExporter:
+    """POST OTLP/JSON to a collector's /v1/traces endpoint"""
+
+    def __init__(self, endpoint: str, timeout: float = 5.0):
+        self.url = endpoint.rstrip("/") + "/v1/traces"
+        self.timeout = timeout
+
+    def export(self, payload: Dict[str, Any]):
+        request = urllib.request.Request(
+            self.url,
+            data=json.dumps(payload).encode(),
+            headers={"Content-Type": "application/json"},
+            method="POST"
+        )
+        with urllib.request.urlopen(request, timeout=self.timeout):
+            pass
+
+class Tracer:
+    """Sampled span tracing that exports OpenTelemetry-compatible JSON
+
+    The sampling decision is made once at the root span and inherited by
+    every child through a context variable, so a trace is either recorded
+    whole or not at all, and unsampled requests only pay for a
+    ContextVar lookup. Finished spans are queued and exported in batches
+    from a background thread; when the queue is full spans are dropped
+    rather than blocking the request.
+    """
+
+    def __init__(self, service_name: str = "docuvector",
+                 sample_rate: float = 0.0,
+                 exporter=None,
+                 flush_interval: float = 5.0,
+                 max_batch_size: int = 512,
+                 max_queue_size: int = 10000):
+        self.logger = logging.getLogger(__name__)
+        self.service_name = service_name
+        self.sample_rate = sample_rate
+        self.exporter = exporter
+        self.flush_interval = flush_interval
+        self.max_batch_size = max_batch_size
+        self.dropped = 0
+        self._queue: "queue.Queue[Span]" = queue.Queue(maxsize=max_queue_size)
+        self._flush_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @contextmanager
+    def span(self, name: str, **attributes: Any):
+        """Open a child of the current span, or a new root subject to sampling"""
+        parent = _current.get()
+        if parent is NOOP_SPAN or self.exporter is None:
+            yield NOOP_SPAN
+            return
+        if parent is None and random.random() >= self.sample_rate:
+            token = _current.set(NOOP_SPAN)
+            try:
+                yield NOOP_SPAN
+            finally:
+                _current.reset(token)
+            return
+
+        span = Span(
+            name=name,
+            trace_id=parent.trace_id if parent else os.urandom(16).hex(),
+            span_id=os.urandom(8).hex(),
+            parent_id=parent.span_id if parent else None,
+            start_ns=time.time_ns(),
+            attributes=dict(attributes)
+        )
+        token = _current.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            _current.reset(token)
+            span.end_ns = time.time_ns()
+            self._finish(span)
+
+    def _finish(self, span: Span):
+        try:
+            self._queue.put_nowait(span)
+        except queue.Full:
+            self.dropped += 1
+            return
+        if self._thread is None:
+            self.start()
+
+    def flush(self):
+        """Export every queued span"""
+        with self._flush_lock:
+            while True:
+                batch = []
+                while len(batch) < self.max_batch_size:
+                    try:
+                        batch.append(self._queue.get_nowait())
+                    except queue.Empty:
+                        break
+                if not batch:
+                    return
+                try:
+                    self.exporter.export(to_otlp(batch, self.service_name))
+                except Exception as e:
+                    self.logger.error(f"Failed to export {len(batch)} spans: {e}")
+
+    def start(self):
+        """Start the background export thread"""
+        with self._flush_lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run, name="span-exporter", daemon=True)
+            self._thread.start()
+
+    def close(self):
+        """Stop the export thread and export whatever is still queued"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.flush_interval)
+            self._thread = None
+        if self.exporter is not None:
+            self.flush()
+
+    def _run(self):
+        while not self._stop.wait(self.flush_interval):
+            try:
+                self.flush()
+            except Exception as e:
+                self.logger.error(f"Error exporting spans: {e}")
+
+def current_span():
+    """Return the active span, or a no-op span outside a sampled trace"""
+    span = _current.get()
+    return NOOP_SPAN if span is None else span
+
+_tracer: Optional[Tracer] = None
+_tracer_lock = threading.Lock()
+
+def get_tracer() -> Tracer:
+    """Return the process-wide tracer configured from the environment
+
+    TRACE_SAMPLE_RATE sets the fraction of root spans recorded (default 0).
+    Spans go to OTEL_EXPORTER_OTLP_ENDPOINT when set, otherwise to
+    TRACE_EXPORT_PATH when set; with neither, tracing is disabled.
+    """
+    global _tracer
+    with _tracer_lock:
+        if _tracer is None:
+            endpoint = os.getenv("OTEL_EXPORTER_OTLP_ENDPOINT")
+            path = os.getenv("TRACE_EXPORT_PATH")
+            if endpoint:
+                exporter = OTLPHttpExporter(endpoint)
+            elif path:
+                exporter = FileExporter(path)
+            else:
+                exporter = None
+            _tracer = Tracer(
+                service_name=os.getenv("OTEL_SERVICE_NAME", "docuvector"),
+                sample_rate=float(os.getenv("TRACE_SAMPLE_RATE", "0")),
+                exporter=exporter
+            )
+            atexit.register(_tracer.close)
+        return _tracer
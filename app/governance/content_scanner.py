@@ -0,0 +1,118 @@
+from typing import Dict, List, Pattern, Tuple
+from dataclasses import dataclass
+import re
+
+DEFAULT_LEXICONS: Dict[str, List[str]] = {
+    "hate_speech": [
+        "subhuman", "vermin", "inferior race", "go back to your country",
+        "ethnic cleansing", "master race"
+    ],
+    "violence": [
+        "kill", "murder", "shoot", "stab", "behead", "massacre", "bomb",
+        "assassinate", "torture", "lynch"
+    ],
+    "discrimination": [
+        "not hire women", "no immigrants", "only hire", "don't belong here",
+        "are naturally inferior", "whites only", "men only"
+    ],
+    "misinformation": [
+        "miracle cure", "hoax", "cover-up", "they don't want you to know",
+        "100% guaranteed", "doctors hate", "plandemic"
+    ]
+}
+
+PII_PATTERNS: Dict[str, str] = {
+    "email": r"[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}",
+    "ssn": r"\b\d{3}-\d{2}-\d{4}\b",
+    "credit_card": r"\b(?:\d[ -]?){12,18}\d\b",
+    "phone": r"(?<!\w)(?:\+?1[-. ]?)?\(?\d{3}\)?[-. ]\d{3}[-. ]\d{4}\b",
+    "ipv4": r"\b(?:(?:25[0-5]|2[0-4]\d|1?\d?\d)\.){3}(?:25[0-5]|2[0-4]\d|1?\d?\d)\b"
+}
+
+# Specific enough to confirm locally; other PII hits (emails, phone-like
+# numbers, IPv4-like strings such as version numbers) are only candidates
+LOCALLY_CONFIRMED_PII = {"ssn", "credit_card"}
+
+@dataclass
+class ContentMatch:
+    filter_type: str
+    start: int
+    end: int
+    label: str
+    confirmed: bool
+
+def _luhn_valid(candidate: str) -> bool:
+    digits = [int(c) for c in candidate if c.isdigit()]
+    checksum = 0
+    for i, digit in enumerate(reversed(digits)):
+        if i % 2:
+            digit *= 2
+            if digit > 9:
+                digit -= 9
+        checksum += digit
+    return checksum % 10 == 0
+
+class ContentScanner:
+    """Local pre-filter for content moderation
+
+    Lexicon terms are compiled into one case-insensitive alternation per
+    filter type, and each PII pattern on its own, so a text is scanned
+    once per group no matter how many terms are configured. Groups are
+    matched independently, so hits of different types may overlap (e.g.
+    "naturally inferior race" is both discrimination and hate speech).
+    Lexicon hits and loose PII patterns are only suspicious and need
+    confirmation by the expensive checks; SSNs and Luhn-valid card numbers
+    are confirmed locally.
+    """
+
+    def __init__(self, lexicons: Dict[str, List[str]],
+                 pii_filter: str = "sensitive_personal_data",
+                 context_chars: int = 80):
+        self.pii_filter = pii_filter
+        self.context_chars = context_chars
+        # (filter type, label, pattern)
+        self._patterns: List[Tuple[str, str, Pattern]] = [
+            (pii_filter, label, re.compile(pattern, re.IGNORECASE))
+            for label, pattern in PII_PATTERNS.items()
+        ]
+        for filter_type, terms in lexicons.items():
+            if not terms:
+                continue
+            # Longest terms first so overlapping phrases win over their prefixes
+            escaped = sorted((re.escape(term) for term in set(terms)), key=len, reverse=True)
+            self._patterns.append((
+                filter_type, filter_type,
+                re.compile(rf"\b(?:{'|'.join(escaped)})\b", re.IGNORECASE)
+            ))
+
+    def scan(self, text: str) -> List[ContentMatch]:
+        """Return every lexicon and PII match, ordered by position"""
+        matches = []
+        for filter_type, label, pattern in self._patterns:
+            is_pii = filter_type == self.pii_filter and label != filter_type
+            for match in pattern.finditer(text):
+                if label == "credit_card" and not _luhn_valid(match.group()):
+                    continue
+                matches.append(ContentMatch(
+                    filter_type=filter_type,
+                    start=match.start(),
+                    end=match.end(),
+                    label=label,
+                    confirmed=is_pii and label in LOCALLY_CONFIRMED_PII
+                ))
+        matches.sort(key=lambda m: (m.start, -m.end))
+        return matches
+
+    def windows(self, text: str,
+                matches: List[ContentMatch]) -> List[Tuple[int, int, List[ContentMatch]]]:
+        """Group suspicious matches into merged context windows for escalation"""
+        windows: List[Tuple[int, int, List[ContentMatch]]] = []
+        for match in sorted(matches, key=lambda m: m.start):
+            start = max(0, match.start - self.context_chars)
+            end = min(len(text), match.end + self.context_chars)
+            if windows and start <= windows[-1][1]:
+                prev_start, prev_end, prev_matches = windows[-1]
+                windows[-1] = (prev_start, max(prev_end, end), prev_matches + [match])
+            else:
+                windows.append((start, end, [match]))
+        return windows
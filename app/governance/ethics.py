@@ -1,10 +1,19 @@
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Callable
+import hashlib
+import json
 import logging
-from dataclasses import dataclass
+import math
+import os
+import random
+import re
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
 from enum import Enum
 from datetime import datetime
-import boto3
-from botocore.exceptions import ClientError
+from ..core.aws import get_client
+from ..core.cache import LRUCache
+from ..core.cloudwatch_metrics import MetricsEmitter, get_metrics_emitter
+from .content_scanner import DEFAULT_LEXICONS, ContentMatch, ContentScanner
 
 class BiasCategory(Enum):
     GENDER = "gender"
@@ -28,10 +37,65 @@ class EthicsCheck:
     confidence_threshold: float
     content_filters: List[str]
     risk_levels: Dict[str, ContentRiskLevel]
+    lexicons: Dict[str, List[str]] = field(default_factory=dict)
+
+BiasDetector = Callable[[str, List[BiasCategory]], Dict[BiasCategory, float]]
+
+class LLMBiasDetector:
+    """Score every bias category for a text in a single LLM call"""
+
+    PROMPT = (
+        "Rate how strongly the text below shows bias in each of these categories: "
+        "{categories}.\n"
+        "Answer with only a JSON object mapping each category to a confidence "
+        "between 0 and 1.\n\nText:\n{text}"
+    )
+
+    def __init__(self, llm):
+        self.logger = logging.getLogger(__name__)
+        self.llm = llm
+
+    def __call__(self, text: str, categories: List[BiasCategory]) -> Dict[BiasCategory, float]:
+        prompt = self.PROMPT.format(
+            categories=", ".join(category.value for category in categories),
+            text=text
+        )
+        response = self.llm.predict(prompt)
+        match = re.search(r"\{.*\}", response, re.DOTALL)
+        try:
+            scores = json.loads(match.group(0)) if match else {}
+        except json.JSONDecodeError:
+            self.logger.error(f"Unparseable bias detector response: {response[:200]}")
+            scores = {}
+        if not isinstance(scores, dict):
+            scores = {}
+        return {
+            category: self._score(scores.get(category.value))
+            for category in categories
+        }
+
+    def _score(self, value: Any) -> float:
+        """Read one confidence; anything that is not a finite number counts as missing"""
+        if value is None or isinstance(value, bool):
+            return 0.0
+        try:
+            score = float(value)
+        except (TypeError, ValueError):
+            self.logger.warning(f"Invalid bias score from detector: {str(value)[:50]!r}")
+            return 0.0
+        return score if math.isfinite(score) else 0.0
 
 class AIEthicsGovernance:
-    def __init__(self):
+    def __init__(self, bias_detector: Optional[BiasDetector] = None,
+                 verdict_cache_size: int = 10000,
+                 max_workers: int = 8,
+                 metrics: Optional[MetricsEmitter] = None,
+                 full_check_rate: Optional[float] = None):
         self.logger = logging.getLogger(__name__)
+        self.metrics = metrics or get_metrics_emitter()
+        self.bias_detector = bias_detector
+        self.verdict_cache = LRUCache(max_entries=verdict_cache_size)
+        self.executor = ThreadPoolExecutor(max_workers=max_workers)
         self.ethics_checks = EthicsCheck(
             bias_categories=[
                 BiasCategory.GENDER,
@@ -56,60 +120,179 @@ class AIEthicsGovernance:
                 "discrimination": ContentRiskLevel.HIGH,
                 "misinformation": ContentRiskLevel.MEDIUM,
                 "sensitive_personal_data": ContentRiskLevel.CRITICAL
-            }
+            },
+            lexicons=self._load_lexicons()
+        )
+        # Share of texts without lexicon hits for a filter type that still get
+        # the full-text check for it; below 1 trades recall for fewer checks
+        self.full_check_rate = full_check_rate if full_check_rate is not None else float(
+            os.getenv("CONTENT_FULL_CHECK_RATE", "1.0")
         )
-        self.s3_client = boto3.client('s3')
-        self.cloudwatch = boto3.client('cloudwatch')
+        self.content_scanner = ContentScanner({
+            filter_type: terms
+            for filter_type, terms in self.ethics_checks.lexicons.items()
+            if filter_type in self.ethics_checks.content_filters
+        })
+        self.s3_client = get_client('s3')
 
     def check_bias(self, text: str) -> Dict[str, Any]:
         """
         Check for potential biases in the text using multiple detection methods.
         """
+        results = self._bias_results(self._score_bias(text))
+        self._log_bias_check(results)
+        return results
+
+    def check_bias_batch(self, texts: List[str]) -> List[Dict[str, Any]]:
+        """
+        Check many texts for bias, scoring each distinct uncached text once.
+        """
+        keys = [self._verdict_key(text) for text in texts]
+        scores = {}
+        pending = {}
+        for key, text in zip(keys, texts):
+            cached = self.verdict_cache.get(key)
+            if cached is not None:
+                scores[key] = cached
+            elif key not in pending:
+                pending[key] = text
+
+        if pending:
+            if self.bias_detector is not None:
+                computed = self.executor.map(self._score_uncached, pending.values())
+            else:
+                # Without a multi-category detector, fan out every
+                # (text, category) pair over the pool at once.
+                categories = self.ethics_checks.bias_categories
+                pairs = [(text, category) for text in pending.values() for category in categories]
+                flat = list(self.executor.map(lambda pair: self._detect_bias_using_llm(*pair), pairs))
+                computed = [
+                    dict(zip(categories, flat[i:i + len(categories)]))
+                    for i in range(0, len(flat), len(categories))
+                ]
+            for key, text_scores in zip(pending, computed):
+                self.verdict_cache.set(key, text_scores)
+                scores[key] = text_scores
+
+        batch_results = []
+        for key in keys:
+            results = self._bias_results(scores[key])
+            self._log_bias_check(results)
+            batch_results.append(results)
+        return batch_results
+
+    def _verdict_key(self, text: str) -> str:
+        categories = ",".join(category.value for category in self.ethics_checks.bias_categories)
+        return hashlib.sha256(f"{categories}\0{text}".encode("utf-8", "surrogatepass")).hexdigest()
+
+    def _score_bias(self, text: str) -> Dict[BiasCategory, float]:
+        """
+        Return per-category bias confidence, reusing cached verdicts by content hash.
+        """
+        key = self._verdict_key(text)
+        scores = self.verdict_cache.get(key)
+        if scores is None:
+            scores = self._score_uncached(text)
+            self.verdict_cache.set(key, scores)
+        return scores
+
+    def _score_uncached(self, text: str) -> Dict[BiasCategory, float]:
+        """
+        Score all categories in one detector call, or concurrently per category.
+        """
+        categories = self.ethics_checks.bias_categories
+        if self.bias_detector is not None:
+            return self.bias_detector(text, categories)
+        confidences = self.executor.map(
+            lambda category: self._detect_bias_using_llm(text, category),
+            categories
+        )
+        return dict(zip(categories, confidences))
+
+    def _bias_results(self, scores: Dict[BiasCategory, float]) -> Dict[str, Any]:
         results = {
             "has_bias": False,
             "categories": {},
             "confidence": 0.0,
             "risk_level": ContentRiskLevel.LOW.value
         }
-        
+
         for category in self.ethics_checks.bias_categories:
-            # Use multiple detection methods
-            confidence = self._detect_bias_using_llm(text, category)
+            confidence = scores.get(category, 0.0)
             if confidence > self.ethics_checks.confidence_threshold:
                 results["has_bias"] = True
                 results["categories"][category.value] = {
                     "confidence": confidence,
                     "risk_level": self._determine_risk_level(category, confidence)
                 }
-        
-        self._log_bias_check(results)
+
         return results
 
     def filter_content(self, text: str) -> Dict[str, Any]:
         """
         Enhanced content filtering with risk assessment.
+
+        Filter types with local hits only escalate the context windows
+        around them; the others get a full-text check for a sampled
+        `full_check_rate` share of texts. Filter types that got no check
+        at all are listed under "unchecked_filters".
         """
         results = {
             "is_filtered": False,
             "filtered_content": text,
             "flags": [],
-            "risk_assessment": {}
+            "risk_assessment": {},
+            "unchecked_filters": []
         }
-        
+
+        matches = self.content_scanner.scan(text)
+        redactions = []
         for filter_type in self.ethics_checks.content_filters:
+            type_matches = [m for m in matches if m.filter_type == filter_type]
+            confirmed = [m for m in type_matches if m.confirmed]
+            suspicious = [m for m in type_matches if not m.confirmed]
+            flagged = bool(confirmed)
+            if suspicious:
+                # Only the suspicious windows are escalated to the expensive check
+                for start, end, window_matches in self.content_scanner.windows(text, suspicious):
+                    if self._check_content(text[start:end], filter_type):
+                        confirmed.extend(window_matches)
+                        flagged = True
+            elif not type_matches:
+                if random.random() < self.full_check_rate:
+                    flagged = self._check_content(text, filter_type)
+                else:
+                    results["unchecked_filters"].append(filter_type)
+            if not flagged:
+                continue
+
             risk_level = self.ethics_checks.risk_levels.get(filter_type, ContentRiskLevel.LOW)
-            if self._check_content(text, filter_type):
-                results["is_filtered"] = True
-                results["flags"].append({
-                    "type": filter_type,
-                    "risk_level": risk_level.value
-                })
-                results["filtered_content"] = self._apply_filter(text, filter_type)
-                results["risk_assessment"][filter_type] = risk_level.value
-        
+            results["is_filtered"] = True
+            results["flags"].append({
+                "type": filter_type,
+                "risk_level": risk_level.value
+            })
+            results["risk_assessment"][filter_type] = risk_level.value
+            redactions.extend(confirmed)
+
+        if redactions:
+            results["filtered_content"] = self._apply_filter(text, redactions)
+
         self._log_content_filtering(results)
         return results
 
+    @staticmethod
+    def _load_lexicons() -> Dict[str, List[str]]:
+        """
+        Load content filter lexicons, overridden by CONTENT_LEXICON_PATH if set.
+        """
+        lexicons = {k: list(v) for k, v in DEFAULT_LEXICONS.items()}
+        path = os.getenv("CONTENT_LEXICON_PATH")
+        if path:
+            with open(path) as f:
+                lexicons.update(json.load(f))
+        return lexicons
+
     def _detect_bias_using_llm(self, text: str, category: BiasCategory) -> float:
         """
         Use LLM to detect bias in text for a specific category.
@@ -138,60 +321,43 @@ class AIEthicsGovernance:
         # This is a placeholder for actual implementation
         return False
 
-    def _apply_filter(self, text: str, filter_type: str) -> str:
+    def _apply_filter(self, text: str, matches: List[ContentMatch]) -> str:
         """
-        Apply appropriate filtering based on content type and risk level.
+        Redact all confirmed spans in a single pass over the text.
         """
-        # Implementation of content filtering logic
-        return text
+        pieces = []
+        position = 0
+        for match in sorted(matches, key=lambda m: (m.start, -m.end)):
+            if match.end <= position:
+                continue
+            start = max(match.start, position)
+            pieces.append(text[position:start])
+            pieces.append(f"[REDACTED:{match.label.upper()}]")
+            position = match.end
+        pieces.append(text[position:])
+        return "".join(pieces)
 
     def _log_bias_check(self, results: Dict[str, Any]):
         """
-        Log bias check results to CloudWatch.
+        Record bias check results for the buffered CloudWatch emitter.
         """
-        try:
-            self.cloudwatch.put_metric_data(
-                Namespace='Custom/DocuVector',
-                MetricData=[
-                    {
-                        'MetricName': 'BiasDetection',
-                        'Value': 1 if results['has_bias'] else 0,
-                        'Unit': 'Count',
-                        'Dimensions': [
-                            {
-                                'Name': 'Category',
-                                'Value': str(len(results['categories']))
-                            }
-                        ]
-                    }
-                ]
-            )
-        except ClientError as e:
-            self.logger.error(f"Failed to log bias check: {e}")
+        self.metrics.put(
+            'BiasDetection',
+            1 if results['has_bias'] else 0,
+            'Count',
+            {'Category': str(len(results['categories']))}
+        )
 
     def _log_content_filtering(self, results: Dict[str, Any]):
         """
-        Log content filtering results to CloudWatch.
+        Record content filtering results for the buffered CloudWatch emitter.
         """
-        try:
-            self.cloudwatch.put_metric_data(
-                Namespace='Custom/DocuVector',
-                MetricData=[
-                    {
-                        'MetricName': 'ContentFiltering',
-                        'Value': 1 if results['is_filtered'] else 0,
-                        'Unit': 'Count',
-                        'Dimensions': [
-                            {
-                                'Name': 'RiskLevel',
-                                'Value': str(len(results['risk_assessment']))
-                            }
-                        ]
-                    }
-                ]
-            )
-        except ClientError as e:
-            self.logger.error(f"Failed to log content filtering: {e}")
+        self.metrics.put(
+            'ContentFiltering',
+            1 if results['is_filtered'] else 0,
+            'Count',
+            {'RiskLevel': str(len(results['risk_assessment']))}
+        )
 
     def generate_ethics_report(self) -> Dict[str, Any]:
         """
@@ -1,7 +1,7 @@
 from typing import List, Dict, Any, Optional
 from langchain.agents import Tool, AgentExecutor, LLMSingleActionAgent
 from langchain.chains import SequentialChain, RouterChain
-from langchain.memory import ConversationBufferMemory, ConversationBufferWindowMemory
+from langchain.memory import ConversationBufferMemory
 from langchain.prompts import PromptTemplate
 from langchain.schema import AgentAction, AgentFinish
 from langchain.tools import BaseTool
@@ -9,6 +9,7 @@ from langchain.vectorstores import Pinecone
 import pinecone
 import boto3
 import logging
+from .session_memory import SessionMemoryStore, llm_summarizer
 
 class CustomTool(BaseTool):
     name = "vector_search"
@@ -39,12 +40,14 @@ class DocumentProcessorTool(BaseTool):
             return "Error processing document"
 
 class AdvancedChainManager:
-    def __init__(self, llm, embeddings):
+    def __init__(self, llm, embeddings,
+                 memory_store: Optional[SessionMemoryStore] = None,
+                 summarize_history: bool = False):
         self.llm = llm
         self.embeddings = embeddings
-        self.memory = ConversationBufferWindowMemory(
-            k=5,
-            return_messages=True
+        self.memory_store = memory_store or SessionMemoryStore(
+            window=5,
+            summarizer=llm_summarizer(llm) if summarize_history else None
         )
         
     def create_sequential_chain(self):
@@ -83,8 +86,8 @@ class AdvancedChainManager:
             default_chain=self.create_default_chain()
         )
         
-    def create_agent(self):
-        """Create a custom agent with tools"""
+    def create_agent(self, session_id: str):
+        """Create a custom agent with tools and the session's memory"""
         tools = [
             CustomTool(embeddings=self.embeddings),
             DocumentProcessorTool()
@@ -99,7 +102,7 @@ class AdvancedChainManager:
         return AgentExecutor.from_agent_and_tools(
             agent=agent,
             tools=tools,
-            memory=self.memory,
+            memory=self.memory_store.memory(session_id),
             verbose=True
         )
         
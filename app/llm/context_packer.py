@@ -0,0 +1,200 @@
+from typing import Dict, List, Any, Optional, Tuple
+from dataclasses import dataclass
+import re
+import logging
+import tiktoken
+
+@dataclass
+class PackedContext:
+    text: str
+    chunks: List[Dict[str, Any]]
+    token_budget: int
+    tokens_used: int
+    tokens_before: int
+    tokens_saved: int
+    merged: int = 0
+    duplicates_dropped: int = 0
+    over_budget_dropped: int = 0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "context": self.text,
+            "chunks": self.chunks,
+            "token_budget": self.token_budget,
+            "tokens_used": self.tokens_used,
+            "tokens_before": self.tokens_before,
+            "tokens_saved": self.tokens_saved,
+            "merged": self.merged,
+            "duplicates_dropped": self.duplicates_dropped,
+            "over_budget_dropped": self.over_budget_dropped
+        }
+
+class ContextPacker:
+    """Pack retrieved chunks into an LLM prompt under a token budget.
+
+    Adjacent chunks from the same document page are stitched back together
+    on their splitter overlap, near-duplicates are dropped, and the rest is
+    packed greedily by relevance.
+    """
+
+    def __init__(self, model_name: str = "gpt-3.5-turbo",
+                 token_budget: int = 3000,
+                 max_overlap: int = 200,
+                 min_overlap: int = 20,
+                 dedup_threshold: float = 0.9,
+                 shingle_size: int = 5,
+                 separator: str = "\n\n"):
+        self.logger = logging.getLogger(__name__)
+        self.model_name = model_name
+        self.token_budget = token_budget
+        self.max_overlap = max_overlap
+        self.min_overlap = min_overlap
+        self.dedup_threshold = dedup_threshold
+        self.shingle_size = shingle_size
+        self.separator = separator
+        try:
+            self.encoding = tiktoken.encoding_for_model(model_name)
+        except KeyError:
+            self.encoding = tiktoken.get_encoding("cl100k_base")
+
+    def count_tokens(self, text: str) -> int:
+        """Count tokens exactly as the target model tokenizes them"""
+        return len(self.encoding.encode(text, disallowed_special=()))
+
+    def pack(self, results: List[Dict[str, Any]],
+             token_budget: Optional[int] = None) -> PackedContext:
+        """Merge, deduplicate and pack search results into a single context"""
+        budget = self.token_budget if token_budget is None else token_budget
+        tokens_before = self.count_tokens(
+            self.separator.join(r["text"] for r in results)
+        ) if results else 0
+
+        ranked = self._rank(results)
+        merged = self._merge_adjacent(ranked)
+        unique = self._drop_near_duplicates(merged)
+
+        selected, over_budget = self._greedy_pack(unique, budget)
+        text = self.separator.join(c["text"] for c in selected)
+        tokens_used = self.count_tokens(text) if selected else 0
+
+        packed = PackedContext(
+            text=text,
+            chunks=selected,
+            token_budget=budget,
+            tokens_used=tokens_used,
+            tokens_before=tokens_before,
+            tokens_saved=max(tokens_before - tokens_used, 0),
+            merged=len(ranked) - len(merged),
+            duplicates_dropped=len(merged) - len(unique),
+            over_budget_dropped=over_budget
+        )
+        self.logger.info(
+            f"Packed {len(results)} chunks into {tokens_used}/{budget} tokens "
+            f"({packed.tokens_saved} tokens saved)"
+        )
+        return packed
+
+    def _rank(self, results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Attach retrieval rank so equal scores keep the vector store order"""
+        return [{
+            "text": r["text"],
+            "metadata": dict(r.get("metadata") or {}),
+            "score": float(r.get("score") or 0.0),
+            "rank": i
+        } for i, r in enumerate(results)]
+
+    def _merge_adjacent(self, chunks: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Stitch chunks of the same document page that overlap end-to-start"""
+        groups: Dict[Tuple[Any, Any], List[Dict[str, Any]]] = {}
+        for chunk in chunks:
+            key = (chunk["metadata"].get("source"), chunk["metadata"].get("page"))
+            groups.setdefault(key, []).append(chunk)
+
+        merged = []
+        for group in groups.values():
+            pending = list(group)
+            while pending:
+                current = pending.pop(0)
+                extended = True
+                while extended:
+                    extended = False
+                    for i, other in enumerate(pending):
+                        text = self._stitch(current["text"], other["text"])
+                        if text is None:
+                            text = self._stitch(other["text"], current["text"])
+                        if text is not None:
+                            current = {
+                                "text": text,
+                                "metadata": current["metadata"],
+                                "score": max(current["score"], other["score"]),
+                                "rank": min(current["rank"], other["rank"])
+                            }
+                            pending.pop(i)
+                            extended = True
+                            break
+                merged.append(current)
+        return merged
+
+    def _stitch(self, head: str, tail: str) -> Optional[str]:
+        """Join two chunks if the end of head repeats at the start of tail"""
+        if tail in head:
+            return head
+        limit = min(self.max_overlap, len(head), len(tail))
+        for size in range(limit, self.min_overlap - 1, -1):
+            if head.endswith(tail[:size]):
+                return head + tail[size:]
+        return None
+
+    def _shingles(self, text: str) -> set:
+        words = re.findall(r"\w+", text.lower())
+        if len(words) < self.shingle_size:
+            return {" ".join(words)}
+        return {
+            " ".join(words[i:i + self.shingle_size])
+            for i in range(len(words) - self.shingle_size + 1)
+        }
+
+    def _drop_near_duplicates(self, chunks: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Keep the most relevant chunk of every near-duplicate group"""
+        kept: List[Tuple[Dict[str, Any], set]] = []
+        for chunk in sorted(chunks, key=lambda c: (-c["score"], c["rank"])):
+            shingles = self._shingles(chunk["text"])
+            duplicate = False
+            for _, other in kept:
+                union = len(shingles | other)
+                if union and len(shingles & other) / union >= self.dedup_threshold:
+                    duplicate = True
+                    break
+            if not duplicate:
+                kept.append((chunk, shingles))
+        return [chunk for chunk, _ in kept]
+
+    def _greedy_pack(self, chunks: List[Dict[str, Any]],
+                     budget: int) -> Tuple[List[Dict[str, Any]], int]:
+        """Take chunks in relevance order while the joined context fits"""
+        separator_tokens = self.count_tokens(self.separator)
+        selected: List[Dict[str, Any]] = []
+        used = 0
+        dropped = 0
+        for chunk in sorted(chunks, key=lambda c: (-c["score"], c["rank"])):
+            cost = self.count_tokens(chunk["text"])
+            if selected:
+                cost += separator_tokens
+            if used + cost > budget:
+                dropped += 1
+                continue
+            selected.append(chunk)
+            used += cost
+
+        # Token boundaries can shift where chunks are joined, so confirm the
+        # exact count of the final text and trim the least relevant chunks.
+        while selected and self.count_tokens(
+                self.separator.join(c["text"] for c in selected)) > budget:
+            selected.pop()
+            dropped += 1
+
+        return [{
+            "text": c["text"],
+            "metadata": c["metadata"],
+            "score": c["score"]
+        } for c in selected], dropped
@@ -0,0 +1,88 @@
+from typing import Callable, List, Optional
+import hashlib
+import os
+from langchain.schema.embeddings import Embeddings
+from ..core.instrumentation import LLM_CALLS_IN_FLIGHT
+from ..core.micro_batch import MicroBatcher
+from ..core.rate_limit import AdaptiveRateLimiter, Priority, estimate_tokens
+from ..core.single_flight import SingleFlight
+
+def _texts_key(texts: List[str]) -> str:
+    digest = hashlib.sha256()
+    for text in texts:
+        digest.update(text.encode("utf-8", "surrogatepass"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+class CoalescingEmbeddings(Embeddings):
+    """Share one upstream call between identical in-flight embedding requests"""
+
+    def __init__(self, embeddings: Embeddings,
+                 flight: Optional[SingleFlight] = None):
+        self.embeddings = embeddings
+        self.flight = flight or SingleFlight()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.flight.do(
+            ("documents", _texts_key(texts)),
+            lambda: self.embeddings.embed_documents(texts)
+        )
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.flight.do(
+            ("query", _texts_key([text])),
+            lambda: self.embeddings.embed_query(text)
+        )
+
+class BatchingEmbeddings(Embeddings):
+    """Send concurrent query embeddings upstream as one batched request"""
+
+    def __init__(self, embeddings: Embeddings,
+                 max_batch_size: int = 32,
+                 max_wait_ms: float = 5.0):
+        self.embeddings = embeddings
+        self.batcher = MicroBatcher(
+            embeddings.embed_documents,
+            max_batch_size=max_batch_size,
+            max_wait_ms=max_wait_ms,
+            name="query-embedding-batcher"
+        )
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.embeddings.embed_documents(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.batcher.call(text)
+
+class RateLimitedEmbeddings(Embeddings):
+    """Admit embedding calls through a shared provider rate limiter
+
+    Document batches run at the caller's priority; single queries are
+    always interactive.
+    """
+
+    def __init__(self, embeddings: Embeddings, limiter: AdaptiveRateLimiter):
+        self.embeddings = embeddings
+        self.limiter = limiter
+        self.in_flight = LLM_CALLS_IN_FLIGHT.labels(provider=limiter.name, operation="embedding")
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.limiter.call(
+            self.in_flight.track_inprogress()(lambda: self.embeddings.embed_documents(texts)),
+            tokens=estimate_tokens(texts)
+        )
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.limiter.call(
+            self.in_flight.track_inprogress()(lambda: self.embeddings.embed_query(text)),
+            tokens=estimate_tokens([text]),
+            priority=Priority.INTERACTIVE
+        )
+
+def select_embeddings(remote: Callable[[], Embeddings]) -> Embeddings:
+    """Use the local CPU model when EMBEDDING_BACKEND=local, otherwise build the remote provider"""
+    if os.getenv("EMBEDDING_BACKEND", "remote").lower() == "local":
+        # Imported here so remote-only deployments never load torch
+        from .local_embeddings import get_local_embeddings
+        return get_local_embeddings()
+    return remote()
@@ -1,5 +1,4 @@
 from typing import Dict, List, Optional, Any
-import boto3
 import json
 from langchain.llms import Bedrock
 from langchain.prompts import PromptTemplate
@@ -9,32 +8,46 @@ from langchain.vectorstores import Pinecone
 import pinecone
 from datetime import datetime
 import logging
+from .embeddings import CoalescingEmbeddings, RateLimitedEmbeddings, select_embeddings
+from ..core.aws import get_client
+from ..core.instrumentation import LLM_CALLS_IN_FLIGHT
+from ..core.rate_limit import estimate_tokens, get_rate_limiter
+from ..core.single_flight import SingleFlight
 
 class LLMIntegration:
     def __init__(self, model_id: str = "anthropic.claude-v2"):
         self.logger = logging.getLogger(__name__)
-        self.bedrock = boto3.client('bedrock')
+        self.bedrock = get_client('bedrock')
+        # Model calls go through the rate limiter, which retries throttling
+        self.bedrock_runtime = get_client('bedrock-runtime', rate_limited=True)
         self.model_id = model_id
         self.llm = Bedrock(
             model_id=model_id,
-            client=self.bedrock,
+            client=self.bedrock_runtime,
             model_kwargs={"temperature": 0.7}
         )
-        self.embeddings = BedrockEmbeddings(
-            client=self.bedrock,
-            model_id="amazon.titan-embed-text-v1"
-        )
+        self.rate_limiter = get_rate_limiter("bedrock")
+        embeddings = select_embeddings(lambda: RateLimitedEmbeddings(
+            BedrockEmbeddings(
+                client=self.bedrock_runtime,
+                model_id="amazon.titan-embed-text-v1"
+            ),
+            self.rate_limiter
+        ))
+        self.embedding_dimension = getattr(embeddings, "dimension", 1536)
+        self.embeddings = CoalescingEmbeddings(embeddings)
+        self.response_flight = SingleFlight()
         
     def initialize_pinecone(self, api_key: str, environment: str):
         """Initialize Pinecone vector database"""
         pinecone.init(api_key=api_key, environment=environment)
         
-    def create_vector_store(self, index_name: str, dimension: int = 1536):
+    def create_vector_store(self, index_name: str, dimension: Optional[int] = None):
         """Create or connect to a Pinecone index"""
         if index_name not in pinecone.list_indexes():
             pinecone.create_index(
                 name=index_name,
-                dimension=dimension,
+                dimension=dimension or self.embedding_dimension,
                 metric="cosine"
             )
         return Pinecone.from_existing_index(index_name, self.embeddings)
@@ -79,11 +92,28 @@ class LLMIntegration:
     def generate_response(self, chain: LLMChain, inputs: Dict[str, str]):
         """Generate response using the LLM chain"""
         try:
-            response = chain.run(**inputs)
+            # Identical concurrent requests share one upstream completion
+            key = (
+                id(chain.llm),
+                getattr(chain.prompt, "template", None) or id(chain),
+                json.dumps(inputs, sort_keys=True, default=str)
+            )
+            in_flight = LLM_CALLS_IN_FLIGHT.labels(provider="bedrock", operation="completion")
+            response = self.response_flight.do(key, lambda: self.rate_limiter.call(
+                in_flight.track_inprogress()(lambda: chain.run(**inputs)),
+                tokens=estimate_tokens([str(v) for v in inputs.values()])
+            ))
             return response
         except Exception as e:
             self.logger.error(f"Error generating response: {e}")
             raise
+
+    def coalescing_stats(self) -> Dict[str, Dict[str, int]]:
+        """Report how many embedding and completion calls were coalesced"""
+        return {
+            "embeddings": self.embeddings.flight.stats(),
+            "responses": self.response_flight.stats()
+        }
             
     def evaluate_model(self, test_data: List[Dict[str, str]]) -> Dict[str, float]:
         """Evaluate model performance on test data"""
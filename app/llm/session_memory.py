@@ -0,0 +1,317 @@
+from typing import Dict, List, Any, Optional, Callable, Tuple
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+import zlib
+from langchain.chains import LLMChain
+from langchain.memory.prompt import SUMMARY_PROMPT
+from langchain.memory.utils import get_prompt_input_key
+from langchain.schema import AIMessage, BaseMemory, HumanMessage, SystemMessage, get_buffer_string
+
+Turn = Tuple[str, str]
+Summarizer = Callable[[str, List[Turn]], str]
+
+SESSION_LOCK_STRIPES = 256
+
+class MemoryBackend(ABC):
+    """Storage for compressed session payloads"""
+
+    @abstractmethod
+    def get(self, session_id: str) -> Optional[bytes]:
+        pass
+
+    @abstractmethod
+    def set(self, session_id: str, payload: bytes):
+        pass
+
+    @abstractmethod
+    def delete(self, session_id: str):
+        pass
+
+    def evict_idle(self, max_idle_seconds: float) -> int:
+        """Drop sessions not touched within max_idle_seconds"""
+        return 0
+
+class InProcessBackend(MemoryBackend):
+    """LRU-bounded in-process backend for single-worker deployments"""
+
+    def __init__(self, max_sessions: int = 10000):
+        self.max_sessions = max_sessions
+        self._sessions: "OrderedDict[str, Tuple[float, bytes]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, session_id: str) -> Optional[bytes]:
+        with self._lock:
+            entry = self._sessions.get(session_id)
+            if entry is None:
+                return None
+            self._sessions[session_id] = (time.monotonic(), entry[1])
+            self._sessions.move_to_end(session_id)
+            return entry[1]
+
+    def set(self, session_id: str, payload: bytes):
+        with self._lock:
+            self._sessions[session_id] = (time.monotonic(), payload)
+            self._sessions.move_to_end(session_id)
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+
+    def delete(self, session_id: str):
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def evict_idle(self, max_idle_seconds: float) -> int:
+        cutoff = time.monotonic() - max_idle_seconds
+        evicted = 0
+        with self._lock:
+            # Entries are kept in access order, so idle ones sit at the front
+            while self._sessions:
+                session_id, (last_access, _) = next(iter(self._sessions.items()))
+                if last_access >= cutoff:
+                    break
+                del self._sessions[session_id]
+                evicted += 1
+        return evicted
+
+class FileBackend(MemoryBackend):
+    """One file per session on a local or shared volume"""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, session_id: str) -> str:
+        digest = hashlib.sha256(session_id.encode()).hexdigest()
+        return os.path.join(self.directory, f"{digest}.mem")
+
+    def get(self, session_id: str) -> Optional[bytes]:
+        path = self._path(session_id)
+        try:
+            with open(path, "rb") as f:
+                payload = f.read()
+            os.utime(path)
+            return payload
+        except FileNotFoundError:
+            return None
+
+    def set(self, session_id: str, payload: bytes):
+        path = self._path(session_id)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(payload)
+        os.replace(tmp_path, path)
+
+    def delete(self, session_id: str):
+        try:
+            os.remove(self._path(session_id))
+        except FileNotFoundError:
+            pass
+
+    def evict_idle(self, max_idle_seconds: float) -> int:
+        cutoff = time.time() - max_idle_seconds
+        evicted = 0
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                if not entry.name.endswith(".mem"):
+                    continue
+                try:
+                    if entry.stat().st_mtime < cutoff:
+                        os.remove(entry.path)
+                        evicted += 1
+                except FileNotFoundError:
+                    continue
+        return evicted
+
+class RedisBackend(MemoryBackend):
+    """Backend for any client exposing the Redis get/set/delete commands
+
+    Idle eviction is delegated to the key TTL, which is refreshed on every
+    read and write.
+    """
+
+    def __init__(self, client: Any, ttl_seconds: int = 1800,
+                 key_prefix: str = "docuvector:memory:"):
+        self.client = client
+        self.ttl_seconds = ttl_seconds
+        self.key_prefix = key_prefix
+
+    def get(self, session_id: str) -> Optional[bytes]:
+        key = f"{self.key_prefix}{session_id}"
+        payload = self.client.get(key)
+        if payload is not None:
+            self.client.expire(key, self.ttl_seconds)
+        return payload
+
+    def set(self, session_id: str, payload: bytes):
+        self.client.set(f"{self.key_prefix}{session_id}", payload, ex=self.ttl_seconds)
+
+    def delete(self, session_id: str):
+        self.client.delete(f"{self.key_prefix}{session_id}")
+
+class SessionMemoryStore:
+    """Session-keyed conversation memory with bounded size per session
+
+    Each session keeps a rolling summary plus the last `window` turns,
+    stored as zlib-compressed JSON. Turns that fall out of the window are
+    folded into the summary when a summarizer is configured.
+    """
+
+    def __init__(self, backend: Optional[MemoryBackend] = None,
+                 window: int = 5,
+                 max_bytes: int = 16384,
+                 idle_ttl: float = 1800.0,
+                 sweep_interval: float = 60.0,
+                 summarizer: Optional[Summarizer] = None):
+        self.logger = logging.getLogger(__name__)
+        self.backend = backend or InProcessBackend()
+        self.window = window
+        self.max_bytes = max_bytes
+        self.idle_ttl = idle_ttl
+        self.sweep_interval = sweep_interval
+        self.summarizer = summarizer
+        self._last_sweep = time.monotonic()
+        self._sweep_lock = threading.Lock()
+        # Striped per-session locks: bounded memory, and turns of one session never interleave
+        self._session_locks = [threading.Lock() for _ in range(SESSION_LOCK_STRIPES)]
+
+    @staticmethod
+    def _encode(summary: str, turns: List[Turn], version: int = 0) -> bytes:
+        state = {"s": summary, "t": [list(turn) for turn in turns], "v": version}
+        return zlib.compress(json.dumps(state, separators=(",", ":")).encode())
+
+    @staticmethod
+    def _decode(payload: Optional[bytes]) -> Tuple[str, List[Turn], int]:
+        """Return the summary, turns and summary version of a stored session"""
+        if not payload:
+            return "", [], 0
+        state = json.loads(zlib.decompress(payload))
+        return state["s"], [tuple(turn) for turn in state["t"]], state.get("v", 0)
+
+    def load(self, session_id: str) -> Tuple[str, List[Turn]]:
+        """Return the rolling summary and recent turns of a session"""
+        self._maybe_sweep()
+        summary, turns, _ = self._decode(self.backend.get(session_id))
+        return summary, turns
+
+    def _session_lock(self, session_id: str) -> threading.Lock:
+        digest = hashlib.blake2b(session_id.encode(), digest_size=8).digest()
+        return self._session_locks[int.from_bytes(digest, "little") % len(self._session_locks)]
+
+    def append(self, session_id: str, human: str, ai: str):
+        """Record a turn, summarizing or trimming to stay within limits
+
+        The summarizer runs outside the session lock, so a slow summary does
+        not hold up other sessions on the same lock stripe. Turns past the
+        window are kept until their summary is applied, which only happens
+        if no other summary was applied to the session in the meantime.
+        """
+        lock = self._session_lock(session_id)
+        with lock:
+            summary, turns, version = self._decode(self.backend.get(session_id))
+            turns.append((human, ai))
+            overflow = turns[:-self.window] if len(turns) > self.window else []
+            if overflow and self.summarizer is not None:
+                self.backend.set(session_id, self._encode(summary, turns, version))
+            else:
+                self._store(session_id, summary, turns[-self.window:], version)
+        if overflow and self.summarizer is not None:
+            try:
+                new_summary = self.summarizer(summary, overflow)
+            except Exception as e:
+                self.logger.error(f"Error summarizing session memory: {e}")
+                new_summary = None
+            with lock:
+                current_summary, current_turns, current_version = self._decode(self.backend.get(session_id))
+                # Otherwise the session was cleared or another append already folded these turns
+                if current_version == version and current_turns[:len(overflow)] == overflow:
+                    if new_summary is None:
+                        self._store(session_id, current_summary, current_turns[-self.window:], version)
+                    else:
+                        # Turns appended meanwhile stay until the next summary
+                        self._store(session_id, new_summary, current_turns[len(overflow):], version + 1)
+        self._maybe_sweep()
+
+    def _store(self, session_id: str, summary: str, turns: List[Turn], version: int):
+        """Write a session, dropping the oldest turns, then summary text, to fit max_bytes"""
+        payload = self._encode(summary, turns, version)
+        while len(payload) > self.max_bytes and turns:
+            turns = turns[1:]
+            payload = self._encode(summary, turns, version)
+        while len(payload) > self.max_bytes and summary:
+            # Keep the most recent half; a single character goes entirely
+            summary = summary[-(len(summary) // 2):] if len(summary) > 1 else ""
+            payload = self._encode(summary, turns, version)
+
+        self.backend.set(session_id, payload)
+
+    def clear(self, session_id: str):
+        """Forget everything recorded for a session"""
+        with self._session_lock(session_id):
+            self.backend.delete(session_id)
+
+    def memory(self, session_id: str, **kwargs) -> "SessionMemory":
+        """Build a LangChain memory bound to one session"""
+        return SessionMemory(store=self, session_id=session_id, **kwargs)
+
+    def _maybe_sweep(self):
+        now = time.monotonic()
+        if now - self._last_sweep < self.sweep_interval:
+            return
+        if not self._sweep_lock.acquire(blocking=False):
+            return
+        try:
+            self._last_sweep = now
+            evicted = self.backend.evict_idle(self.idle_ttl)
+            if evicted:
+                self.logger.info(f"Evicted {evicted} idle conversation sessions")
+        finally:
+            self._sweep_lock.release()
+
+def llm_summarizer(llm) -> Summarizer:
+    """Summarize overflowing turns with the progressive summary prompt"""
+    chain = LLMChain(llm=llm, prompt=SUMMARY_PROMPT)
+
+    def summarize(summary: str, turns: List[Turn]) -> str:
+        new_lines = "\n".join(
+            f"Human: {human}\nAI: {ai}" for human, ai in turns
+        )
+        return chain.predict(summary=summary, new_lines=new_lines)
+
+    return summarize
+
+class SessionMemory(BaseMemory):
+    """LangChain memory view over a single session of a SessionMemoryStore"""
+
+    store: Any
+    session_id: str
+    memory_key: str = "history"
+    input_key: Optional[str] = None
+    output_key: Optional[str] = None
+    return_messages: bool = True
+
+    @property
+    def memory_variables(self) -> List[str]:
+        return [self.memory_key]
+
+    def load_memory_variables(self, inputs: Dict[str, Any]) -> Dict[str, Any]:
+        summary, turns = self.store.load(self.session_id)
+        messages = [SystemMessage(content=summary)] if summary else []
+        for human, ai in turns:
+            messages.append(HumanMessage(content=human))
+            messages.append(AIMessage(content=ai))
+        if self.return_messages:
+            return {self.memory_key: messages}
+        return {self.memory_key: get_buffer_string(messages)}
+
+    def save_context(self, inputs: Dict[str, Any], outputs: Dict[str, str]):
+        input_key = self.input_key or get_prompt_input_key(inputs, self.memory_variables)
+        output_key = self.output_key or next(iter(outputs))
+        self.store.append(self.session_id, inputs[input_key], outputs[output_key])
+
+    def clear(self):
+        self.store.clear(self.session_id)
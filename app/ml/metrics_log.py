@@ -0,0 +1,232 @@
+from typing import Dict, List, Any, Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+import atexit
+import gzip
+import io
+import json
+import logging
+import math
+import threading
+import uuid
+import weakref
+import pandas as pd
+
+# Logs with a running flush thread, closed once at interpreter exit
+_open_logs: "weakref.WeakSet[MetricsLog]" = weakref.WeakSet()
+
+def _close_open_logs():
+    for log in list(_open_logs):
+        try:
+            log.close()
+        except Exception as e:
+            log.logger.error(f"Error closing metrics log: {e}")
+
+atexit.register(_close_open_logs)
+
+def _flush_periodically(ref: "weakref.ref[MetricsLog]", stop: threading.Event, interval: float):
+    # Holds only a weak reference so an unused log can still be collected
+    while not stop.wait(interval):
+        log = ref()
+        if log is None:
+            return
+        try:
+            log.flush()
+        except Exception as e:
+            log.logger.error(f"Error flushing metrics log: {e}")
+        del log
+
+class MetricsLog:
+    """Append-only, compacted log of model performance metrics on S3
+
+    Records are buffered per model version and written as gzipped JSONL
+    segments named `<min_ts>_<max_ts>_<id>.jsonl.gz`, so readers can pick
+    the segments overlapping a time range from one listing without opening
+    them. `compact` merges a version's segments into a single Parquet file,
+    after which a version's full history is one columnar read. Every record
+    carries a `record_id`; readers drop duplicates, which keeps reads
+    correct while a compaction is replacing its inputs.
+    """
+
+    BOOKKEEPING = ("record_id", "ts", "timestamp")
+
+    def __init__(self, s3_client, bucket: str,
+                 prefix: str = "model_metrics_log",
+                 flush_size: int = 500,
+                 flush_interval: float = 60.0,
+                 max_workers: int = 8):
+        self.logger = logging.getLogger(__name__)
+        self.s3 = s3_client
+        self.bucket = bucket
+        self.prefix = prefix
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self.max_workers = max_workers
+        self._buffers: Dict[Tuple[str, str], List[Dict[str, Any]]] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _version_prefix(self, model_name: str, version: str) -> str:
+        return f"{self.prefix}/{model_name}/{version}/"
+
+    def append(self, model_name: str, version: str, metrics: Dict[str, float]):
+        """Buffer one metrics record; flushed by size, interval or close"""
+        now = datetime.now(timezone.utc)
+        record = {
+            "record_id": uuid.uuid4().hex,
+            "ts": int(now.timestamp() * 1000),
+            "timestamp": now.isoformat(),
+            **metrics
+        }
+        key = (model_name, str(version))
+        with self._lock:
+            buffer = self._buffers.setdefault(key, [])
+            buffer.append(record)
+            full = len(buffer) >= self.flush_size
+        if full:
+            self.flush(key)
+        self._start()
+
+    def flush(self, key: Optional[Tuple[str, str]] = None):
+        """Write buffered records as new segments"""
+        with self._lock:
+            if key is None:
+                pending, self._buffers = self._buffers, {}
+            else:
+                pending = {key: self._buffers.pop(key, [])}
+        error = None
+        for (model_name, version), records in pending.items():
+            if not records:
+                continue
+            body = "\n".join(json.dumps(r, separators=(",", ":")) for r in records)
+            segment = (
+                f"{self._version_prefix(model_name, version)}segments/"
+                f"{records[0]['ts']:013d}_{records[-1]['ts']:013d}_{uuid.uuid4().hex}.jsonl.gz"
+            )
+            try:
+                self.s3.put_object(Bucket=self.bucket, Key=segment, Body=gzip.compress(body.encode()))
+            except Exception as e:
+                self.logger.error(f"Failed to write metrics segment {segment}: {e}")
+                # Put the records back so the next flush retries them
+                with self._lock:
+                    self._buffers.setdefault((model_name, version), [])[:0] = records
+                error = e
+        if error is not None:
+            raise error
+
+    def _list(self, model_name: str, version: str) -> List[Dict[str, Any]]:
+        paginator = self.s3.get_paginator('list_objects_v2')
+        objects = []
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=self._version_prefix(model_name, version)):
+            for obj in page.get('Contents', []):
+                name = obj['Key'].rsplit("/", 1)[-1]
+                try:
+                    min_ts, max_ts, _ = name.split("_", 2)
+                    objects.append({
+                        "Key": obj['Key'],
+                        "Size": obj['Size'],
+                        "min_ts": int(min_ts),
+                        "max_ts": int(max_ts)
+                    })
+                except ValueError:
+                    continue
+        return objects
+
+    def _read_object(self, key: str) -> pd.DataFrame:
+        body = self.s3.get_object(Bucket=self.bucket, Key=key)['Body'].read()
+        if key.endswith(".parquet"):
+            return pd.read_parquet(io.BytesIO(body))
+        lines = gzip.decompress(body).decode().splitlines()
+        return pd.DataFrame.from_records([json.loads(line) for line in lines if line])
+
+    def _read_objects(self, objects: List[Dict[str, Any]]) -> pd.DataFrame:
+        if not objects:
+            return pd.DataFrame(columns=list(self.BOOKKEEPING))
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            frames = list(pool.map(self._read_object, [obj["Key"] for obj in objects]))
+        history = pd.concat(frames, ignore_index=True)
+        return history.drop_duplicates("record_id").sort_values("ts").reset_index(drop=True)
+
+    def read(self, model_name: str, version: str,
+             start: Optional[datetime] = None,
+             end: Optional[datetime] = None) -> pd.DataFrame:
+        """Load a version's history, reading only segments that overlap the range"""
+        start_ts = int(start.timestamp() * 1000) if start else None
+        end_ts = int(end.timestamp() * 1000) if end else None
+        objects = [
+            obj for obj in self._list(model_name, version)
+            if (start_ts is None or obj["max_ts"] >= start_ts)
+            and (end_ts is None or obj["min_ts"] <= end_ts)
+        ]
+        history = self._read_objects(objects)
+        if start_ts is not None:
+            history = history[history["ts"] >= start_ts]
+        if end_ts is not None:
+            history = history[history["ts"] <= end_ts]
+        return history.reset_index(drop=True)
+
+    def records(self, model_name: str, version: str,
+                start: Optional[datetime] = None,
+                end: Optional[datetime] = None) -> List[Dict[str, Any]]:
+        """Like `read`, as one dict per record holding only the metrics it was written with
+
+        Segments with different metric sets are aligned into one frame, so
+        `read` fills the gaps with NaN; those cells are dropped here.
+        """
+        history = self.read(model_name, version, start, end)
+        return [
+            {
+                name: value for name, value in row.items()
+                if name not in ("record_id", "ts") and not (isinstance(value, float) and math.isnan(value))
+            }
+            for row in history.to_dict("records")
+        ]
+
+    def compact(self, model_name: str, version: str,
+                min_segments: int = 8,
+                target_size: int = 64 * 1024 * 1024) -> Dict[str, Any]:
+        """Merge small segments of a version into one Parquet file"""
+        objects = self._list(model_name, version)
+        small = [obj for obj in objects if obj["Size"] < target_size]
+        if len(small) < min_segments:
+            return {"compacted": 0, "segments": len(objects)}
+
+        history = self._read_objects(small)
+        buffer = io.BytesIO()
+        history.to_parquet(buffer, index=False, compression="zstd")
+        merged_key = (
+            f"{self._version_prefix(model_name, version)}compacted/"
+            f"{int(history['ts'].min()):013d}_{int(history['ts'].max()):013d}_{uuid.uuid4().hex}.parquet"
+        )
+        self.s3.put_object(Bucket=self.bucket, Key=merged_key, Body=buffer.getvalue())
+
+        # Inputs are removed only after the merged file is visible
+        keys = [obj["Key"] for obj in small]
+        for i in range(0, len(keys), 1000):
+            self.s3.delete_objects(
+                Bucket=self.bucket,
+                Delete={"Objects": [{"Key": key} for key in keys[i:i + 1000]], "Quiet": True}
+            )
+        return {"compacted": len(small), "records": len(history), "key": merged_key}
+
+    def _start(self):
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(
+                target=_flush_periodically,
+                args=(weakref.ref(self), self._stop, self.flush_interval),
+                name="metrics-log",
+                daemon=True
+            )
+            self._thread.start()
+            _open_logs.add(self)
+
+    def close(self):
+        """Stop background flushing and write any buffered records"""
+        self._stop.set()
+        _open_logs.discard(self)
+        self.flush()
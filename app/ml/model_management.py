@@ -2,19 +2,31 @@ from typing import Dict, List, Any, Optional
 import mlflow
 import dvc.api
 from mlflow.tracking import MlflowClient
-import boto3
 import logging
 from datetime import datetime
 import os
 import json
+from concurrent.futures import ThreadPoolExecutor
+from ..core.aws import get_client
+from ..core.cloudwatch_metrics import MetricsEmitter, get_metrics_emitter
+from .metrics_log import MetricsLog
+from .s3_cache import S3ObjectCache
 
 class ModelManager:
-    def __init__(self, tracking_uri: str, s3_bucket: str):
+    def __init__(self, tracking_uri: str, s3_bucket: str,
+                 metrics: Optional[MetricsEmitter] = None,
+                 s3_client=None,
+                 metrics_cache_dir: Optional[str] = None,
+                 max_fetch_workers: int = 10):
         self.logger = logging.getLogger(__name__)
+        self.metrics = metrics or get_metrics_emitter()
         mlflow.set_tracking_uri(tracking_uri)
         self.client = MlflowClient()
-        self.s3 = boto3.client('s3')
+        self.s3 = s3_client or get_client('s3')
         self.s3_bucket = s3_bucket
+        self.metrics_cache = S3ObjectCache(metrics_cache_dir)
+        self.max_fetch_workers = max_fetch_workers
+        self.metrics_log = MetricsLog(self.s3, s3_bucket)
         
     def log_experiment(self, experiment_name: str, 
                       params: Dict[str, Any],
@@ -129,18 +141,46 @@ class ModelManager:
             with mlflow.start_run(nested=True):
                 mlflow.log_metrics(metrics)
                 
-            # Store metrics in S3 for long-term tracking
-            self.s3.put_object(
-                Bucket=self.s3_bucket,
-                Key=f"model_metrics/{model_name}/{version}/{datetime.now().isoformat()}.json",
-                Body=json.dumps(metrics)
-            )
+            # Buffer metrics into the append-only S3 log for long-term tracking
+            self.metrics_log.append(model_name, version, metrics)
+
+            # Publish to CloudWatch through the buffered emitter
+            for name, value in metrics.items():
+                self.metrics.put(
+                    name,
+                    value,
+                    'None',
+                    {'Model': model_name, 'Version': str(version)}
+                )
             
             return metrics
         except Exception as e:
             self.logger.error(f"Error tracking model performance: {e}")
             raise
             
+    def get_performance_history(self, model_name: str, version: str,
+                                start: Optional[datetime] = None,
+                                end: Optional[datetime] = None):
+        """Load a version's logged metrics as a DataFrame, optionally by time range"""
+        try:
+            return self.metrics_log.read(model_name, version, start=start, end=end)
+        except Exception as e:
+            self.logger.error(f"Error reading performance history: {e}")
+            raise
+
+    def compact_performance_history(self, model_name: str,
+                                    versions: List[str]) -> Dict[str, Any]:
+        """Merge small metrics log segments; run periodically as a batch job"""
+        try:
+            self.metrics_log.flush()
+            return {
+                version: self.metrics_log.compact(model_name, version)
+                for version in versions
+            }
+        except Exception as e:
+            self.logger.error(f"Error compacting performance history: {e}")
+            raise
+            
     def _create_pyfunc_model(self):
         """Create a PyFunc model for MLflow"""
         class ModelWrapper(mlflow.pyfunc.PythonModel):
@@ -157,37 +197,57 @@ class ModelManager:
                 
         return ModelWrapper()
         
+    def _list_metric_objects(self, prefix: str) -> List[Dict[str, str]]:
+        """List every object under a prefix, following pagination"""
+        paginator = self.s3.get_paginator('list_objects_v2')
+        objects = []
+        for page in paginator.paginate(Bucket=self.s3_bucket, Prefix=prefix):
+            for obj in page.get('Contents', []):
+                objects.append({"Key": obj['Key'], "ETag": obj['ETag']})
+        return sorted(objects, key=lambda obj: obj["Key"])
+
+    def _fetch_metrics_object(self, obj: Dict[str, str]) -> Any:
+        """Load a metrics object, downloading it only if its ETag changed"""
+        cached = self.metrics_cache.get(self.s3_bucket, obj["Key"], obj["ETag"])
+        if cached is not None:
+            return cached
+        data = self.s3.get_object(Bucket=self.s3_bucket, Key=obj["Key"])
+        payload = json.loads(data['Body'].read())
+        self.metrics_cache.set(self.s3_bucket, obj["Key"], data.get('ETag', obj["ETag"]), payload)
+        return payload
+
     def compare_models(self, model_name: str,
                       versions: List[str]) -> Dict[str, Any]:
         """Compare performance of different model versions"""
         try:
-            comparison = {}
-            
-            for version in versions:
-                # Get metrics from MLflow
-                run = self.client.get_run(version)
-                metrics = run.data.metrics
-                
-                # Get metrics from S3
-                response = self.s3.list_objects_v2(
-                    Bucket=self.s3_bucket,
-                    Prefix=f"model_metrics/{model_name}/{version}/"
+            with ThreadPoolExecutor(max_workers=self.max_fetch_workers) as pool:
+                # Get metrics from MLflow and list S3 history for all versions at once
+                runs = [pool.submit(self.client.get_run, version) for version in versions]
+                listings = list(pool.map(
+                    self._list_metric_objects,
+                    [f"model_metrics/{model_name}/{version}/" for version in versions]
+                ))
+
+                # Fetch every uncached object across all versions concurrently
+                payloads = iter(pool.map(
+                    self._fetch_metrics_object,
+                    [obj for objects in listings for obj in objects]
+                ))
+
+                # Records written through the metrics log, one read per version
+                logged = pool.map(
+                    lambda version: self.metrics_log.records(model_name, version),
+                    versions
                 )
-                
-                s3_metrics = []
-                for obj in response.get('Contents', []):
-                    data = self.s3.get_object(
-                        Bucket=self.s3_bucket,
-                        Key=obj['Key']
-                    )
-                    s3_metrics.append(json.loads(data['Body'].read()))
-                    
-                comparison[version] = {
-                    "mlflow_metrics": metrics,
-                    "historical_metrics": s3_metrics
-                }
-                
+
+                comparison = {}
+                for version, run, objects, records in zip(versions, runs, listings, logged):
+                    comparison[version] = {
+                        "mlflow_metrics": run.result().data.metrics,
+                        "historical_metrics": [next(payloads) for _ in objects] + records
+                    }
+
             return comparison
         except Exception as e:
             self.logger.error(f"Error comparing models: {e}")
-            raise 
\ No newline at end of file
+            raise
\ No newline at end of file
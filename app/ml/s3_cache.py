@@ -0,0 +1,64 @@
+from typing import Any, Dict, Optional
+import copy
+import hashlib
+import json
+import logging
+import os
+import threading
+from ..core.cache import LRUCache
+
+class S3ObjectCache:
+    """Local cache of decoded S3 objects, validated by ETag
+
+    Entries live in a bounded in-memory LRU and, when `cache_dir` is set,
+    on disk so that restarts do not re-download unchanged objects. Callers
+    get copies, so mutating a returned payload does not alter the cache.
+    """
+
+    def __init__(self, cache_dir: Optional[str] = None, max_entries: int = 1024):
+        self.logger = logging.getLogger(__name__)
+        self.cache_dir = cache_dir
+        self._entries = LRUCache(max_entries=max_entries)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    def _path(self, bucket: str, key: str) -> str:
+        digest = hashlib.sha256(f"{bucket}/{key}".encode()).hexdigest()
+        return os.path.join(self.cache_dir, f"{digest}.json")
+
+    def get(self, bucket: str, key: str, etag: str) -> Optional[Any]:
+        """Return the cached payload if it was stored for this ETag"""
+        entry = self._entries.get((bucket, key))
+        if entry is None and self.cache_dir:
+            try:
+                with open(self._path(bucket, key)) as f:
+                    stored = json.load(f)
+                entry = (stored["etag"], stored["data"])
+                self._entries.set((bucket, key), entry)
+            except (FileNotFoundError, ValueError, KeyError):
+                entry = None
+        with self._lock:
+            if entry is not None and entry[0] == etag:
+                self.hits += 1
+                return copy.deepcopy(entry[1])
+            self.misses += 1
+        return None
+
+    def set(self, bucket: str, key: str, etag: str, data: Any):
+        self._entries.set((bucket, key), (etag, copy.deepcopy(data)))
+        if self.cache_dir:
+            path = self._path(bucket, key)
+            tmp_path = f"{path}.{threading.get_ident()}.tmp"
+            try:
+                with open(tmp_path, "w") as f:
+                    json.dump({"etag": etag, "data": data}, f)
+                os.replace(tmp_path, path)
+            except (OSError, TypeError) as e:
+                self.logger.error(f"Failed to persist cache entry for {key}: {e}")
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
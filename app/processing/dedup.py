@@ -0,0 +1,215 @@
+from typing import Dict, List, Any, Optional, Set, Tuple
+from collections import OrderedDict
+from dataclasses import dataclass
+import logging
+import re
+import threading
+import zlib
+import numpy as np
+
+MERSENNE_PRIME = (1 << 61) - 1
+MAX_HASH = (1 << 32) - 1
+TOKEN_PATTERN = re.compile(r"\w+")
+
+def lsh_params(num_perm: int, threshold: float) -> Tuple[int, int]:
+    """Pick (bands, rows) with bands * rows == num_perm whose S-curve midpoint is closest to `threshold`
+
+    Two chunks with Jaccard similarity s share at least one band with
+    probability 1 - (1 - s^rows)^bands, which rises steepest around
+    (1 / bands)^(1 / rows).
+    """
+    options = [(num_perm // rows, rows) for rows in range(1, num_perm + 1) if num_perm % rows == 0]
+    return min(options, key=lambda option: abs((1 / option[0]) ** (1 / option[1]) - threshold))
+
+class MinHasher:
+    """MinHash signatures over word shingles
+
+    Each of `num_perm` hash functions is a random affine map modulo a
+    Mersenne prime applied to the CRC32 of every shingle; the signature
+    keeps the minimum per function. The fraction of equal positions in two
+    signatures estimates the Jaccard similarity of their shingle sets.
+    """
+
+    def __init__(self, num_perm: int = 128, shingle_size: int = 5, seed: int = 1):
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        rng = np.random.RandomState(seed)
+        # Below 2**32 so a * hash + b fits in uint64 without overflow
+        self.a = rng.randint(1, MAX_HASH, size=num_perm, dtype=np.uint64)
+        self.b = rng.randint(0, MAX_HASH, size=num_perm, dtype=np.uint64)
+
+    def shingles(self, text: str) -> Set[bytes]:
+        tokens = TOKEN_PATTERN.findall(text.lower())
+        if len(tokens) <= self.shingle_size:
+            return {" ".join(tokens).encode()}
+        return {
+            " ".join(tokens[i:i + self.shingle_size]).encode()
+            for i in range(len(tokens) - self.shingle_size + 1)
+        }
+
+    def signature(self, text: str) -> np.ndarray:
+        hashes = np.fromiter((zlib.crc32(shingle) for shingle in self.shingles(text)), dtype=np.uint64)
+        permuted = (hashes[:, None] * self.a + self.b) % MERSENNE_PRIME & MAX_HASH
+        return permuted.min(axis=0).astype(np.uint32)
+
+@dataclass
+class DuplicateMatch:
+    vector_id: str
+    document_id: str
+    similarity: float
+
+@dataclass
+class _Entry:
+    """Signature of a chunk that holds its own vector"""
+    vector_id: str
+    document_id: str
+    signature: np.ndarray
+    # Not yet stored; only chunks of the same document may match it
+    pending: bool = True
+
+class NearDuplicateIndex:
+    """LSH index of MinHash signatures of the chunks stored in each namespace
+
+    `find_or_add` either returns the chunk a new chunk nearly duplicates or
+    registers the new chunk as the holder of its own vector. Candidates
+    from the LSH bands are confirmed against the full signatures, so only
+    chunks whose estimated Jaccard similarity reaches `threshold` match.
+    New entries stay pending until `confirm` is called once their vectors
+    are stored, and until then only match chunks of the same document.
+
+    Dedup is best-effort and per process: the index is not persisted and
+    only learns from the documents this process ingests, so with several
+    workers a duplicate is only caught when the worker that stored the
+    original handles it too. A missed duplicate just costs an embedding
+    and a vector. Which documents reference a vector is kept in the
+    vector index itself, so deletes stay correct across workers; `forget`
+    applies their outcome here. At most `max_entries` signatures (about
+    1 KB each) are kept, evicting the least recently stored or matched.
+    """
+
+    def __init__(self, threshold: float = 0.9,
+                 num_perm: int = 128,
+                 shingle_size: int = 5,
+                 max_entries: int = 200_000):
+        self.logger = logging.getLogger(__name__)
+        self.threshold = threshold
+        self.hasher = MinHasher(num_perm=num_perm, shingle_size=shingle_size)
+        self.bands, self.rows = lsh_params(num_perm, threshold)
+        self._buckets: Dict[str, List[Dict[bytes, Set[str]]]] = {}
+        self._entries: Dict[str, Dict[str, _Entry]] = {}
+        self._documents: Dict[Tuple[str, str], Set[str]] = {}
+        # (namespace, vector_id), least recently stored or matched first
+        self._recent: "OrderedDict[Tuple[str, str], None]" = OrderedDict()
+        self.max_entries = max_entries
+        self.evictions = 0
+        self.chunks_checked = 0
+        self.duplicates = 0
+        self.bytes_saved = 0
+        self._lock = threading.Lock()
+
+    def _band_keys(self, signature: np.ndarray) -> List[bytes]:
+        return [signature[i * self.rows:(i + 1) * self.rows].tobytes() for i in range(self.bands)]
+
+    def find_or_add(self, namespace: str, document_id: str, vector_id: str,
+                    text: str) -> Optional[DuplicateMatch]:
+        """Return the stored near-duplicate of a chunk, or register the chunk as pending `vector_id`"""
+        signature = self.hasher.signature(text)
+        keys = self._band_keys(signature)
+        with self._lock:
+            self.chunks_checked += 1
+            buckets = self._buckets.setdefault(namespace, [{} for _ in range(self.bands)])
+            entries = self._entries.setdefault(namespace, {})
+
+            candidates: Set[str] = set()
+            for band, key in zip(buckets, keys):
+                candidates.update(band.get(key, ()))
+            best, best_similarity = None, 0.0
+            for candidate in candidates:
+                entry = entries[candidate]
+                if entry.pending and entry.document_id != document_id:
+                    continue
+                similarity = float(np.mean(entry.signature == signature))
+                if similarity > best_similarity:
+                    best, best_similarity = entry, similarity
+
+            if best is not None and best_similarity >= self.threshold:
+                self._recent.move_to_end((namespace, best.vector_id))
+                self.duplicates += 1
+                self.bytes_saved += len(text.encode())
+                return DuplicateMatch(best.vector_id, best.document_id, best_similarity)
+
+            entries[vector_id] = _Entry(vector_id, document_id, signature)
+            for band, key in zip(buckets, keys):
+                band.setdefault(key, set()).add(vector_id)
+            self._documents.setdefault((namespace, document_id), set()).add(vector_id)
+            self._recent[(namespace, vector_id)] = None
+            while len(self._recent) > self.max_entries:
+                self._remove(*next(iter(self._recent)))
+                self.evictions += 1
+            return None
+
+    def confirm(self, namespace: str, vector_ids: List[str]):
+        """Make entries whose vectors are now stored matchable by every document"""
+        with self._lock:
+            entries = self._entries.get(namespace, {})
+            for vector_id in vector_ids:
+                entry = entries.get(vector_id)
+                if entry is not None:
+                    entry.pending = False
+
+    def _remove(self, namespace: str, vector_id: str):
+        self._recent.pop((namespace, vector_id), None)
+        entry = self._entries.get(namespace, {}).pop(vector_id, None)
+        if entry is None:
+            return
+        document = self._documents.get((namespace, entry.document_id))
+        if document is not None:
+            document.discard(vector_id)
+            if not document:
+                del self._documents[(namespace, entry.document_id)]
+        for band, key in zip(self._buckets[namespace], self._band_keys(entry.signature)):
+            members = band.get(key)
+            if members is not None:
+                members.discard(vector_id)
+                if not members:
+                    del band[key]
+
+    def forget(self, namespace: str, document_id: str,
+               handed_over: Optional[Dict[str, str]] = None):
+        """Drop a deleted document's entries, except vectors handed over to {vector_id: new owner}"""
+        handed_over = handed_over or {}
+        with self._lock:
+            entries = self._entries.get(namespace, {})
+            for vector_id in self._documents.pop((namespace, document_id), set()):
+                owner = handed_over.get(vector_id)
+                if owner is None:
+                    self._remove(namespace, vector_id)
+                else:
+                    entries[vector_id].document_id = owner
+                    self._documents.setdefault((namespace, owner), set()).add(vector_id)
+
+    def forget_vectors(self, namespace: str, vector_ids: List[str]):
+        """Drop entries whose vectors turned out to be gone, e.g. deleted by another worker"""
+        with self._lock:
+            for vector_id in vector_ids:
+                self._remove(namespace, vector_id)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "threshold": self.threshold,
+                "bands": self.bands,
+                "rows": self.rows,
+                "chunks_checked": self.chunks_checked,
+                "duplicates": self.duplicates,
+                "duplicate_ratio": self.duplicates / self.chunks_checked if self.chunks_checked else 0.0,
+                "text_bytes_saved": self.bytes_saved,
+                "max_entries": self.max_entries,
+                "evictions": self.evictions,
+                "stored_chunks": sum(
+                    not entry.pending for entries in self._entries.values() for entry in entries.values()
+                ),
+                "pending_chunks": sum(
+                    entry.pending for entries in self._entries.values() for entry in entries.values()
+                )
+            }
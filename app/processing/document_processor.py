@@ -1,22 +1,120 @@
-from typing import List, Dict, Any
+from typing import List, Dict, Any, BinaryIO, Callable, Iterable, Iterator, Optional, Set
+import itertools
+import logging
 import os
+import threading
 from langchain.document_loaders import PyPDFLoader, Docx2txtLoader
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain.embeddings import OpenAIEmbeddings
-from langchain.vectorstores import Pinecone
+from langchain.schema.embeddings import Embeddings
 import pinecone
 from dotenv import load_dotenv
+from ..core.cache import LRUCache
+from ..core.instrumentation import BYTES_PROCESSED, CHUNKS_PROCESSED, INGESTIONS_IN_FLIGHT, busy_timer, stage_timer
+from ..core.rate_limit import Priority, get_rate_limiter, priority_scope
+from ..core.tenancy import TenantQuotas, namespace_for
+from ..core.tracing import get_tracer
+from ..llm.context_packer import ContextPacker
+from ..llm.embeddings import BatchingEmbeddings, CoalescingEmbeddings, RateLimitedEmbeddings, select_embeddings
+from .dedup import NearDuplicateIndex
+from .ocr import OCRProcessor
+from .pipeline import run_pipeline
+from .sharded_index import ShardedVectorIndex
+from .snapshot import export_snapshot, import_snapshot, load_snapshot
+from .vector_index import InMemoryVectorIndex
 
 load_dotenv()
 
+def _lazy_pages(loader) -> Iterator[Any]:
+    """Yield pages one at a time, falling back to load() for loaders without lazy_load"""
+    try:
+        pages = iter(loader.lazy_load())
+        first = next(pages)
+    except NotImplementedError:
+        yield from loader.load()
+        return
+    except StopIteration:
+        return
+    yield first
+    yield from pages
+
+def _batched(items: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    iterator = iter(items)
+    while True:
+        batch = list(itertools.islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
 class DocumentProcessor:
-    def __init__(self):
-        self.embeddings = OpenAIEmbeddings()
+    def __init__(self, embeddings: Optional[Embeddings] = None, index: Optional[Any] = None):
+        """Use EMBEDDING_BACKEND (OpenAI by default) and VECTOR_INDEX unless an embeddings provider or index is injected."""
+        self.logger = logging.getLogger(__name__)
+        if embeddings is None:
+            embeddings = select_embeddings(
+                # The limiter owns retries; client-side retries would hide 429s from it
+                lambda: RateLimitedEmbeddings(OpenAIEmbeddings(max_retries=0), get_rate_limiter("openai"))
+            )
+        self.base_embeddings = embeddings
+        self.dimension = getattr(embeddings, "dimension", 1536)
+        self.query_batcher = BatchingEmbeddings(
+            embeddings,
+            max_batch_size=int(os.getenv("QUERY_BATCH_MAX_SIZE", "32")),
+            max_wait_ms=float(os.getenv("QUERY_BATCH_MAX_WAIT_MS", "5"))
+        )
+        self.embeddings = CoalescingEmbeddings(self.query_batcher)
         self.text_splitter = RecursiveCharacterTextSplitter(
             chunk_size=1000,
             chunk_overlap=200
         )
         
+        # Indexes of other dimensions get their own name, e.g. for the local model
+        self.index_name = "document-embeddings" if self.dimension == 1536 else f"document-embeddings-{self.dimension}"
+        self.index = index if index is not None else self._default_index()
+        self.quotas = TenantQuotas.from_env(self.index)
+        self.upsert_batch_size = 100
+        self.embed_batch_size = int(os.getenv("INGEST_EMBED_BATCH_SIZE", "100"))
+        self.ingest_queue_size = int(os.getenv("INGEST_QUEUE_SIZE", "4"))
+        self.ocr = OCRProcessor(
+            dpi=int(os.getenv("OCR_DPI", "200")),
+            page_timeout=float(os.getenv("OCR_PAGE_TIMEOUT", "60")),
+            cache_dir=os.getenv("OCR_CACHE_DIR"),
+            max_cache_bytes=int(os.getenv("OCR_CACHE_MAX_BYTES", str(512 * 1024 * 1024)))
+        ) if os.getenv("OCR_ENABLED", "true").lower() == "true" else None
+        self.deduplicator = NearDuplicateIndex(
+            threshold=float(os.getenv("DEDUP_THRESHOLD", "0.9")),
+            max_entries=int(os.getenv("DEDUP_MAX_CHUNKS", "200000"))
+        ) if os.getenv("DEDUP_ENABLED", "true").lower() == "true" else None
+        # Serializes read-modify-write of referenced_by metadata in this process
+        self._references_lock = threading.Lock()
+        # Keyed by the caller's model name, so bounded
+        self.context_packers = LRUCache(max_entries=int(os.getenv("CONTEXT_PACKER_CACHE_SIZE", "16")))
+
+    def _default_index(self):
+        """Pick the index from VECTOR_INDEX: pinecone (default), memory or sharded.
+
+        A memory index starts from the snapshot at INDEX_SNAPSHOT, if set.
+        """
+        backend = os.getenv("VECTOR_INDEX", "pinecone").lower()
+        if backend == "memory":
+            snapshot_path = os.getenv("INDEX_SNAPSHOT")
+            if snapshot_path and os.path.exists(snapshot_path):
+                index = load_snapshot(snapshot_path)
+                if index.dimension != self.dimension:
+                    raise ValueError(
+                        f"Snapshot dimension {index.dimension} does not match embedding dimension {self.dimension}"
+                    )
+                return index
+            return InMemoryVectorIndex(dimension=self.dimension)
+        if backend == "sharded":
+            return ShardedVectorIndex(
+                dimension=self.dimension,
+                num_shards=int(os.getenv("INDEX_SHARDS", str(os.cpu_count() or 1))),
+                query_timeout=float(os.getenv("INDEX_SHARD_TIMEOUT", "2"))
+            )
+        return self._pinecone_index()
+
+    def _pinecone_index(self):
         # Initialize Pinecone
         pinecone.init(
             api_key=os.getenv("PINECONE_API_KEY"),
@@ -24,21 +122,43 @@ class DocumentProcessor:
         )
         
         # Create or get the index
-        self.index_name = "document-embeddings"
         if self.index_name not in pinecone.list_indexes():
             pinecone.create_index(
                 name=self.index_name,
-                dimension=1536,  # OpenAI embedding dimension
+                dimension=self.dimension,
                 metric="cosine"
             )
         
-        self.vector_store = Pinecone.from_existing_index(
-            index_name=self.index_name,
-            embedding=self.embeddings
-        )
+        return pinecone.Index(self.index_name)
 
-    def process_document(self, file_path: str) -> List[Dict[str, Any]]:
+    def process_document(self, file_path: str, tenant_id: Optional[str] = None) -> List[Dict[str, Any]]:
         """Process a document and store its embeddings in the vector database."""
+        chunks: List[Any] = []
+        self.ingest_document(file_path, on_stored=chunks.extend, tenant_id=tenant_id)
+        return [{
+            "text": doc.page_content,
+            "metadata": doc.metadata
+        } for doc in chunks]
+
+    def ingest_document(self, file_path: str,
+                        on_stored: Optional[Callable[[List[Any]], None]] = None,
+                        tenant_id: Optional[str] = None) -> Dict[str, Any]:
+        """Stream a document through parse, split, embed and upsert stages.
+
+        Stages run concurrently with bounded queues between them, so memory
+        does not grow with the document and early chunks are searchable
+        while later pages are still being parsed. `on_stored` is called
+        with each batch of chunks once it is in the index. Chunks that
+        nearly duplicate one already stored in the namespace are not
+        embedded; they reuse the existing vector through their
+        "duplicate_of" metadata, and the document is added to that vector's
+        "referenced_by" metadata so deletes can hand it over (see
+        `delete_document`). Vector ids are "<document_id>#<chunk number>".
+        Vectors go to the tenant's namespace. If any stage fails, e.g. the
+        tenant runs out of vector quota, the partially stored document is
+        removed.
+        """
+        namespace = namespace_for(tenant_id)
         # Load document based on file type
         if file_path.endswith('.pdf'):
             loader = PyPDFLoader(file_path)
@@ -47,31 +167,316 @@ class DocumentProcessor:
         else:
             raise ValueError(f"Unsupported file type: {file_path}")
 
-        # Load and split the document
-        documents = loader.load()
-        texts = self.text_splitter.split_documents(documents)
+        document_id = os.path.basename(file_path)
+        stats = {"document_id": document_id, "pages": 0, "bytes": 0, "chunks": 0, "vectors": 0, "duplicates": 0}
+        # Chunk numbers of duplicates of this document's own chunks, which need no reference
+        own_duplicates: Set[int] = set()
+        # Quota reservations held by this ingest, released if it fails
+        reservations: List[Any] = []
 
-        # Store embeddings in Pinecone
-        self.vector_store.add_documents(texts)
+        def parse() -> Iterator[Any]:
+            with busy_timer("ingest", "parse") as clock:
+                for page in clock.timed(_lazy_pages(loader)):
+                    stats["pages"] += 1
+                    stats["bytes"] += len(page.page_content)
+                    BYTES_PROCESSED.labels(pipeline="ingest", stage="parse").inc(len(page.page_content))
+                    yield page
+                clock.span.set_attribute("pages", stats["pages"])
+                clock.span.set_attribute("bytes", stats["bytes"])
 
-        return [{
-            "text": doc.page_content,
-            "metadata": doc.metadata
-        } for doc in texts]
+        def ocr(pages: Iterator[Any]) -> Iterator[Any]:
+            with busy_timer("ingest", "ocr") as clock:
+                before = self.ocr.stats()["pages_ocr"]
+                yield from clock.timed(self.ocr.ocr_pages(file_path, clock.untimed(pages)))
+                clock.span.set_attribute("pages", self.ocr.stats()["pages_ocr"] - before)
+
+        def split(pages: Iterator[Any]) -> Iterator[Any]:
+            with busy_timer("ingest", "split") as clock:
+                for page in pages:
+                    with clock:
+                        chunks = self.text_splitter.split_documents([page])
+                    yield from chunks
+
+        def dedup(chunks: Iterator[Any]) -> Iterator[Any]:
+            with busy_timer("ingest", "dedup") as clock:
+                duplicates = 0
+                for number, chunk in enumerate(chunks):
+                    with clock:
+                        match = self.deduplicator.find_or_add(
+                            namespace, document_id, f"{document_id}#{number}", chunk.page_content
+                        )
+                    if match is not None:
+                        duplicates += 1
+                        chunk.metadata["duplicate_of"] = match.vector_id
+                        chunk.metadata["duplicate_similarity"] = round(match.similarity, 3)
+                        if match.document_id == document_id:
+                            own_duplicates.add(number)
+                    yield chunk
+                clock.span.set_attribute("duplicates", duplicates)
+
+        def embed(chunks: Iterator[Any]) -> Iterator[Any]:
+            with busy_timer("ingest", "embed") as clock:
+                for batch in _batched(chunks, self.embed_batch_size):
+                    fresh = [doc for doc in batch if "duplicate_of" not in doc.metadata]
+                    with clock:
+                        vectors = self.embeddings.embed_documents([doc.page_content for doc in fresh]) if fresh else []
+                    yield batch, fresh, vectors
+
+        def upsert(batches: Iterator[Any]) -> Iterator[Any]:
+            with busy_timer("ingest", "upsert") as clock:
+                for batch, fresh, vectors in batches:
+                    with clock:
+                        ids = {id(doc): f"{document_id}#{stats['chunks'] + i}" for i, doc in enumerate(batch)}
+                        shared = [
+                            doc for i, doc in enumerate(batch)
+                            if "duplicate_of" in doc.metadata and stats["chunks"] + i not in own_duplicates
+                        ]
+                        orphans = self._add_references(document_id, shared, namespace) if shared else []
+                        if orphans:
+                            # Their vectors were deleted after they matched; embed them after all
+                            for doc in orphans:
+                                del doc.metadata["duplicate_of"], doc.metadata["duplicate_similarity"]
+                            fresh = fresh + orphans
+                            vectors = vectors + self.embeddings.embed_documents([doc.page_content for doc in orphans])
+                        fresh_ids = [ids[id(doc)] for doc in fresh]
+                        reservations.append(self.quotas.reserve_vectors(namespace, len(fresh)))
+                        self._upsert(document_id, fresh, vectors, fresh_ids, namespace=namespace)
+                        if self.deduplicator is not None:
+                            self.deduplicator.confirm(namespace, fresh_ids)
+                    stats["chunks"] += len(batch)
+                    stats["vectors"] += len(fresh)
+                    stats["duplicates"] += len(batch) - len(fresh)
+                    CHUNKS_PROCESSED.labels(pipeline="ingest").inc(len(batch))
+                    yield batch
+                clock.span.set_attribute("vectors", stats["vectors"])
+
+        with INGESTIONS_IN_FLIGHT.track_inprogress(), \
+                get_tracer().span("ingest.process_document", document_id=document_id) as trace:
+            stages = [split, embed, upsert]
+            if self.ocr is not None and file_path.endswith('.pdf'):
+                stages.insert(0, ocr)
+            if self.deduplicator is not None:
+                stages.insert(stages.index(embed), dedup)
+            try:
+                for batch in run_pipeline(parse(), stages, queue_size=self.ingest_queue_size):
+                    if on_stored is not None:
+                        on_stored(batch)
+            except Exception:
+                # Remove whatever was stored, and chunks registered for dedup
+                for reservation in reservations:
+                    self.quotas.release_vectors(namespace, reservation)
+                self.delete_document(document_id, tenant_id=tenant_id)
+                raise
+            trace.set_attribute("pages", stats["pages"])
+            trace.set_attribute("chunks", stats["chunks"])
+            trace.set_attribute("duplicates", stats["duplicates"])
+
+        return stats
+
+    def _upsert(self, document_id: str, texts: List[Any], vectors: List[List[float]],
+                ids: List[str], namespace: str = ""):
+        """Upsert chunk vectors with their text stored under the "text" key."""
+        records = [(
+            vector_id,
+            vector,
+            {**doc.metadata, "text": doc.page_content, "document_id": document_id}
+        ) for vector_id, doc, vector in zip(ids, texts, vectors)]
+        for i in range(0, len(records), self.upsert_batch_size):
+            self.index.upsert(vectors=records[i:i + self.upsert_batch_size], namespace=namespace)
 
-    def search_documents(self, query: str, k: int = 5) -> List[Dict[str, Any]]:
+    def search_documents(self, query: str, k: int = 5,
+                         tenant_id: Optional[str] = None) -> List[Dict[str, Any]]:
         """Search for relevant documents using semantic search."""
-        results = self.vector_store.similarity_search(query, k=k)
-        return [{
-            "text": doc.page_content,
-            "metadata": doc.metadata,
-            "score": doc.metadata.get("score", 0)
-        } for doc in results]
+        namespace = namespace_for(tenant_id)
+        self.quotas.check_query(namespace)
+        with get_tracer().span("search.search_documents", k=k, query_chars=len(query)) as trace:
+            with priority_scope(Priority.INTERACTIVE):
+                with stage_timer("search", "query_embed"):
+                    vector = self.embeddings.embed_query(query)
+            with stage_timer("search", "vector_query"):
+                response = self.index.query(
+                    vector=vector, top_k=k, include_metadata=True, namespace=namespace
+                )
+            with stage_timer("search", "serialize"):
+                results = []
+                for match in response["matches"]:
+                    metadata = dict(match.get("metadata") or {})
+                    text = metadata.pop("text", "")
+                    results.append({
+                        "text": text,
+                        "metadata": metadata,
+                        "score": match["score"]
+                    })
+            trace.set_attribute("results", len(results))
+            if response.get("partial"):
+                trace.set_attribute("partial", True)
+        return results
+
+    def build_context(self, query: str, k: int = 10,
+                      token_budget: int = 3000,
+                      model_name: str = "gpt-3.5-turbo",
+                      tenant_id: Optional[str] = None) -> Dict[str, Any]:
+        """Retrieve chunks for a query and pack them into an LLM context."""
+        packer = self.context_packers.get(model_name)
+        if packer is None:
+            packer = ContextPacker(model_name=model_name)
+            self.context_packers.set(model_name, packer)
+        results = self.search_documents(query, k=k, tenant_id=tenant_id)
+        return packer.pack(results, token_budget=token_budget).to_dict()
+
+    def coalescing_stats(self) -> Dict[str, int]:
+        """Return how many embedding calls shared an in-flight request."""
+        return self.embeddings.flight.stats()
+
+    def batching_stats(self) -> Dict[str, float]:
+        """Return batch counts and the current query batching window."""
+        return self.query_batcher.batcher.stats()
+
+    def embedding_stats(self) -> Dict[str, Any]:
+        """Return local model throughput and padding, if the local backend is in use."""
+        stats = getattr(self.base_embeddings, "stats", None)
+        return stats() if callable(stats) else {"backend": type(self.base_embeddings).__name__}
+
+    def dedup_stats(self) -> Dict[str, Any]:
+        """Return near-duplicate counts and the storage they saved."""
+        if self.deduplicator is None:
+            return {"enabled": False}
+        stats = self.deduplicator.stats()
+        stats["vector_bytes_saved"] = stats["duplicates"] * self.dimension * 4
+        return stats
+
+    def ocr_stats(self) -> Dict[str, Any]:
+        """Return OCR'd page, cache hit and failure counts."""
+        return self.ocr.stats() if self.ocr is not None else {"enabled": False}
+
+    def tenant_usage(self, tenant_id: Optional[str] = None) -> Dict[str, Any]:
+        """Return a tenant's stored vector count and quotas."""
+        return self.quotas.usage(namespace_for(tenant_id))
+
+    def export_snapshot(self, out: BinaryIO, quantize: bool = False) -> Dict[str, Any]:
+        """Write a snapshot of every namespace to `out`."""
+        return export_snapshot(self.index, out, quantize=quantize)
+
+    def import_snapshot(self, stream: BinaryIO) -> Dict[str, Any]:
+        """Upsert every vector in a snapshot into the index.
+
+        A sharded index stops reporting shards lost before the import, as
+        the snapshot refilled them.
+        """
+        lost = self.index.lost_shards() if isinstance(self.index, ShardedVectorIndex) else None
+        try:
+            result = import_snapshot(stream, self.index, batch_size=self.upsert_batch_size)
+        finally:
+            self.quotas.invalidate()
+        if lost:
+            self.index.mark_recovered(lost)
+        return result
+
+    def _filtered_batches(self, filter: Dict[str, Any], namespace: str,
+                          include_metadata: bool = False) -> Iterator[List[Dict[str, Any]]]:
+        """Yield batches of the vectors matching a metadata filter
+
+        Repeats a top-k query under the filter, so callers must delete or
+        re-label each batch so that it stops matching. Ids already yielded
+        are skipped, as the index may still list them while it catches up.
+        Raises if a shard of a sharded index did not answer, so deletes fail
+        instead of leaving that shard's vectors behind.
+        """
+        seen = set()
+        while True:
+            response = self.index.query(
+                vector=[1.0] * self.dimension, top_k=1000, filter=filter,
+                include_metadata=include_metadata, namespace=namespace
+            )
+            if response.get("missing_shards"):
+                raise RuntimeError(
+                    f"Shards {response['missing_shards']} did not answer; cannot list every vector matching {filter}"
+                )
+            matches = [match for match in response["matches"] if match["id"] not in seen]
+            if not matches:
+                return
+            seen.update(match["id"] for match in matches)
+            yield matches
+
+    def _add_references(self, document_id: str, duplicates: List[Any], namespace: str) -> List[Any]:
+        """Add the document to the "referenced_by" metadata of the vectors its duplicate chunks reuse.
+
+        Returns the chunks whose vector no longer exists, e.g. because
+        another worker deleted its document after the match.
+        """
+        owners = sorted({doc.metadata["duplicate_of"] for doc in duplicates})
+        with self._references_lock:
+            found = self.index.fetch(ids=owners, namespace=namespace)["vectors"]
+            for vector_id in owners:
+                if vector_id not in found:
+                    continue
+                referenced_by = list((found[vector_id]["metadata"] or {}).get("referenced_by") or [])
+                if document_id not in referenced_by:
+                    self.index.update(
+                        id=vector_id,
+                        set_metadata={"referenced_by": referenced_by + [document_id], "shared": True},
+                        namespace=namespace
+                    )
+            # update ignores unknown ids, so check the vectors are still there
+            present = self.index.fetch(ids=[v for v in owners if v in found], namespace=namespace)["vectors"]
+        missing = [vector_id for vector_id in owners if vector_id not in present]
+        if missing and self.deduplicator is not None:
+            self.deduplicator.forget_vectors(namespace, missing)
+        return [doc for doc in duplicates if doc.metadata["duplicate_of"] not in present]
+
+    def _release_duplicates(self, document_id: str, namespace: str):
+        """Hand a document's vectors that other documents reference over to one of them, and drop its references.
+
+        Both come from the "referenced_by" metadata in the index, so this
+        works for documents ingested by any worker.
+        """
+        handed_over: Dict[str, str] = {}
+        with self._references_lock:
+            for matches in self._filtered_batches(
+                {"document_id": document_id, "shared": True}, namespace, include_metadata=True
+            ):
+                for match in matches:
+                    referenced_by = [d for d in match["metadata"].get("referenced_by") or [] if d != document_id]
+                    if referenced_by:
+                        handed_over[match["id"]] = referenced_by[0]
+                        set_metadata = {
+                            "document_id": referenced_by[0],
+                            "referenced_by": referenced_by[1:],
+                            "shared": len(referenced_by) > 1
+                        }
+                    else:
+                        set_metadata = {"referenced_by": [], "shared": False}
+                    self.index.update(id=match["id"], set_metadata=set_metadata, namespace=namespace)
+            for matches in self._filtered_batches({"referenced_by": document_id}, namespace, include_metadata=True):
+                for match in matches:
+                    referenced_by = [d for d in match["metadata"].get("referenced_by") or [] if d != document_id]
+                    self.index.update(
+                        id=match["id"],
+                        set_metadata={"referenced_by": referenced_by, "shared": bool(referenced_by)},
+                        namespace=namespace
+                    )
+        if self.deduplicator is not None:
+            self.deduplicator.forget(namespace, document_id, handed_over)
+
+    def _delete_vectors(self, document_id: str, namespace: str):
+        """Delete a document's vectors by metadata filter, or by id where that is unsupported."""
+        try:
+            self.index.delete(filter={"document_id": document_id}, namespace=namespace)
+            return
+        except Exception as e:
+            # Serverless and starter Pinecone indexes reject delete-by-metadata
+            self.logger.warning(f"Delete by filter failed, deleting {document_id} by id: {e}")
+        for matches in self._filtered_batches({"document_id": document_id}, namespace):
+            self.index.delete(ids=[match["id"] for match in matches], namespace=namespace)
 
-    def delete_document(self, document_id: str) -> bool:
+    def delete_document(self, document_id: str, tenant_id: Optional[str] = None) -> bool:
         """Delete a document from the vector database."""
+        namespace = namespace_for(tenant_id)
         try:
-            self.vector_store.delete([document_id])
+            # Re-labelled vectors no longer match the document_id filter below
+            self._release_duplicates(document_id, namespace)
+            self._delete_vectors(document_id, namespace)
+            self.quotas.invalidate()
             return True
         except Exception as e:
             print(f"Error deleting document: {e}")
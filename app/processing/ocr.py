@@ -0,0 +1,282 @@
+from typing import Dict, Any, Iterable, Iterator, Optional, Tuple
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+import hashlib
+import logging
+import multiprocessing
+import os
+import re
+import tempfile
+import threading
+import pytesseract
+from pdf2image import convert_from_path, pdfinfo_from_path
+from PyPDF2 import PdfReader
+
+PAGE_SIZE_PATTERN = re.compile(r"([\d.]+) x ([\d.]+) pts")
+
+def file_digest(file_path: str) -> str:
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def _update_with_resources(digest: Any, resources: Any, seen: set):
+    """Hash the XObjects (images and forms) a page or form draws"""
+    xobjects = resources.get("/XObject") if resources else None
+    if not xobjects:
+        return
+    xobjects = xobjects.get_object()
+    for name in sorted(xobjects):
+        reference = xobjects.raw_get(name)
+        xobject = xobjects[name].get_object()
+        key = getattr(reference, "idnum", None) or id(xobject)
+        digest.update(name.encode())
+        if key in seen:
+            continue
+        seen.add(key)
+        digest.update(repr(sorted((k, repr(v)) for k, v in xobject.items() if k != "/Length")).encode())
+        digest.update(xobject.get_data())
+        if xobject.get("/Subtype") == "/Form":
+            _update_with_resources(digest, xobject.get("/Resources"), seen)
+
+def page_digest(reader: PdfReader, page_number: int) -> str:
+    """Hash of what one page draws: its content stream, size and XObjects
+
+    Unlike a file hash, this stays the same when other pages of the
+    document change, so a partially edited scan only re-OCRs the pages
+    that actually differ.
+    """
+    page = reader.pages[page_number]
+    digest = hashlib.sha256()
+    digest.update(repr([float(v) for v in page.mediabox]).encode())
+    digest.update(str(page.get("/Rotate", 0)).encode())
+    contents = page.get_contents()
+    if contents is not None:
+        digest.update(contents.get_data())
+    _update_with_resources(digest, page.get("/Resources"), set())
+    return digest.hexdigest()
+
+def _page_dpi(file_path: str, page_number: int, dpi: int, max_pixels: int, timeout: float) -> int:
+    """Highest resolution up to `dpi` at which the page renders within `max_pixels`
+
+    Reads the page size with pdfinfo, which is much cheaper than rendering
+    an oversized page and scaling it down afterwards.
+    """
+    try:
+        info = pdfinfo_from_path(file_path, first_page=page_number + 1, last_page=page_number + 1, timeout=timeout)
+    except Exception:
+        return dpi
+    # "Page size", or "Page    N size" when a page range is given
+    sizes = [PAGE_SIZE_PATTERN.match(str(value).strip()) for key, value in info.items() if key.endswith("size")]
+    sizes = [size for size in sizes if size is not None]
+    if not sizes:
+        return dpi
+    width, height = float(sizes[0].group(1)), float(sizes[0].group(2))
+    if width <= 0 or height <= 0:
+        return dpi
+    # Sizes are in points, 72 per inch
+    return max(1, min(dpi, int(72 * (max_pixels / (width * height)) ** 0.5)))
+
+def _ocr_page(file_path: str, page_sha256: str, page_number: int, dpi: int, max_pixels: int,
+              timeout: float, lang: str, cache_dir: str) -> Tuple[str, str, bool]:
+    """OCR one page in a worker process, from the cache when possible
+
+    Returns the cache key, the text and whether it came from the cache.
+    The key covers the page's own contents and the render settings, so a
+    cached page is served without rasterizing it. Both poppler and
+    tesseract run as subprocesses that are killed after `timeout` seconds.
+    """
+    key = hashlib.sha256(f"{page_sha256}:{dpi}:{max_pixels}:{lang}".encode()).hexdigest()
+    path = os.path.join(cache_dir, f"{key}.txt")
+    try:
+        with open(path, encoding="utf-8") as f:
+            text = f.read()
+        # Pruning evicts the least recently used entries first
+        os.utime(path)
+        return key, text, True
+    except FileNotFoundError:
+        pass
+
+    image = convert_from_path(
+        file_path, dpi=_page_dpi(file_path, page_number, dpi, max_pixels, timeout),
+        first_page=page_number + 1, last_page=page_number + 1, grayscale=True, timeout=timeout
+    )[0]
+    if image.width * image.height > max_pixels:
+        # Only when pdfinfo could not report the page size
+        scale = (max_pixels / (image.width * image.height)) ** 0.5
+        image = image.resize((max(1, int(image.width * scale)), max(1, int(image.height * scale))))
+
+    text = pytesseract.image_to_string(image, lang=lang, timeout=timeout)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+    return key, text, False
+
+class _PageDigests:
+    """Per-page content hashes for one PDF, opened on first use
+
+    Falls back to a hash of the whole file and the page number when the
+    PDF cannot be parsed, which still serves exact re-uploads from cache.
+    """
+
+    def __init__(self, file_path: str):
+        self.logger = logging.getLogger(__name__)
+        self.file_path = file_path
+        self._reader: Optional[PdfReader] = None
+        self._file_sha256: Optional[str] = None
+
+    def get(self, page_number: int) -> str:
+        try:
+            if self._reader is None and self._file_sha256 is None:
+                self._reader = PdfReader(self.file_path)
+            if self._reader is not None:
+                return page_digest(self._reader, page_number)
+        except Exception as e:
+            self.logger.warning(f"Could not hash page {page_number} of {self.file_path}: {e}")
+        if self._file_sha256 is None:
+            self._file_sha256 = file_digest(self.file_path)
+        return hashlib.sha256(f"{self._file_sha256}:{page_number}".encode()).hexdigest()
+
+class OCRProcessor:
+    """OCR for image-only PDF pages across a process pool
+
+    Pages whose extracted text is shorter than `min_chars` are rasterized
+    and OCR'd in worker processes while the rest of the document keeps
+    flowing; page order is preserved with a bounded look-ahead window.
+    Pages are rendered at the configured dpi, lowered per page so the
+    image stays within `max_pixels`. Text is cached on disk by a hash of
+    the page's contents and the settings, so re-uploads, including edited
+    copies of a scan, skip rendering and tesseract for unchanged pages.
+    The cache is pruned to `max_cache_bytes`, least recently used first.
+    A page that fails or times out is passed through without text instead
+    of failing the document.
+    """
+
+    def __init__(self, max_workers: Optional[int] = None,
+                 dpi: int = 200,
+                 max_pixels: int = 25_000_000,
+                 page_timeout: float = 60.0,
+                 min_chars: int = 20,
+                 lang: str = "eng",
+                 cache_dir: Optional[str] = None,
+                 max_cache_bytes: int = 512 * 1024 * 1024):
+        self.logger = logging.getLogger(__name__)
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.dpi = dpi
+        self.max_pixels = max_pixels
+        self.page_timeout = page_timeout
+        self.min_chars = min_chars
+        self.lang = lang
+        self.cache_dir = cache_dir or os.path.join(tempfile.gettempdir(), "docuvector-ocr")
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self.max_cache_bytes = max_cache_bytes
+        self.pages_ocr = 0
+        self.cache_hits = 0
+        self.failures = 0
+        self.cache_evictions = 0
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def _executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                # Spawned, not forked: the pool is created from ingestion
+                # threads, and forking a threaded process can deadlock
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context("spawn")
+                )
+            return self._pool
+
+    def needs_ocr(self, page: Any) -> bool:
+        return len(page.page_content.strip()) < self.min_chars
+
+    def ocr_pages(self, file_path: str, pages: Iterable[Any]) -> Iterator[Any]:
+        """Yield pages in order, with OCR text filled in for image-only pages"""
+        window: deque = deque()
+        digests = _PageDigests(file_path)
+        rendered = False
+        for position, page in enumerate(pages):
+            future = None
+            if self.needs_ocr(page):
+                page_number = page.metadata.get("page", position)
+                future = self._executor().submit(
+                    _ocr_page, file_path, digests.get(page_number), page_number, self.dpi,
+                    self.max_pixels, self.page_timeout, self.lang, self.cache_dir
+                )
+            window.append((page, future))
+            while len(window) > 2 * self.max_workers:
+                page, future = window.popleft()
+                rendered |= future is not None
+                yield self._resolve(page, future)
+        while window:
+            page, future = window.popleft()
+            rendered |= future is not None
+            yield self._resolve(page, future)
+        if rendered:
+            self.prune_cache()
+
+    def prune_cache(self):
+        """Delete the least recently used cache entries beyond max_cache_bytes"""
+        entries = []
+        total = 0
+        with os.scandir(self.cache_dir) as scan:
+            for entry in scan:
+                if not entry.name.endswith(".txt"):
+                    continue
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+                total += stat.st_size
+        if total <= self.max_cache_bytes:
+            return
+        evicted = 0
+        for _, size, path in sorted(entries):
+            if total <= self.max_cache_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+            evicted += 1
+        with self._lock:
+            self.cache_evictions += evicted
+
+    def _resolve(self, page: Any, future: Optional[Future]) -> Any:
+        if future is None:
+            return page
+        try:
+            # Both subprocesses are bounded by page_timeout; this only guards a wedged worker
+            key, text, cached = future.result(timeout=2 * self.page_timeout + 30)
+        except Exception as e:
+            with self._lock:
+                self.failures += 1
+            self.logger.warning(f"OCR failed for page {page.metadata.get('page')} of {page.metadata.get('source')}: {e}")
+            return page
+        with self._lock:
+            self.pages_ocr += 1
+            self.cache_hits += cached
+        page.page_content = text
+        page.metadata["ocr"] = True
+        page.metadata["ocr_cache_key"] = key
+        return page
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "pages_ocr": self.pages_ocr,
+                "cache_hits": self.cache_hits,
+                "cache_evictions": self.cache_evictions,
+                "failures": self.failures
+            }
+
+    def shutdown(self):
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown()
+                self._pool = None
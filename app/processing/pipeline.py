@@ -0,0 +1,100 @@
+from typing import Any, Callable, Iterable, Iterator, List
+import contextvars
+import logging
+import queue
+import threading
+import time
+
+Stage = Callable[[Iterator[Any]], Iterable[Any]]
+
+_DONE = object()
+
+class _Failure:
+    def __init__(self, error: BaseException):
+        self.error = error
+
+class PipelineCancelled(Exception):
+    """Raised inside stage threads once the pipeline has been torn down"""
+
+def _put(channel: queue.Queue, item: Any, stop: threading.Event):
+    while not stop.is_set():
+        try:
+            channel.put(item, timeout=0.1)
+            return
+        except queue.Full:
+            continue
+    raise PipelineCancelled()
+
+def _drain(channel: queue.Queue, stop: threading.Event) -> Iterator[Any]:
+    while True:
+        try:
+            item = channel.get(timeout=0.1)
+        except queue.Empty:
+            if stop.is_set():
+                raise PipelineCancelled()
+            continue
+        if item is _DONE:
+            return
+        if isinstance(item, _Failure):
+            raise item.error
+        yield item
+
+def run_pipeline(source: Iterable[Any], stages: List[Stage], queue_size: int = 4,
+                 join_timeout: float = 30.0) -> Iterator[Any]:
+    """Stream items through generator stages running concurrently
+
+    The source and every stage but the last run in their own thread,
+    connected by queues of at most `queue_size` items, so a slow stage
+    applies backpressure upstream and memory stays bounded by the queue
+    sizes rather than by the input. The last stage runs in the caller's
+    thread as this generator is consumed. A failure in any stage is
+    re-raised to the caller, and closing the generator early stops every
+    thread. Threads run in a copy of the caller's context, so spans and
+    request priority carry over. A stage stuck in a call that never returns
+    cannot be interrupted; teardown waits at most `join_timeout` seconds
+    for all threads, then logs the stragglers and leaves them behind as
+    daemon threads. Only the last stage sees results, so a straggler's
+    output is discarded.
+    """
+    stop = threading.Event()
+    channels = [queue.Queue(maxsize=queue_size) for _ in stages]
+    producers = [lambda: source] + [
+        (lambda stage, channel: lambda: stage(_drain(channel, stop)))(stage, channels[i])
+        for i, stage in enumerate(stages[:-1])
+    ]
+
+    def work(produce: Callable[[], Iterable[Any]], out: queue.Queue):
+        try:
+            for item in produce():
+                _put(out, item, stop)
+            _put(out, _DONE, stop)
+        except PipelineCancelled:
+            pass
+        except BaseException as e:
+            try:
+                _put(out, _Failure(e), stop)
+            except PipelineCancelled:
+                pass
+
+    threads = []
+    for i, produce in enumerate(producers):
+        context = contextvars.copy_context()
+        thread = threading.Thread(
+            target=context.run, args=(work, produce, channels[i]),
+            name=f"pipeline-stage-{i}", daemon=True
+        )
+        thread.start()
+        threads.append(thread)
+
+    try:
+        yield from stages[-1](_drain(channels[-1], stop))
+    finally:
+        stop.set()
+        deadline = time.monotonic() + join_timeout
+        for thread in threads:
+            thread.join(max(0.0, deadline - time.monotonic()))
+        stragglers = [thread.name for thread in threads if thread.is_alive()]
+        if stragglers:
+            logging.getLogger(__name__).error(
+                f"Pipeline stages still running {join_timeout}s after teardown, abandoning them: {stragglers}"
+            )
@@ -0,0 +1,395 @@
+from typing import Dict, List, Any, Iterator, Optional, Sequence, Tuple
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+from multiprocessing import connection
+import atexit
+import heapq
+import itertools
+import logging
+import multiprocessing
+import threading
+import time
+import zlib
+from .vector_index import InMemoryVectorIndex, VectorRecord
+
+class ShardTimeout(TimeoutError):
+    """Raised when a shard misses a write deadline; the write may still be applied later"""
+
+def _shard_main(shard_id: int, dimension: int, requests, responses):
+    """Serve index calls for one shard until a None request arrives"""
+    index = InMemoryVectorIndex(dimension=dimension)
+    while True:
+        request = requests.get()
+        if request is None:
+            return
+        request_id, method, kwargs = request
+        try:
+            responses.send((request_id, getattr(index, method)(**kwargs), None))
+        except Exception as e:
+            responses.send((request_id, None, f"{type(e).__name__}: {e}"))
+
+class _Shard:
+    """One shard process with its request queue and response pipe"""
+
+    def __init__(self, context, shard_id: int, dimension: int):
+        self.requests = context.Queue()
+        self.responses, child_end = context.Pipe(duplex=False)
+        self.process = context.Process(
+            target=_shard_main, args=(shard_id, dimension, self.requests, child_end),
+            name=f"vector-shard-{shard_id}", daemon=True
+        )
+        self.process.start()
+        child_end.close()
+
+    def discard(self):
+        self.requests.cancel_join_thread()
+        self.requests.close()
+        self.responses.close()
+
+class ShardedVectorIndex:
+    """In-memory vector index hash-partitioned across worker processes
+
+    Vector ids are assigned to shards by CRC32, and each shard process owns
+    an InMemoryVectorIndex, so scoring runs on every core without sharing
+    the GIL. Queries scatter to all shards, which return only ids and
+    scores; the per-shard top-k lists are merged with a heap and metadata
+    is fetched for the merged top-k alone. A shard that misses
+    `query_timeout` is left out and the response is marked `partial`
+    instead of failing the search.
+
+    Writes wait for every shard they touch and raise ShardTimeout after
+    `write_timeout`. A timed-out write may still be applied, but each shard
+    applies its requests in order, so a delete issued afterwards (as a
+    failed ingest does) still removes it. A shard process that dies fails
+    its outstanding calls at once and is restarted empty in the background;
+    calls to it fail until the replacement is up. Its data is lost until
+    re-ingested or restored from a snapshot, and query responses list it
+    under `lost_shards` until `mark_recovered` is called.
+    Exposes the same calls as InMemoryVectorIndex, so DocumentProcessor
+    can use either.
+    """
+
+    def __init__(self, num_shards: int = 4,
+                 dimension: int = 1536,
+                 query_timeout: float = 2.0,
+                 write_timeout: float = 60.0):
+        self.logger = logging.getLogger(__name__)
+        self.num_shards = num_shards
+        self.dimension = dimension
+        self.query_timeout = query_timeout
+        self.write_timeout = write_timeout
+        self.partial_queries = 0
+        self.restarts = 0
+        self._context = multiprocessing.get_context("spawn")
+        # None while a shard is being restarted
+        self._shards: List[Optional[_Shard]] = [_Shard(self._context, i, dimension) for i in range(num_shards)]
+        # shard id -> restart count when its data was lost
+        self._lost: Dict[int, int] = {}
+        # request id -> (shard id, future)
+        self._pending: Dict[int, Tuple[int, Future]] = {}
+        self._ids = itertools.count()
+        self._lock = threading.Lock()
+        self._closed = False
+        self._wakeup, self._wake = self._context.Pipe(duplex=False)
+        self._dispatcher = threading.Thread(target=self._dispatch, name="vector-shard-dispatch", daemon=True)
+        self._dispatcher.start()
+        atexit.register(self.close)
+
+    def _dispatch(self):
+        """Route shard responses to their futures and restart shards that exit"""
+        while True:
+            with self._lock:
+                if self._closed:
+                    return
+                shards = [(shard_id, shard) for shard_id, shard in enumerate(self._shards) if shard is not None]
+            waitables = [self._wakeup]
+            for _, shard in shards:
+                waitables += [shard.responses, shard.process.sentinel]
+            ready = connection.wait(waitables)
+            if self._wakeup in ready:
+                self._wakeup.recv()
+            for shard_id, shard in shards:
+                if shard.responses in ready:
+                    try:
+                        request_id, result, error = shard.responses.recv()
+                    except (EOFError, OSError):
+                        self._on_exit(shard_id, shard)
+                        continue
+                    with self._lock:
+                        _, future = self._pending.pop(request_id, (None, None))
+                    if future is None:
+                        # The caller already gave up on this shard
+                        continue
+                    if error is not None:
+                        future.set_exception(RuntimeError(f"Shard {shard_id}: {error}"))
+                    else:
+                        future.set_result(result)
+                elif shard.process.sentinel in ready:
+                    self._on_exit(shard_id, shard)
+
+    def _on_exit(self, shard_id: int, shard: _Shard):
+        """Fail the calls a dead shard still owed and restart it in the background"""
+        with self._lock:
+            if self._closed or self._shards[shard_id] is not shard:
+                return
+            failed = [
+                request_id for request_id, (owner, _) in self._pending.items() if owner == shard_id
+            ]
+            futures = [self._pending.pop(request_id)[1] for request_id in failed]
+            self._shards[shard_id] = None
+            self.restarts += 1
+            self._lost[shard_id] = self.restarts
+        for future in futures:
+            future.set_exception(RuntimeError(f"Shard {shard_id} exited"))
+        # Spawning takes a while; keep routing the other shards' responses meanwhile
+        threading.Thread(
+            target=self._restart, args=(shard_id, shard), name=f"vector-shard-restart-{shard_id}", daemon=True
+        ).start()
+
+    def _restart(self, shard_id: int, dead: _Shard):
+        dead.process.join(timeout=1)
+        self.logger.error(
+            f"Shard {shard_id} exited with code {dead.process.exitcode}; restarting it empty, its vectors are lost"
+        )
+        dead.discard()
+        while True:
+            try:
+                shard = _Shard(self._context, shard_id, self.dimension)
+                break
+            except Exception as e:
+                self.logger.error(f"Could not restart shard {shard_id}: {e}")
+                time.sleep(1)
+                with self._lock:
+                    if self._closed:
+                        return
+        with self._lock:
+            if not self._closed:
+                self._shards[shard_id] = shard
+                self._wake.send(None)
+                return
+        shard.requests.put(None)
+        shard.process.join(timeout=5)
+        shard.discard()
+
+    def lost_shards(self) -> Dict[int, int]:
+        """Shards restarted empty, with the restart that lost their data"""
+        with self._lock:
+            return dict(self._lost)
+
+    def mark_recovered(self, lost: Optional[Dict[int, int]] = None):
+        """Stop reporting shards as lost once their data has been reloaded
+
+        Pass the `lost_shards()` taken before reloading, so a shard that
+        was lost again in the meantime stays reported; None clears all.
+        """
+        with self._lock:
+            for shard_id, restart in list(self._lost.items()):
+                if lost is None or lost.get(shard_id) == restart:
+                    del self._lost[shard_id]
+
+    def _submit(self, shard_id: int, method: str, **kwargs) -> Tuple[int, Future]:
+        future: Future = Future()
+        request_id = next(self._ids)
+        with self._lock:
+            shard = self._shards[shard_id]
+            if self._closed or shard is None or not shard.process.is_alive():
+                future.set_exception(RuntimeError(f"Shard {shard_id} is not running"))
+                return request_id, future
+            self._pending[request_id] = (shard_id, future)
+            shard.requests.put((request_id, method, kwargs))
+        return request_id, future
+
+    def _gather(self, calls: Dict[int, Tuple[int, Future]], timeout: float,
+                strict: bool, deadline: Optional[float] = None) -> Dict[int, Any]:
+        """Wait for shard results until a shared deadline; returns results by shard"""
+        deadline = deadline if deadline is not None else time.monotonic() + timeout
+        results = {}
+        for shard_id, (request_id, future) in calls.items():
+            try:
+                results[shard_id] = future.result(timeout=max(0.0, deadline - time.monotonic()))
+            except FutureTimeout:
+                with self._lock:
+                    self._pending.pop(request_id, None)
+                if strict:
+                    raise ShardTimeout(f"Shard {shard_id} did not answer within {timeout}s; the call may still be applied")
+                self.logger.warning(f"Shard {shard_id} timed out; returning partial results")
+            except Exception as e:
+                if strict:
+                    raise
+                self.logger.warning(f"Shard {shard_id} failed: {e}; returning partial results")
+        return results
+
+    def shard_for(self, vector_id: str) -> int:
+        return zlib.crc32(vector_id.encode()) % self.num_shards
+
+    def __len__(self) -> int:
+        return self.describe_index_stats()["total_vector_count"]
+
+    def upsert(self, vectors: List[VectorRecord], namespace: str = "", **kwargs) -> Dict[str, int]:
+        groups: Dict[int, List[VectorRecord]] = {}
+        for record in vectors:
+            vector_id = record["id"] if isinstance(record, dict) else record[0]
+            groups.setdefault(self.shard_for(vector_id), []).append(record)
+        calls = {
+            shard_id: self._submit(shard_id, "upsert", vectors=records, namespace=namespace)
+            for shard_id, records in groups.items()
+        }
+        results = self._gather(calls, self.write_timeout, strict=True)
+        return {"upserted_count": sum(result["upserted_count"] for result in results.values())}
+
+    def query(self, vector: Sequence[float], top_k: int = 10,
+              include_metadata: bool = False,
+              include_values: bool = False,
+              filter: Optional[Dict[str, Any]] = None,
+              namespace: str = "",
+              **kwargs) -> Dict[str, Any]:
+        deadline = time.monotonic() + self.query_timeout
+        vector = [float(v) for v in vector]
+        calls = {
+            shard_id: self._submit(
+                shard_id, "query", vector=vector, top_k=top_k, filter=filter, namespace=namespace
+            )
+            for shard_id in range(self.num_shards)
+        }
+        results = self._gather(calls, self.query_timeout, strict=False, deadline=deadline)
+        matches = heapq.nlargest(
+            top_k,
+            (match for result in results.values() for match in result["matches"]),
+            key=lambda match: match["score"]
+        )
+        answered = set(results)
+
+        if matches and (include_metadata or include_values):
+            groups: Dict[int, List[str]] = {}
+            for match in matches:
+                groups.setdefault(self.shard_for(match["id"]), []).append(match["id"])
+            calls = {
+                shard_id: self._submit(shard_id, "fetch", ids=ids, namespace=namespace)
+                for shard_id, ids in groups.items()
+            }
+            fetched = self._gather(calls, self.query_timeout, strict=False, deadline=deadline)
+            answered -= set(groups) - set(fetched)
+            records = {
+                vector_id: record for result in fetched.values() for vector_id, record in result["vectors"].items()
+            }
+            # Vectors deleted between the two calls are dropped
+            matches = [match for match in matches if match["id"] in records]
+            for match in matches:
+                if include_metadata:
+                    match["metadata"] = records[match["id"]]["metadata"]
+                if include_values:
+                    match["values"] = records[match["id"]]["values"]
+
+        response = {"matches": matches, "namespace": namespace}
+        if len(answered) < self.num_shards:
+            with self._lock:
+                self.partial_queries += 1
+            response["partial"] = True
+            response["missing_shards"] = sorted(set(range(self.num_shards)) - answered)
+        lost = self.lost_shards()
+        if lost:
+            response["partial"] = True
+            response["lost_shards"] = sorted(lost)
+        return response
+
+    def fetch(self, ids: List[str], namespace: str = "", **kwargs) -> Dict[str, Any]:
+        groups: Dict[int, List[str]] = {}
+        for vector_id in ids:
+            groups.setdefault(self.shard_for(vector_id), []).append(vector_id)
+        calls = {
+            shard_id: self._submit(shard_id, "fetch", ids=shard_ids, namespace=namespace)
+            for shard_id, shard_ids in groups.items()
+        }
+        results = self._gather(calls, self.write_timeout, strict=True)
+        vectors = {vector_id: record for result in results.values() for vector_id, record in result["vectors"].items()}
+        return {"vectors": vectors, "namespace": namespace}
+
+    def delete(self, ids: Optional[List[str]] = None,
+               filter: Optional[Dict[str, Any]] = None,
+               delete_all: bool = False,
+               namespace: str = "",
+               **kwargs) -> Dict[str, Any]:
+        if ids is not None and not delete_all:
+            groups: Dict[int, List[str]] = {}
+            for vector_id in ids:
+                groups.setdefault(self.shard_for(vector_id), []).append(vector_id)
+            calls = {
+                shard_id: self._submit(shard_id, "delete", ids=shard_ids, namespace=namespace)
+                for shard_id, shard_ids in groups.items()
+            }
+        else:
+            calls = {
+                shard_id: self._submit(
+                    shard_id, "delete", filter=filter, delete_all=delete_all, namespace=namespace
+                )
+                for shard_id in range(self.num_shards)
+            }
+        self._gather(calls, self.write_timeout, strict=True)
+        return {}
+
+    def update(self, id: str, values: Optional[Sequence[float]] = None,
+               set_metadata: Optional[Dict[str, Any]] = None,
+               namespace: str = "",
+               **kwargs) -> Dict[str, Any]:
+        shard_id = self.shard_for(id)
+        call = self._submit(
+            shard_id, "update", id=id, values=None if values is None else [float(v) for v in values],
+            set_metadata=set_metadata, namespace=namespace
+        )
+        self._gather({shard_id: call}, self.write_timeout, strict=True)
+        return {}
+
+    def namespaces(self) -> List[str]:
+        return list(self.describe_index_stats()["namespaces"])
+
+    def scan(self, namespace: str = "", batch_size: int = 1000) -> Iterator[Tuple[List[str], Any, List[Dict[str, Any]]]]:
+        """Iterate a namespace shard by shard"""
+        for shard_id in range(self.num_shards):
+            start = 0
+            while True:
+                call = self._submit(shard_id, "fetch_rows", namespace=namespace, start=start, count=batch_size)
+                ids, vectors, metadata = self._gather({shard_id: call}, self.write_timeout, strict=True)[shard_id]
+                if not ids:
+                    break
+                yield ids, vectors, metadata
+                start += len(ids)
+
+    def describe_index_stats(self, **kwargs) -> Dict[str, Any]:
+        calls = {shard_id: self._submit(shard_id, "describe_index_stats") for shard_id in range(self.num_shards)}
+        results = self._gather(calls, self.write_timeout, strict=True)
+        namespaces: Dict[str, Dict[str, int]] = {}
+        for result in results.values():
+            for name, info in result["namespaces"].items():
+                entry = namespaces.setdefault(name, {"vector_count": 0})
+                entry["vector_count"] += info["vector_count"]
+        return {
+            "dimension": self.dimension,
+            "namespaces": namespaces,
+            "total_vector_count": sum(n["vector_count"] for n in namespaces.values()),
+            "shards": self.num_shards,
+            "partial_queries": self.partial_queries,
+            "shard_restarts": self.restarts,
+            "lost_shards": sorted(self.lost_shards())
+        }
+
+    def close(self):
+        """Stop the shard processes; the index contents are discarded"""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            shards = [shard for shard in self._shards if shard is not None]
+            pending = [future for _, future in self._pending.values()]
+            self._pending.clear()
+            self._wake.send(None)
+        atexit.unregister(self.close)
+        self._dispatcher.join(timeout=5)
+        for shard in shards:
+            shard.requests.put(None)
+        for shard in shards:
+            shard.process.join(timeout=5)
+            if shard.process.is_alive():
+                shard.process.terminate()
+            shard.discard()
+        for future in pending:
+            if not future.done():
+                future.set_exception(RuntimeError("Index closed"))
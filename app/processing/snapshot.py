@@ -0,0 +1,450 @@
+"""Binary snapshots of a vector index
+
+A snapshot is a magic number followed by frames. Every frame has a fixed
+header (kind, codec, padding, stored length, raw length, CRC32 of the
+stored bytes, CRC32 of the header itself). The file starts with a HEAD
+frame (JSON: version, dimension, quantization) and each namespace is
+written as:
+
+    NSPC  namespace name and row count (JSON)
+    SCAL  per-row dequantization scales, float32 (int8 snapshots only)
+    VECS  the namespace's vectors as one contiguous, 64-byte aligned,
+          uncompressed row-major region (float32 or int8)
+    META  zlib-compressed JSON rows [id, metadata], in vector row order
+    REGY  zlib-compressed document registry {document_id: chunk count}
+
+and the file ends with an END frame. Vectors stay uncompressed so a
+float32 snapshot can be memory-mapped straight into an
+InMemoryVectorIndex; text and metadata, which dominate the size,
+compress well. Both writer and reader spool to temporary files instead
+of memory, so snapshots of any size stream in constant memory. Readers
+check frame order, codecs and every length against the header dimension
+and the namespace row counts before trusting them, and raise
+SnapshotError for anything malformed.
+"""
+from typing import Dict, List, Any, BinaryIO, Iterator, Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+import json
+import logging
+import mmap
+import shutil
+import struct
+import tempfile
+import threading
+import zlib
+import numpy as np
+from .vector_index import InMemoryVectorIndex
+
+MAGIC = b"DVSNAP\x00\x02"
+VERSION = 2
+FIELDS = struct.Struct("<4sBBQQI")
+FRAME = struct.Struct("<4sBBQQII")
+ALIGNMENT = 64
+RAW, ZLIB = 0, 1
+COPY_CHUNK = 1 << 20
+# Largest decompressed JSON frame accepted
+MAX_JSON_FRAME = 1 << 30
+
+logger = logging.getLogger(__name__)
+
+class SnapshotError(Exception):
+    """Raised for malformed or corrupted snapshots"""
+
+class SnapshotUnsupported(Exception):
+    """Raised when an index cannot be enumerated for a snapshot"""
+
+def _pack_frame(kind: bytes, codec: int, pad: int, stored_len: int, raw_len: int, crc: int) -> bytes:
+    fields = FIELDS.pack(kind, codec, pad, stored_len, raw_len, crc)
+    return fields + struct.pack("<I", zlib.crc32(fields))
+
+def _unpack_frame(data) -> Tuple[bytes, int, int, int, int, int]:
+    kind, codec, pad, stored_len, raw_len, crc, header_crc = FRAME.unpack(data)
+    if zlib.crc32(bytes(data[:FIELDS.size])) != header_crc:
+        raise SnapshotError("Checksum mismatch in frame header")
+    return kind, codec, pad, stored_len, raw_len, crc
+
+def _name(kind: bytes) -> str:
+    return kind.decode("ascii", "replace").strip()
+
+def _inflate(kind: bytes, codec: int, stored, raw_len: int) -> bytes:
+    """Decode a frame payload, never producing more than its declared raw length"""
+    if codec == RAW:
+        payload = bytes(stored)
+    else:
+        inflater = zlib.decompressobj()
+        try:
+            payload = inflater.decompress(stored, raw_len + 1)
+        except zlib.error as e:
+            raise SnapshotError(f"Corrupt {_name(kind)} frame: {e}")
+        if not inflater.eof or inflater.unconsumed_tail or inflater.unused_data:
+            raise SnapshotError(f"Length mismatch in {_name(kind)} frame")
+    if len(payload) != raw_len:
+        raise SnapshotError(f"Length mismatch in {_name(kind)} frame")
+    return payload
+
+def _json(kind: bytes, payload: bytes) -> Any:
+    try:
+        return json.loads(payload)
+    except ValueError as e:
+        raise SnapshotError(f"Invalid {_name(kind)} frame: {e}")
+
+class _Layout:
+    """Validate frames against the snapshot layout as they are read
+
+    `frame` checks a header before its payload is read, so lengths are
+    known to match the HEAD dimension and the namespace row count before
+    anything is allocated; `parse` decodes and checks JSON payloads.
+    """
+
+    # Frames allowed after each kind (None: start of file)
+    NEXT = {
+        None: {b"HEAD"},
+        b"HEAD": {b"NSPC", b"END "},
+        b"NSPC": {b"SCAL", b"VECS"},
+        b"SCAL": {b"VECS"},
+        b"VECS": {b"META", b"REGY"},
+        b"META": {b"META", b"REGY"},
+        b"REGY": {b"NSPC", b"END "},
+        b"END ": set()
+    }
+
+    def __init__(self):
+        self.header: Dict[str, Any] = {}
+        self.section: Dict[str, Any] = {}
+        self.previous: Optional[bytes] = None
+        self.meta_rows = 0
+
+    @property
+    def quantized(self) -> bool:
+        return self.header.get("quantization") == "int8"
+
+    def frame(self, kind: bytes, codec: int, pad: int, stored_len: int, raw_len: int):
+        if kind not in self.NEXT[self.previous]:
+            raise SnapshotError(f"Unexpected {_name(kind)} frame")
+        if codec not in (RAW, ZLIB) or pad >= ALIGNMENT:
+            raise SnapshotError(f"Invalid {_name(kind)} frame header")
+        if kind == b"SCAL" and not self.quantized:
+            raise SnapshotError("SCAL frame in an unquantized snapshot")
+        if kind == b"VECS" and self.quantized and self.previous != b"SCAL":
+            raise SnapshotError("Missing SCAL frame")
+        if kind in (b"VECS", b"SCAL"):
+            rows = self.section["rows"]
+            expected = rows * 4 if kind == b"SCAL" else rows * self.header["dimension"] * (1 if self.quantized else 4)
+            if codec != RAW or stored_len != expected or raw_len != expected:
+                raise SnapshotError(f"Length mismatch in {_name(kind)} frame")
+        elif raw_len > MAX_JSON_FRAME or (codec == RAW and stored_len != raw_len):
+            raise SnapshotError(f"Length mismatch in {_name(kind)} frame")
+        self.previous = kind
+
+    def parse(self, kind: bytes, payload: bytes) -> Any:
+        """Decode a HEAD, NSPC, META or REGY payload and check it"""
+        if kind == b"META":
+            try:
+                rows = [tuple(json.loads(line)) for line in payload.decode().split("\n") if line]
+            except ValueError as e:
+                raise SnapshotError(f"Invalid META frame: {e}")
+            if not all(len(row) == 2 and isinstance(row[0], str) and isinstance(row[1], dict) for row in rows):
+                raise SnapshotError("Invalid META frame: rows must be [id, metadata]")
+            self.meta_rows += len(rows)
+            if self.meta_rows > self.section["rows"]:
+                raise SnapshotError(f"More META rows than the {self.section['rows']} declared")
+            return rows
+        value = _json(kind, payload)
+        if kind == b"HEAD":
+            if not isinstance(value, dict) or value.get("version") != VERSION:
+                raise SnapshotError(f"Unsupported snapshot version {value.get('version') if isinstance(value, dict) else None}")
+            dimension = value.get("dimension")
+            if not isinstance(dimension, int) or isinstance(dimension, bool) or dimension <= 0:
+                raise SnapshotError(f"Invalid dimension {dimension!r}")
+            if value.get("quantization") not in ("none", "int8"):
+                raise SnapshotError(f"Unknown quantization {value.get('quantization')!r}")
+            self.header = value
+        elif kind == b"NSPC":
+            rows = value.get("rows") if isinstance(value, dict) else None
+            if not isinstance(value.get("namespace") if isinstance(value, dict) else None, str) \
+                    or not isinstance(rows, int) or isinstance(rows, bool) or rows < 0:
+                raise SnapshotError("Invalid NSPC frame")
+            self.section = value
+            self.meta_rows = 0
+        elif kind == b"REGY":
+            if not isinstance(value, dict):
+                raise SnapshotError("Invalid REGY frame")
+            if self.meta_rows != self.section["rows"]:
+                raise SnapshotError(
+                    f"Namespace {self.section['namespace']!r} declares {self.section['rows']} rows but has {self.meta_rows}"
+                )
+        return value
+
+class _Writer:
+    def __init__(self, out: BinaryIO):
+        self.out = out
+        self.offset = 0
+
+    def write(self, data: bytes):
+        self.out.write(data)
+        self.offset += len(data)
+
+    def frame(self, kind: bytes, payload: bytes, compress: bool = False):
+        stored = zlib.compress(payload, 6) if compress else payload
+        self.write(_pack_frame(kind, ZLIB if compress else RAW, 0, len(stored), len(payload), zlib.crc32(stored)))
+        self.write(stored)
+
+    def json_frame(self, kind: bytes, value: Any, compress: bool = False):
+        self.frame(kind, json.dumps(value, separators=(",", ":")).encode(), compress)
+
+    def region(self, kind: bytes, spool: BinaryIO, length: int, crc: int):
+        """Copy a spooled raw region behind an aligned frame header"""
+        pad = -(self.offset + FRAME.size) % ALIGNMENT
+        self.write(_pack_frame(kind, RAW, pad, length, length, crc))
+        self.write(b"\x00" * pad)
+        spool.seek(0)
+        while True:
+            chunk = spool.read(COPY_CHUNK)
+            if not chunk:
+                return
+            self.write(chunk)
+
+def _quantize(vectors: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Symmetric per-row int8 quantization"""
+    scales = np.abs(vectors).max(axis=1) / 127.0
+    scales[scales == 0] = 1.0
+    return np.round(vectors / scales[:, None]).astype(np.int8), scales.astype(np.float32)
+
+def export_snapshot(index, out: BinaryIO,
+                    namespaces: Optional[List[str]] = None,
+                    quantize: bool = False,
+                    batch_size: int = 1000) -> Dict[str, Any]:
+    """Write every namespace of an index that supports `scan` to `out`
+
+    `quantize` stores vectors as int8 with a float32 scale per row, a 4x
+    smaller vector region at a small recall cost.
+    """
+    if not hasattr(index, "scan"):
+        raise SnapshotUnsupported(f"{type(index).__name__} cannot be enumerated for a snapshot")
+
+    writer = _Writer(out)
+    writer.write(MAGIC)
+    writer.json_frame(b"HEAD", {
+        "version": VERSION,
+        "dimension": index.dimension,
+        "quantization": "int8" if quantize else "none",
+        "created_at": datetime.now(timezone.utc).isoformat()
+    })
+
+    summary = {"namespaces": 0, "vectors": 0, "documents": 0}
+    for namespace in (index.namespaces() if namespaces is None else namespaces):
+        registry: Dict[str, int] = {}
+        rows = 0
+        vector_crc = scale_crc = 0
+        with tempfile.TemporaryFile() as vector_spool, \
+                tempfile.TemporaryFile() as scale_spool, \
+                tempfile.TemporaryFile() as meta_spool:
+            meta_writer = _Writer(meta_spool)
+            for ids, vectors, metadata in index.scan(namespace, batch_size=batch_size):
+                vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+                if quantize:
+                    vectors, scales = _quantize(vectors)
+                    scale_bytes = scales.tobytes()
+                    scale_spool.write(scale_bytes)
+                    scale_crc = zlib.crc32(scale_bytes, scale_crc)
+                vector_bytes = vectors.tobytes()
+                vector_spool.write(vector_bytes)
+                vector_crc = zlib.crc32(vector_bytes, vector_crc)
+                meta_writer.frame(
+                    b"META",
+                    "\n".join(json.dumps([i, m], separators=(",", ":")) for i, m in zip(ids, metadata)).encode(),
+                    compress=True
+                )
+                for entry in metadata:
+                    document_id = entry.get("document_id")
+                    if document_id is not None:
+                        registry[document_id] = registry.get(document_id, 0) + 1
+                rows += len(ids)
+
+            writer.json_frame(b"NSPC", {"namespace": namespace, "rows": rows})
+            if quantize:
+                writer.region(b"SCAL", scale_spool, rows * 4, scale_crc)
+            itemsize = 1 if quantize else 4
+            writer.region(b"VECS", vector_spool, rows * index.dimension * itemsize, vector_crc)
+            meta_spool.seek(0)
+            shutil.copyfileobj(meta_spool, out, COPY_CHUNK)
+            writer.offset += meta_writer.offset
+            writer.json_frame(b"REGY", registry, compress=True)
+
+        summary["namespaces"] += 1
+        summary["vectors"] += rows
+        summary["documents"] += len(registry)
+    writer.frame(b"END ", b"")
+    return summary
+
+def _read_exact(stream: BinaryIO, size: int) -> bytes:
+    data = stream.read(size)
+    if len(data) != size:
+        raise SnapshotError("Truncated snapshot")
+    return data
+
+def _frames(stream: BinaryIO) -> Iterator[Tuple[bytes, Any]]:
+    """Yield (kind, payload) of validated frames
+
+    Raw regions are spooled to a temporary file; HEAD, NSPC, META and
+    REGY payloads are decoded.
+    """
+    if _read_exact(stream, len(MAGIC)) != MAGIC:
+        raise SnapshotError("Not a DocuVector snapshot of this version")
+    layout = _Layout()
+    while True:
+        kind, codec, pad, stored_len, raw_len, crc = _unpack_frame(_read_exact(stream, FRAME.size))
+        layout.frame(kind, codec, pad, stored_len, raw_len)
+        _read_exact(stream, pad)
+        if kind in (b"VECS", b"SCAL"):
+            spool = tempfile.TemporaryFile()
+            remaining, actual = stored_len, 0
+            while remaining:
+                chunk = _read_exact(stream, min(COPY_CHUNK, remaining))
+                actual = zlib.crc32(chunk, actual)
+                spool.write(chunk)
+                remaining -= len(chunk)
+            if actual != crc:
+                spool.close()
+                raise SnapshotError(f"Checksum mismatch in {_name(kind)} frame")
+            spool.flush()
+            yield kind, spool
+            continue
+        stored = _read_exact(stream, stored_len)
+        if zlib.crc32(stored) != crc:
+            raise SnapshotError(f"Checksum mismatch in {_name(kind)} frame")
+        payload = _inflate(kind, codec, stored, raw_len)
+        if kind == b"END ":
+            return
+        yield kind, layout.parse(kind, payload)
+
+def import_snapshot(stream: BinaryIO, index,
+                    batch_size: int = 100,
+                    max_workers: int = 8,
+                    namespace_map: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+    """Stream a snapshot into any index with a Pinecone-style upsert
+
+    Upserts run in parallel batches with at most `2 * max_workers` batches
+    in flight. `namespace_map` renames namespaces, e.g. to clone one
+    tenant into another.
+    """
+    summary = {"namespaces": 0, "vectors": 0, "documents": 0}
+    header: Dict[str, Any] = {}
+    in_flight = threading.BoundedSemaphore(2 * max_workers)
+    futures = []
+    section: Dict[str, Any] = {}
+    namespace, vectors, scales, position = "", None, None, 0
+
+    def upsert(records, target):
+        try:
+            index.upsert(vectors=records, namespace=target)
+        finally:
+            in_flight.release()
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        for kind, payload in _frames(stream):
+            if kind == b"HEAD":
+                header = payload
+            elif kind == b"NSPC":
+                section = payload
+                scales = None
+                namespace = (namespace_map or {}).get(section["namespace"], section["namespace"])
+                position = 0
+            elif kind == b"SCAL":
+                with payload:
+                    payload.seek(0)
+                    scales = np.frombuffer(payload.read(), dtype=np.float32)
+            elif kind == b"VECS":
+                dtype = np.int8 if header["quantization"] == "int8" else np.float32
+                shape = (section["rows"], header["dimension"])
+                with payload:
+                    # Rows are read back lazily from the spool as META frames arrive
+                    vectors = np.memmap(payload, dtype=dtype, mode="r", shape=shape) if section["rows"] else np.zeros(shape, dtype=dtype)
+            elif kind == b"META":
+                rows = payload
+                block = np.asarray(vectors[position:position + len(rows)], dtype=np.float32)
+                if scales is not None:
+                    block *= scales[position:position + len(rows), None]
+                for i in range(0, len(rows), batch_size):
+                    records = [
+                        (vector_id, block[i + j].tolist(), metadata)
+                        for j, (vector_id, metadata) in enumerate(rows[i:i + batch_size])
+                    ]
+                    in_flight.acquire()
+                    futures.append(pool.submit(upsert, records, namespace))
+                position += len(rows)
+                summary["vectors"] += len(rows)
+                # Surface failed batches early and drop finished ones
+                pending = []
+                for future in futures:
+                    if future.done():
+                        future.result()
+                    else:
+                        pending.append(future)
+                futures = pending
+            elif kind == b"REGY":
+                summary["documents"] += len(payload)
+                summary["namespaces"] += 1
+                vectors = scales = None
+        for future in futures:
+            future.result()
+    return summary
+
+def load_snapshot(path: str) -> InMemoryVectorIndex:
+    """Open a snapshot file as an InMemoryVectorIndex
+
+    Float32 vector regions are used in place through a copy-on-write
+    memory map, so loading costs only the metadata; int8 regions are
+    dequantized into memory.
+    """
+    with open(path, "rb") as handle:
+        try:
+            mapped = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_COPY)
+        except ValueError:
+            raise SnapshotError("Empty snapshot")
+    view = memoryview(mapped)
+    if bytes(view[:len(MAGIC)]) != MAGIC:
+        raise SnapshotError("Not a DocuVector snapshot of this version")
+
+    layout = _Layout()
+    offset = len(MAGIC)
+    index: Optional[InMemoryVectorIndex] = None
+    scales = vectors = None
+    ids: List[str] = []
+    metadata: List[Dict[str, Any]] = []
+    while True:
+        if offset + FRAME.size > len(view):
+            raise SnapshotError("Truncated snapshot")
+        kind, codec, pad, stored_len, raw_len, crc = _unpack_frame(view[offset:offset + FRAME.size])
+        layout.frame(kind, codec, pad, stored_len, raw_len)
+        start = offset + FRAME.size + pad
+        offset = start + stored_len
+        if offset > len(view):
+            raise SnapshotError("Truncated snapshot")
+        stored = view[start:offset]
+        if zlib.crc32(stored) != crc:
+            raise SnapshotError(f"Checksum mismatch in {_name(kind)} frame")
+        if kind in (b"VECS", b"SCAL"):
+            dtype = np.float32 if kind == b"SCAL" or not layout.quantized else np.int8
+            region = np.frombuffer(mapped, dtype=dtype, count=stored_len // np.dtype(dtype).itemsize, offset=start)
+            if kind == b"SCAL":
+                scales = region
+                continue
+            region = region.reshape(layout.section["rows"], layout.header["dimension"])
+            vectors = region.astype(np.float32) * scales[:, None] if scales is not None else region
+            continue
+        payload = _inflate(kind, codec, stored, raw_len)
+        if kind == b"END ":
+            return index
+        value = layout.parse(kind, payload)
+        if kind == b"HEAD":
+            index = InMemoryVectorIndex(dimension=value["dimension"])
+        elif kind == b"NSPC":
+            scales, ids, metadata = None, [], []
+        elif kind == b"META":
+            for vector_id, entry in value:
+                ids.append(vector_id)
+                metadata.append(entry)
+        elif kind == b"REGY":
+            index.load_segment(layout.section["namespace"], vectors, ids, metadata)
@@ -0,0 +1,271 @@
+from typing import Dict, List, Any, Iterator, Optional, Sequence, Tuple, Union
+import threading
+import numpy as np
+
+VectorRecord = Union[Tuple[str, Sequence[float], Dict[str, Any]], Dict[str, Any]]
+
+def _matches_filter(metadata: Dict[str, Any], filter: Optional[Dict[str, Any]]) -> bool:
+    """Evaluate the equality subset of Pinecone's metadata filter language
+
+    As in Pinecone, a list-valued field matches a value it contains.
+    """
+    if not filter:
+        return True
+    for key, condition in filter.items():
+        value = metadata.get(key)
+        values = value if isinstance(value, list) else [value]
+        if isinstance(condition, dict):
+            if "$eq" in condition and condition["$eq"] not in values:
+                return False
+            if "$ne" in condition and condition["$ne"] in values:
+                return False
+            if "$in" in condition and not any(v in condition["$in"] for v in values):
+                return False
+            if "$nin" in condition and any(v in condition["$nin"] for v in values):
+                return False
+        elif condition not in values:
+            return False
+    return True
+
+class _Segment:
+    """Vectors of one namespace in a dense, row-normalized matrix"""
+
+    def __init__(self, dimension: int, initial_capacity: int):
+        self.vectors = np.zeros((initial_capacity, dimension), dtype=np.float32)
+        self.ids: List[str] = []
+        self.metadata: List[Dict[str, Any]] = []
+        self.positions: Dict[str, int] = {}
+
+    def grow(self, needed: int):
+        capacity = len(self.vectors)
+        if needed <= capacity:
+            return
+        capacity = max(capacity, 1)
+        while capacity < needed:
+            capacity *= 2
+        grown = np.zeros((capacity, self.vectors.shape[1]), dtype=np.float32)
+        grown[:len(self.ids)] = self.vectors[:len(self.ids)]
+        self.vectors = grown
+
+    def remove(self, vector_id: str):
+        # Swap the last row into the freed slot to keep the matrix dense
+        position = self.positions.pop(vector_id)
+        last = len(self.ids) - 1
+        if position != last:
+            moved = self.ids[last]
+            self.ids[position] = moved
+            self.metadata[position] = self.metadata[last]
+            self.vectors[position] = self.vectors[last]
+            self.positions[moved] = position
+        self.ids.pop()
+        self.metadata.pop()
+
+class InMemoryVectorIndex:
+    """Process-local stand-in for a Pinecone index
+
+    Implements the part of the `pinecone.Index` API that DocumentProcessor
+    uses (upsert, query, fetch, update, delete, describe_index_stats) over
+    dense, row-normalized NumPy matrices, so a query is one matrix-vector
+    product. Each namespace is its own segment that starts small and
+    doubles as it fills, so many small tenants cost little and a query only
+    scans the segment of its namespace.
+    """
+
+    def __init__(self, dimension: int = 1536, initial_capacity: int = 16):
+        self.dimension = dimension
+        self.initial_capacity = initial_capacity
+        self._segments: Dict[str, _Segment] = {}
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return sum(len(segment.ids) for segment in self._segments.values())
+
+    def upsert(self, vectors: List[VectorRecord], namespace: str = "", **kwargs) -> Dict[str, int]:
+        records = []
+        for record in vectors:
+            if isinstance(record, dict):
+                records.append((record["id"], record["values"], record.get("metadata") or {}))
+            else:
+                vector_id, values, *rest = record
+                records.append((vector_id, values, rest[0] if rest else {}))
+        if not records:
+            return {"upserted_count": 0}
+
+        matrix = np.asarray([values for _, values, _ in records], dtype=np.float32)
+        if matrix.shape[1] != self.dimension:
+            raise ValueError(f"Vector dimension {matrix.shape[1]} does not match index dimension {self.dimension}")
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        matrix /= np.maximum(norms, 1e-12)
+
+        with self._lock:
+            segment = self._segments.get(namespace)
+            if segment is None:
+                segment = self._segments[namespace] = _Segment(self.dimension, self.initial_capacity)
+            segment.grow(len(segment.ids) + len(records))
+            for (vector_id, _, metadata), row in zip(records, matrix):
+                position = segment.positions.get(vector_id)
+                if position is None:
+                    position = len(segment.ids)
+                    segment.positions[vector_id] = position
+                    segment.ids.append(vector_id)
+                    segment.metadata.append(dict(metadata))
+                else:
+                    segment.metadata[position] = dict(metadata)
+                segment.vectors[position] = row
+        return {"upserted_count": len(records)}
+
+    def query(self, vector: Sequence[float], top_k: int = 10,
+              include_metadata: bool = False,
+              include_values: bool = False,
+              filter: Optional[Dict[str, Any]] = None,
+              namespace: str = "",
+              **kwargs) -> Dict[str, Any]:
+        query = np.asarray(vector, dtype=np.float32)
+        query = query / max(float(np.linalg.norm(query)), 1e-12)
+
+        with self._lock:
+            segment = self._segments.get(namespace)
+            count = len(segment.ids) if segment else 0
+            if count == 0 or top_k <= 0:
+                return {"matches": [], "namespace": namespace}
+            scores = segment.vectors[:count] @ query
+            if filter:
+                mask = np.fromiter(
+                    (_matches_filter(metadata, filter) for metadata in segment.metadata),
+                    dtype=bool, count=count
+                )
+                scores = np.where(mask, scores, -np.inf)
+
+            k = min(top_k, count)
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[np.argsort(-scores[top])]
+            matches = []
+            for position in top:
+                if not np.isfinite(scores[position]):
+                    break
+                match = {"id": segment.ids[position], "score": float(scores[position])}
+                if include_metadata:
+                    match["metadata"] = dict(segment.metadata[position])
+                if include_values:
+                    match["values"] = segment.vectors[position].tolist()
+                matches.append(match)
+        return {"matches": matches, "namespace": namespace}
+
+    def delete(self, ids: Optional[List[str]] = None,
+               filter: Optional[Dict[str, Any]] = None,
+               delete_all: bool = False,
+               namespace: str = "",
+               **kwargs) -> Dict[str, Any]:
+        with self._lock:
+            segment = self._segments.get(namespace)
+            if segment is None:
+                return {}
+            if delete_all:
+                del self._segments[namespace]
+                return {}
+            if ids is not None:
+                targets = [vector_id for vector_id in dict.fromkeys(ids) if vector_id in segment.positions]
+            elif filter:
+                targets = [
+                    vector_id for vector_id, metadata in zip(segment.ids, segment.metadata)
+                    if _matches_filter(metadata, filter)
+                ]
+            else:
+                targets = []
+            for vector_id in targets:
+                segment.remove(vector_id)
+        return {}
+
+    def update(self, id: str, values: Optional[Sequence[float]] = None,
+               set_metadata: Optional[Dict[str, Any]] = None,
+               namespace: str = "",
+               **kwargs) -> Dict[str, Any]:
+        """Replace a vector's values and/or merge keys into its metadata; unknown ids are ignored"""
+        if values is not None:
+            row = np.asarray(values, dtype=np.float32)
+            if row.shape != (self.dimension,):
+                raise ValueError(f"Vector dimension {row.shape[-1]} does not match index dimension {self.dimension}")
+            row = row / max(float(np.linalg.norm(row)), 1e-12)
+        with self._lock:
+            segment = self._segments.get(namespace)
+            position = segment.positions.get(id) if segment else None
+            if position is None:
+                return {}
+            if values is not None:
+                segment.vectors[position] = row
+            if set_metadata:
+                segment.metadata[position] = {**segment.metadata[position], **set_metadata}
+        return {}
+
+    def fetch(self, ids: List[str], namespace: str = "", **kwargs) -> Dict[str, Any]:
+        """Return stored vectors by id, as {"vectors": {id: {"id", "values", "metadata"}}}; unknown ids are left out"""
+        with self._lock:
+            segment = self._segments.get(namespace)
+            vectors = {}
+            for vector_id in ids:
+                position = segment.positions.get(vector_id) if segment else None
+                if position is not None:
+                    vectors[vector_id] = {
+                        "id": vector_id,
+                        "values": segment.vectors[position].tolist(),
+                        "metadata": dict(segment.metadata[position])
+                    }
+        return {"vectors": vectors, "namespace": namespace}
+
+    def namespaces(self) -> List[str]:
+        with self._lock:
+            return list(self._segments)
+
+    def fetch_rows(self, namespace: str, start: int,
+                   count: int) -> Tuple[List[str], np.ndarray, List[Dict[str, Any]]]:
+        """Return ids, normalized vectors and metadata of rows [start, start + count)"""
+        with self._lock:
+            segment = self._segments.get(namespace)
+            if segment is None:
+                return [], np.zeros((0, self.dimension), dtype=np.float32), []
+            end = min(start + count, len(segment.ids))
+            return (
+                segment.ids[start:end],
+                segment.vectors[start:end].copy(),
+                [dict(metadata) for metadata in segment.metadata[start:end]]
+            )
+
+    def scan(self, namespace: str = "", batch_size: int = 1000) -> Iterator[Tuple[List[str], np.ndarray, List[Dict[str, Any]]]]:
+        """Iterate a namespace in row order; concurrent deletes may move rows during a scan"""
+        start = 0
+        while True:
+            ids, vectors, metadata = self.fetch_rows(namespace, start, batch_size)
+            if not ids:
+                return
+            yield ids, vectors, metadata
+            start += len(ids)
+
+    def load_segment(self, namespace: str, vectors: np.ndarray,
+                     ids: List[str], metadata: List[Dict[str, Any]]):
+        """Install a namespace from row-normalized vectors without copying them
+
+        `vectors` may be a view over a memory-mapped snapshot; it is only
+        copied once the segment has to grow.
+        """
+        if vectors.shape != (len(ids), self.dimension):
+            raise ValueError(f"Expected {len(ids)} x {self.dimension} vectors, got {vectors.shape}")
+        segment = _Segment(self.dimension, 0)
+        segment.vectors = vectors
+        segment.ids = list(ids)
+        segment.metadata = list(metadata)
+        segment.positions = {vector_id: i for i, vector_id in enumerate(segment.ids)}
+        with self._lock:
+            self._segments[namespace] = segment
+
+    def describe_index_stats(self, **kwargs) -> Dict[str, Any]:
+        with self._lock:
+            namespaces = {
+                namespace: {"vector_count": len(segment.ids)}
+                for namespace, segment in self._segments.items()
+            }
+        return {
+            "dimension": self.dimension,
+            "namespaces": namespaces,
+            "total_vector_count": sum(n["vector_count"] for n in namespaces.values())
+        }
@@ -0,0 +1,123 @@
+from typing import List
+import os
+import random
+import zlib
+
+WORDS = (
+    "agreement party shall provide services payment invoice term notice "
+    "confidential information liability damages warranty period renewal "
+    "termination breach remedy jurisdiction governing law amendment schedule "
+    "deliverable acceptance milestone data security incident report audit "
+    "compliance policy procedure employee contractor vendor customer account "
+    "revenue forecast quarter growth margin infrastructure deployment cluster "
+    "latency throughput availability capacity region backup recovery"
+).split()
+
+def _sentence(rng: random.Random) -> str:
+    words = [rng.choice(WORDS) for _ in range(rng.randint(8, 20))]
+    return " ".join(words).capitalize() + "."
+
+def _paragraph(rng: random.Random) -> str:
+    return " ".join(_sentence(rng) for _ in range(rng.randint(3, 7)))
+
+def generate_chunks(count: int, seed: int = 0, min_chars: int = 100, max_chars: int = 1000) -> List[str]:
+    """Chunks of mixed length, up to the splitter's 1000 characters"""
+    rng = random.Random(seed)
+    chunks = []
+    for _ in range(count):
+        text = _paragraph(rng)
+        while len(text) < max_chars:
+            text += " " + _paragraph(rng)
+        chunks.append(text[:rng.randint(min_chars, max_chars)])
+    return chunks
+
+def _pdf_escape(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+def write_pdf(path: str, pages: List[List[str]]):
+    """Write a minimal text PDF with one Helvetica text object per page"""
+    page_count = len(pages)
+    font_id = 3 + 2 * page_count
+    objects = {
+        1: b"<< /Type /Catalog /Pages 2 0 R >>",
+        2: (
+            "<< /Type /Pages /Kids [" +
+            " ".join(f"{3 + 2 * i} 0 R" for i in range(page_count)) +
+            f"] /Count {page_count} >>"
+        ).encode()
+    }
+    for i, lines in enumerate(pages):
+        page_id, content_id = 3 + 2 * i, 4 + 2 * i
+        objects[page_id] = (
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            f"/Resources << /Font << /F1 {font_id} 0 R >> >> /Contents {content_id} 0 R >>"
+        ).encode()
+        text = "BT /F1 10 Tf 12 TL 50 750 Td " + " ".join(
+            f"({_pdf_escape(line)}) '" for line in lines
+        ) + " ET"
+        stream = zlib.compress(text.encode("latin-1", "replace"))
+        objects[content_id] = (
+            f"<< /Length {len(stream)} /Filter /FlateDecode >>\nstream\n".encode() +
+            stream + b"\nendstream"
+        )
+    objects[font_id] = b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"
+
+    body = bytearray(b"%PDF-1.4\n")
+    offsets = {}
+    for object_id in sorted(objects):
+        offsets[object_id] = len(body)
+        body += f"{object_id} 0 obj\n".encode() + objects[object_id] + b"\nendobj\n"
+    xref = len(body)
+    body += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    for object_id in sorted(objects):
+        body += f"{offsets[object_id]:010d} 00000 n \n".encode()
+    body += (
+        f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\n"
+        f"startxref\n{xref}\n%%EOF\n"
+    ).encode()
+    with open(path, "wb") as f:
+        f.write(body)
+
+def write_docx(path: str, paragraphs: List[str]):
+    from docx import Document
+    document = Document()
+    for paragraph in paragraphs:
+        document.add_paragraph(paragraph)
+    document.save(path)
+
+def _wrap(paragraph: str, width: int = 95) -> List[str]:
+    lines, line = [], ""
+    for word in paragraph.split():
+        if line and len(line) + len(word) + 1 > width:
+            lines.append(line)
+            line = word
+        else:
+            line = f"{line} {word}" if line else word
+    if line:
+        lines.append(line)
+    return lines
+
+def generate_corpus(directory: str, documents: int = 20,
+                    pages_per_document: int = 5,
+                    docx_ratio: float = 0.3,
+                    seed: int = 0) -> List[str]:
+    """Generate a reproducible mix of PDF and DOCX documents and return their paths"""
+    rng = random.Random(seed)
+    os.makedirs(directory, exist_ok=True)
+    paths = []
+    for i in range(documents):
+        paragraphs_per_page = 6
+        if rng.random() < docx_ratio:
+            path = os.path.join(directory, f"doc-{i:04d}.docx")
+            write_docx(path, [_paragraph(rng) for _ in range(pages_per_document * paragraphs_per_page)])
+        else:
+            path = os.path.join(directory, f"doc-{i:04d}.pdf")
+            pages = []
+            for _ in range(pages_per_document):
+                lines = []
+                for _ in range(paragraphs_per_page):
+                    lines.extend(_wrap(_paragraph(rng)))
+                pages.append(lines[:60])
+            write_pdf(path, pages)
+        paths.append(path)
+    return paths
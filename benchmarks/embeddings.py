@@ -0,0 +1,98 @@
+"""Embedding throughput benchmark in chunks per second
+
+Embeds the same synthetic chunks, sized like the ingest splitter's
+output, with each backend in ingest-sized batches. Remote backends need
+credentials and are skipped when they cannot be reached.
+
+    python -m benchmarks.embeddings                                  # local int8 vs fp32
+    python -m benchmarks.embeddings --backends local openai bedrock --concurrency 4
+"""
+from typing import Callable, Dict, List, Any
+from concurrent.futures import ThreadPoolExecutor
+import argparse
+import json
+import statistics
+import sys
+import time
+from langchain.embeddings import BedrockEmbeddings, OpenAIEmbeddings
+from langchain.schema.embeddings import Embeddings
+from app.core.aws import get_client
+from .corpus import generate_chunks
+from .fakes import FakeEmbeddings
+
+def _local(quantize: bool) -> Callable[[], Embeddings]:
+    def build() -> Embeddings:
+        # Imported on use so remote-only runs do not need torch
+        from app.llm.local_embeddings import LocalEmbeddings
+        return LocalEmbeddings(quantize=quantize)
+    return build
+
+def _bedrock() -> Embeddings:
+    return BedrockEmbeddings(client=get_client("bedrock"), model_id="amazon.titan-embed-text-v1")
+
+BACKENDS: Dict[str, Callable[[], Embeddings]] = {
+    "local": _local(quantize=True),
+    "local-fp32": _local(quantize=False),
+    "openai": OpenAIEmbeddings,
+    "bedrock": _bedrock,
+    "fake": FakeEmbeddings
+}
+
+def run_backend(embeddings: Embeddings, chunks: List[str], batch_size: int, concurrency: int) -> Dict[str, Any]:
+    batches = [chunks[i:i + batch_size] for i in range(0, len(chunks), batch_size)]
+    # Warm up connections, lazy initialisation and torch's thread pool
+    embeddings.embed_documents(batches[0])
+
+    def timed(batch: List[str]) -> float:
+        start = time.perf_counter()
+        embeddings.embed_documents(batch)
+        return time.perf_counter() - start
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        latencies = sorted(pool.map(timed, batches))
+    elapsed = time.perf_counter() - start
+    result = {
+        "chunks": len(chunks),
+        "chunks_per_second": round(len(chunks) / elapsed, 2),
+        "batch_p50_ms": round(statistics.median(latencies) * 1000, 2),
+        "batch_p99_ms": round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000, 2)
+    }
+    stats = getattr(embeddings, "stats", None)
+    if callable(stats):
+        result["padding_ratio"] = round(stats()["padding_ratio"], 3)
+    return result
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backends", nargs="+", choices=list(BACKENDS), default=["local", "local-fp32"])
+    parser.add_argument("--chunks", type=int, default=1000)
+    parser.add_argument("--batch-size", type=int, default=100, help="texts per embed_documents call, as INGEST_EMBED_BATCH_SIZE")
+    parser.add_argument("--concurrency", type=int, default=1, help="batches in flight, as concurrent ingests")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write results as JSON to this path")
+    args = parser.parse_args(argv)
+
+    chunks = generate_chunks(args.chunks, seed=args.seed)
+    results: Dict[str, Dict[str, Any]] = {}
+    for backend in args.backends:
+        try:
+            results[backend] = run_backend(BACKENDS[backend](), chunks, args.batch_size, args.concurrency)
+        except Exception as e:
+            print(f"Skipping {backend}: {type(e).__name__}: {e}")
+
+    print(f"{'backend':<12}{'chunks/s':>12}{'p50 ms':>12}{'p99 ms':>12}{'padding':>10}")
+    for backend, result in results.items():
+        padding = f"{result['padding_ratio']:.1%}" if "padding_ratio" in result else "-"
+        print(
+            f"{backend:<12}{result['chunks_per_second']:>12.2f}"
+            f"{result['batch_p50_ms']:>12.2f}{result['batch_p99_ms']:>12.2f}{padding:>10}"
+        )
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"config": vars(args), "results": results}, f, indent=2)
+    return 0 if results else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,60 @@
+from typing import Any, List, Optional
+import hashlib
+import threading
+import time
+import numpy as np
+from langchain.schema.embeddings import Embeddings
+from langchain.llms.base import LLM
+
+class FakeEmbeddings(Embeddings):
+    """Deterministic embeddings with a simulated provider round trip
+
+    Each text maps to a unit vector seeded from its SHA-256, so identical
+    texts always embed identically and runs are reproducible. Every call
+    sleeps `latency_ms` plus `per_text_ms` for each input, which models a
+    remote API where batching amortizes the fixed cost.
+    """
+
+    def __init__(self, dimension: int = 1536,
+                 latency_ms: float = 50.0,
+                 per_text_ms: float = 0.5):
+        self.dimension = dimension
+        self.latency_ms = latency_ms
+        self.per_text_ms = per_text_ms
+        self.calls = 0
+        self.texts = 0
+        self._lock = threading.Lock()
+
+    def _vector(self, text: str) -> List[float]:
+        seed = int.from_bytes(hashlib.sha256(text.encode()).digest()[:8], "little")
+        vector = np.random.default_rng(seed).standard_normal(self.dimension)
+        return (vector / np.linalg.norm(vector)).tolist()
+
+    def _wait(self, count: int):
+        with self._lock:
+            self.calls += 1
+            self.texts += count
+        time.sleep((self.latency_ms + self.per_text_ms * count) / 1000)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        self._wait(len(texts))
+        return [self._vector(text) for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        self._wait(1)
+        return self._vector(text)
+
+class FakeLLM(LLM):
+    """LLM that echoes a canned answer after a latency proportional to its length"""
+
+    response: str = "This is a synthetic answer used for benchmarking."
+    latency_ms: float = 200.0
+    per_token_ms: float = 0.05
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake"
+
+    def _call(self, prompt: str, stop: Optional[List[str]] = None, **kwargs: Any) -> str:
+        time.sleep((self.latency_ms + self.per_token_ms * len(prompt) / 4) / 1000)
+        return self.response
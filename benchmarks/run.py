@@ -0,0 +1,125 @@
+"""Offline ingestion and search benchmarks
+
+Runs DocumentProcessor against deterministic fake embeddings and an
+in-memory vector index, so results depend only on our own code. Each
+scenario runs in a fresh process, which keeps peak RSS per scenario.
+
+    python -m benchmarks.run                      # run and compare with the baseline
+    python -m benchmarks.run --save-baseline      # record a new baseline
+    python -m benchmarks.run --scenarios search_qps --concurrency 32
+    python -m benchmarks.run --scenarios search_qps --shards 4   # sharded index
+"""
+from typing import Dict, List, Any
+from concurrent.futures import ProcessPoolExecutor
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import sys
+from .scenarios import SCENARIOS, run_scenario
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+
+# Direction in which each metric improves
+METRICS = {
+    "throughput": 1,
+    "p50_ms": -1,
+    "p99_ms": -1,
+    "peak_rss_mb": -1
+}
+
+def compare(results: Dict[str, Dict[str, Any]],
+            baseline: Dict[str, Dict[str, Any]],
+            threshold: float) -> List[str]:
+    """Return a line for every metric that is worse than the baseline by more than `threshold`"""
+    regressions = []
+    for scenario, current in results.items():
+        previous = baseline.get(scenario)
+        if not previous:
+            continue
+        for metric, direction in METRICS.items():
+            old, new = previous.get(metric), current.get(metric)
+            if not old or new is None:
+                continue
+            change = (new - old) / old
+            if change * direction < -threshold:
+                regressions.append(f"{scenario}.{metric}: {old} -> {new} ({change:+.1%})")
+    return regressions
+
+def _print_table(results: Dict[str, Dict[str, Any]]):
+    print(f"{'scenario':<15}{'ops':>8}{'ops/s':>12}{'p50 ms':>12}{'p99 ms':>12}{'peak MB':>10}")
+    for scenario, result in results.items():
+        print(
+            f"{scenario:<15}{result['operations']:>8}{result['throughput']:>12.2f}"
+            f"{result['p50_ms']:>12.2f}{result['p99_ms']:>12.2f}{result['peak_rss_mb']:>10.1f}"
+        )
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenarios", nargs="+", choices=list(SCENARIOS), default=list(SCENARIOS))
+    parser.add_argument("--documents", type=int, default=20)
+    parser.add_argument("--pages", type=int, default=5)
+    parser.add_argument("--uploads", type=int, default=5, help="documents in single_upload")
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--embed-latency-ms", type=float, default=50.0)
+    parser.add_argument("--embed-per-text-ms", type=float, default=0.5)
+    parser.add_argument("--shards", type=int, default=0, help="use a sharded index with this many processes")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--threshold", type=float, default=0.10, help="allowed relative regression")
+    parser.add_argument("--output", help="write results as JSON to this path")
+    args = parser.parse_args(argv)
+
+    config = {
+        "documents": args.documents,
+        "pages": args.pages,
+        "uploads": args.uploads,
+        "queries": args.queries,
+        "concurrency": args.concurrency,
+        "embed_latency_ms": args.embed_latency_ms,
+        "embed_per_text_ms": args.embed_per_text_ms,
+        "shards": args.shards,
+        "seed": args.seed
+    }
+
+    results: Dict[str, Dict[str, Any]] = {}
+    context = multiprocessing.get_context("spawn")
+    for scenario in args.scenarios:
+        with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+            results[scenario] = pool.submit(run_scenario, scenario, config).result()
+    _print_table(results)
+
+    report = {
+        "config": config,
+        "environment": {"python": platform.python_version(), "machine": platform.machine(), "cpus": os.cpu_count()},
+        "results": results
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Saved baseline to {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}; run with --save-baseline to record one")
+        return 0
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    if baseline.get("config") != config:
+        print("Warning: baseline was recorded with a different configuration")
+    regressions = compare(results, baseline.get("results", {}), args.threshold)
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    if not regressions:
+        print(f"No regressions beyond {args.threshold:.0%} against {args.baseline}")
+    return 1 if regressions else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,143 @@
+from typing import Dict, List, Any, Callable
+from concurrent.futures import ThreadPoolExecutor
+import random
+import resource
+import sys
+import tempfile
+import time
+import numpy as np
+from app.processing.document_processor import DocumentProcessor
+from app.processing.sharded_index import ShardedVectorIndex
+from app.processing.vector_index import InMemoryVectorIndex
+from .corpus import WORDS, generate_corpus
+from .fakes import FakeEmbeddings
+
+def peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is bytes on macOS and kilobytes on Linux
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+def _summary(latencies: List[float], duration: float, operations: int, **extra: Any) -> Dict[str, Any]:
+    latencies_ms = np.asarray(latencies) * 1000 if latencies else np.zeros(1)
+    return {
+        "operations": operations,
+        "duration_s": round(duration, 3),
+        "throughput": round(operations / duration, 3) if duration > 0 else 0.0,
+        "p50_ms": round(float(np.percentile(latencies_ms, 50)), 3),
+        "p99_ms": round(float(np.percentile(latencies_ms, 99)), 3),
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+        **extra
+    }
+
+def _timed(fn: Callable, *args) -> float:
+    start = time.perf_counter()
+    fn(*args)
+    return time.perf_counter() - start
+
+def _processor(config: Dict[str, Any]) -> DocumentProcessor:
+    embeddings = FakeEmbeddings(
+        latency_ms=config["embed_latency_ms"],
+        per_text_ms=config["embed_per_text_ms"]
+    )
+    if config.get("shards"):
+        index = ShardedVectorIndex(num_shards=config["shards"], dimension=embeddings.dimension)
+    else:
+        index = InMemoryVectorIndex(dimension=embeddings.dimension)
+    return DocumentProcessor(embeddings=embeddings, index=index)
+
+def _queries(count: int, seed: int) -> List[str]:
+    rng = random.Random(seed)
+    return [" ".join(rng.choice(WORDS) for _ in range(rng.randint(3, 8))) for _ in range(count)]
+
+def single_upload(config: Dict[str, Any], paths: List[str]) -> Dict[str, Any]:
+    """Sequential uploads; latency of one document end to end"""
+    processor = _processor(config)
+    uploads = paths[:config["uploads"]]
+    start = time.perf_counter()
+    latencies = [_timed(processor.ingest_document, path) for path in uploads]
+    return _summary(latencies, time.perf_counter() - start, len(uploads))
+
+def bulk_ingest(config: Dict[str, Any], paths: List[str]) -> Dict[str, Any]:
+    """Concurrent ingestion of the whole corpus; throughput is chunks per second"""
+    processor = _processor(config)
+    chunks: List[int] = []
+    latencies: List[float] = []
+
+    def ingest(path: str):
+        start = time.perf_counter()
+        chunks.append(processor.ingest_document(path)["chunks"])
+        latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=config["concurrency"]) as pool:
+        list(pool.map(ingest, paths))
+    duration = time.perf_counter() - start
+    summary = _summary(latencies, duration, sum(chunks), documents=len(paths))
+    summary["documents_per_s"] = round(len(paths) / duration, 3)
+    return summary
+
+def search_qps(config: Dict[str, Any], paths: List[str]) -> Dict[str, Any]:
+    """Concurrent searches against a pre-loaded index"""
+    processor = _processor(config)
+    for path in paths:
+        processor.ingest_document(path)
+    queries = _queries(config["queries"], config["seed"])
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=config["concurrency"]) as pool:
+        latencies = list(pool.map(
+            lambda query: _timed(processor.search_documents, query, 5), queries
+        ))
+    return _summary(
+        latencies, time.perf_counter() - start, len(queries),
+        index_size=len(processor.index),
+        batching=processor.batching_stats()
+    )
+
+def mixed(config: Dict[str, Any], paths: List[str]) -> Dict[str, Any]:
+    """Uploads and searches interleaved on one pool; latency is reported per operation type"""
+    processor = _processor(config)
+    queries = _queries(config["queries"], config["seed"])
+    rng = random.Random(config["seed"])
+    operations = [("upload", path) for path in paths] + [("search", query) for query in queries]
+    rng.shuffle(operations)
+    latencies: Dict[str, List[float]] = {"upload": [], "search": []}
+
+    def run(operation):
+        kind, argument = operation
+        if kind == "upload":
+            elapsed = _timed(processor.ingest_document, argument)
+        else:
+            elapsed = _timed(processor.search_documents, argument, 5)
+        latencies[kind].append(elapsed)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=config["concurrency"]) as pool:
+        list(pool.map(run, operations))
+    duration = time.perf_counter() - start
+    search = _summary(latencies["search"], duration, len(queries))
+    upload = _summary(latencies["upload"], duration, len(paths))
+    return {
+        **search,
+        "upload_throughput": upload["throughput"],
+        "upload_p50_ms": upload["p50_ms"],
+        "upload_p99_ms": upload["p99_ms"]
+    }
+
+SCENARIOS: Dict[str, Callable[[Dict[str, Any], List[str]], Dict[str, Any]]] = {
+    "single_upload": single_upload,
+    "bulk_ingest": bulk_ingest,
+    "search_qps": search_qps,
+    "mixed": mixed
+}
+
+def run_scenario(name: str, config: Dict[str, Any]) -> Dict[str, Any]:
+    """Generate the corpus and run one scenario; meant to run in a fresh process"""
+    with tempfile.TemporaryDirectory(prefix="docuvector-bench-") as directory:
+        paths = generate_corpus(
+            directory,
+            documents=config["documents"],
+            pages_per_document=config["pages"],
+            seed=config["seed"]
+        )
+        return SCENARIOS[name](config, paths)
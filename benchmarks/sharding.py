@@ -0,0 +1,90 @@
+"""Query throughput of the sharded vector index by shard count
+
+Loads the same random vectors into an InMemoryVectorIndex and into
+ShardedVectorIndex with each shard count, then runs the same queries
+against each with concurrent callers. Speedup is relative to the
+unsharded index, so it shows how far scaling is from linear on this
+machine; it cannot exceed the number of available cores.
+
+    python -m benchmarks.sharding                          # 1, 2 and 4 shards
+    python -m benchmarks.sharding --shards 1 2 4 8 --vectors 200000
+"""
+from typing import Any, Dict, List
+from concurrent.futures import ThreadPoolExecutor
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+import numpy as np
+from app.processing.sharded_index import ShardedVectorIndex
+from app.processing.vector_index import InMemoryVectorIndex
+
+def run_index(index: Any, vectors: np.ndarray, queries: np.ndarray,
+              top_k: int, concurrency: int) -> Dict[str, Any]:
+    for start in range(0, len(vectors), 1000):
+        index.upsert([
+            (f"v{i}", vectors[i], {"document_id": f"d{i % 100}", "text": "x" * 800})
+            for i in range(start, min(start + 1000, len(vectors)))
+        ])
+
+    def timed(query: np.ndarray) -> float:
+        start = time.perf_counter()
+        index.query(query.tolist(), top_k=top_k, include_metadata=True)
+        return time.perf_counter() - start
+
+    timed(queries[0])
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        latencies = sorted(pool.map(timed, queries))
+    elapsed = time.perf_counter() - start
+    return {
+        "queries_per_second": round(len(queries) / elapsed, 2),
+        "p50_ms": round(statistics.median(latencies) * 1000, 2),
+        "p99_ms": round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000, 2)
+    }
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--shards", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--vectors", type=int, default=50000)
+    parser.add_argument("--dimension", type=int, default=1536)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write results as JSON to this path")
+    args = parser.parse_args(argv)
+
+    rng = np.random.default_rng(args.seed)
+    vectors = rng.normal(size=(args.vectors, args.dimension)).astype(np.float32)
+    queries = rng.normal(size=(args.queries, args.dimension)).astype(np.float32)
+
+    results: Dict[str, Dict[str, Any]] = {
+        "memory": run_index(InMemoryVectorIndex(dimension=args.dimension), vectors, queries, args.top_k, args.concurrency)
+    }
+    for shards in args.shards:
+        index = ShardedVectorIndex(num_shards=shards, dimension=args.dimension, query_timeout=60)
+        try:
+            results[f"sharded-{shards}"] = run_index(index, vectors, queries, args.top_k, args.concurrency)
+        finally:
+            index.close()
+
+    baseline = results["memory"]["queries_per_second"]
+    print(f"cores available: {len(os.sched_getaffinity(0)) if hasattr(os, 'sched_getaffinity') else os.cpu_count()}")
+    print(f"{'index':<12}{'queries/s':>12}{'speedup':>10}{'p50 ms':>10}{'p99 ms':>10}")
+    for name, result in results.items():
+        result["speedup"] = round(result["queries_per_second"] / baseline, 2)
+        print(
+            f"{name:<12}{result['queries_per_second']:>12.2f}{result['speedup']:>10.2f}"
+            f"{result['p50_ms']:>10.2f}{result['p99_ms']:>10.2f}"
+        )
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"config": vars(args), "results": results}, f, indent=2)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
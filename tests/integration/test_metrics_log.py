@@ -0,0 +1,56 @@
+from datetime import datetime, timedelta, timezone
+import boto3
+import pytest
+from moto import mock_aws
+from app.ml.metrics_log import MetricsLog
+
+BUCKET = "metrics-test"
+
+@pytest.fixture
+def s3():
+    with mock_aws():
+        client = boto3.client("s3", region_name="us-east-1")
+        client.create_bucket(Bucket=BUCKET)
+        yield client
+
+def test_records_round_trip_through_segments(s3):
+    log = MetricsLog(s3, BUCKET, flush_size=10)
+    for i in range(25):
+        log.append("ranker", "1", {"accuracy": i / 100})
+    log.append("ranker", "1", {"latency_ms": 12.5})
+    log.close()
+
+    records = log.records("ranker", "1")
+    assert len(records) == 26
+    assert [r["accuracy"] for r in records[:25]] == [i / 100 for i in range(25)]
+    assert "accuracy" not in records[-1] and records[-1]["latency_ms"] == 12.5
+    assert log.records("ranker", "2") == []
+
+def test_compaction_keeps_every_record_once(s3):
+    log = MetricsLog(s3, BUCKET, flush_size=5)
+    for i in range(40):
+        log.append("ranker", "1", {"accuracy": float(i)})
+    log.close()
+
+    result = log.compact("ranker", "1", min_segments=4)
+    assert result["compacted"] == 8 and result["records"] == 40
+    keys = [obj["Key"] for obj in s3.list_objects_v2(Bucket=BUCKET)["Contents"]]
+    assert len(keys) == 1 and keys[0].endswith(".parquet")
+    assert sorted(r["accuracy"] for r in log.records("ranker", "1")) == [float(i) for i in range(40)]
+
+def test_time_range_reads(s3):
+    log = MetricsLog(s3, BUCKET)
+    log.append("ranker", "1", {"accuracy": 0.9})
+    log.close()
+    now = datetime.now(timezone.utc)
+    assert len(log.read("ranker", "1", start=now - timedelta(minutes=5))) == 1
+    assert len(log.read("ranker", "1", start=now + timedelta(minutes=5))) == 0
+
+def test_failed_writes_are_retried_on_next_flush(s3):
+    log = MetricsLog(s3, "missing-bucket")
+    log.append("ranker", "1", {"accuracy": 0.5})
+    with pytest.raises(Exception):
+        log.flush()
+    log.bucket = BUCKET
+    log.close()
+    assert len(log.records("ranker", "1")) == 1
@@ -0,0 +1,67 @@
+import time
+import numpy as np
+import pytest
+from app.processing.sharded_index import ShardedVectorIndex
+from app.processing.vector_index import InMemoryVectorIndex
+
+DIMENSION = 16
+
+@pytest.fixture(scope="module")
+def vectors():
+    rng = np.random.default_rng(0)
+    return rng.normal(size=(200, DIMENSION)).astype(np.float32)
+
+@pytest.fixture
+def index():
+    index = ShardedVectorIndex(num_shards=3, dimension=DIMENSION, query_timeout=30, write_timeout=30)
+    yield index
+    index.close()
+
+def load(index, vectors):
+    index.upsert([
+        (f"v{i}", vector, {"document_id": f"d{i % 10}"}) for i, vector in enumerate(vectors)
+    ])
+
+def test_queries_match_the_unsharded_index(index, vectors):
+    reference = InMemoryVectorIndex(dimension=DIMENSION)
+    load(reference, vectors)
+    load(index, vectors)
+    assert index.describe_index_stats()["total_vector_count"] == len(vectors)
+    for query in vectors[:10] + 0.1:
+        expected = reference.query(query.tolist(), top_k=5, include_metadata=True)
+        actual = index.query(query.tolist(), top_k=5, include_metadata=True)
+        assert [m["id"] for m in actual["matches"]] == [m["id"] for m in expected["matches"]]
+        assert [m["metadata"] for m in actual["matches"]] == [m["metadata"] for m in expected["matches"]]
+        assert "partial" not in actual
+
+def test_filters_and_deletes_apply_across_shards(index, vectors):
+    load(index, vectors)
+    response = index.query(vectors[0].tolist(), top_k=50, filter={"document_id": "d3"}, include_metadata=True)
+    assert len(response["matches"]) == 20
+    assert {m["metadata"]["document_id"] for m in response["matches"]} == {"d3"}
+    index.delete(filter={"document_id": "d3"})
+    assert index.query(vectors[3].tolist(), top_k=5, filter={"document_id": "d3"})["matches"] == []
+    assert index.describe_index_stats()["total_vector_count"] == len(vectors) - 20
+
+def test_dead_shard_is_restarted_and_reported_until_recovered(index, vectors):
+    load(index, vectors)
+    index._shards[1].process.kill()
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        shard = index._shards[1]
+        if shard is not None and shard.process.is_alive() and index.restarts:
+            break
+        time.sleep(0.05)
+    else:
+        pytest.fail("shard was not restarted")
+
+    response = index.query(vectors[0].tolist(), top_k=5)
+    assert response["partial"] and response["lost_shards"] == [1]
+    lost = index.lost_shards()
+    index.upsert([
+        (f"v{i}", vector, {"document_id": f"d{i % 10}"})
+        for i, vector in enumerate(vectors) if index.shard_for(f"v{i}") == 1
+    ])
+    index.mark_recovered(lost)
+    assert index.describe_index_stats()["total_vector_count"] == len(vectors)
+    assert "partial" not in index.query(vectors[0].tolist(), top_k=5)
@@ -0,0 +1,90 @@
+import pytest
+from app.core.cloudwatch_metrics import InMemorySink, MetricsEmitter
+
+class FlakySink(InMemorySink):
+    def __init__(self, failures):
+        super().__init__()
+        self.failures = failures
+
+    def put(self, namespace, metric_data):
+        if self.failures:
+            self.failures -= 1
+            raise RuntimeError("Throttling: Rate exceeded")
+        super().put(namespace, metric_data)
+
+def test_aggregates_statistic_sets():
+    sink = InMemorySink()
+    emitter = MetricsEmitter(namespace="Test", sink=sink)
+    for value in (3, 1, 2):
+        emitter.put("Latency", value, "Milliseconds", {"Endpoint": "/query"})
+    emitter.increment("Requests")
+    emitter.flush()
+    datums = {datum["MetricName"]: datum for datum in sink.datums()}
+    assert datums["Latency"]["StatisticValues"] == {"SampleCount": 3, "Sum": 6, "Minimum": 1, "Maximum": 3}
+    assert datums["Latency"]["Dimensions"] == [{"Name": "Endpoint", "Value": "/query"}]
+    assert datums["Requests"]["Unit"] == "Count"
+    assert sink.batches[0][0] == "Test"
+
+def test_flush_batches_and_clears():
+    sink = InMemorySink()
+    emitter = MetricsEmitter(sink=sink, max_batch_size=2)
+    for name in "abcde":
+        emitter.put(name, 1)
+    emitter.flush()
+    emitter.flush()
+    assert [len(batch) for _, batch in sink.batches] == [2, 2, 1]
+
+def test_drops_new_series_beyond_max_series():
+    sink = InMemorySink()
+    emitter = MetricsEmitter(sink=sink, max_series=2)
+    for name in "abc":
+        emitter.put(name, 1)
+    emitter.put("a", 1)
+    emitter.flush()
+    assert sorted(datum["MetricName"] for datum in sink.datums()) == ["a", "b"]
+    assert emitter.stats()["dropped_series"] == 1
+
+def test_failed_batches_are_resent():
+    sink = FlakySink(failures=1)
+    emitter = MetricsEmitter(sink=sink)
+    emitter.put("a", 1)
+    emitter.flush()
+    assert sink.datums() == []
+    assert emitter.stats()["retry_datums"] == 1
+    emitter.put("b", 2)
+    emitter.flush()
+    assert sorted(datum["MetricName"] for datum in sink.datums()) == ["a", "b"]
+    assert emitter.stats()["failed_batches"] == 1
+    assert emitter.stats()["dropped_datapoints"] == 0
+
+def test_gives_up_after_max_attempts():
+    sink = FlakySink(failures=10)
+    emitter = MetricsEmitter(sink=sink, max_attempts=2)
+    emitter.put("a", 1)
+    emitter.put("a", 1)
+    emitter.flush()
+    emitter.flush()
+    stats = emitter.stats()
+    assert stats["retry_datums"] == 0
+    assert stats["dropped_datapoints"] == 2
+
+def test_retry_queue_is_bounded():
+    sink = FlakySink(failures=10)
+    emitter = MetricsEmitter(sink=sink, max_series=3)
+    for name in "abc":
+        emitter.put(name, 1)
+    emitter.flush()
+    for name in "de":
+        emitter.put(name, 1)
+    emitter.flush()
+    stats = emitter.stats()
+    assert stats["retry_datums"] == 3
+    assert stats["dropped_datapoints"] == 2
+
+def test_close_flushes():
+    sink = InMemorySink()
+    emitter = MetricsEmitter(sink=sink, flush_interval=60)
+    emitter.start()
+    emitter.put("a", 1)
+    emitter.close()
+    assert [datum["MetricName"] for datum in sink.datums()] == ["a"]
@@ -0,0 +1,31 @@
+from app.governance.content_scanner import DEFAULT_LEXICONS, ContentScanner
+
+def scan(text):
+    return ContentScanner(DEFAULT_LEXICONS).scan(text)
+
+def test_overlapping_hits_of_different_types_are_all_reported():
+    matches = scan("They said they are naturally inferior race.")
+    assert {m.filter_type for m in matches} == {"discrimination", "hate_speech"}
+
+def test_lexicon_hits_are_whole_words_and_case_insensitive():
+    assert [m.filter_type for m in scan("A MIRACLE CURE for all")] == ["misinformation"]
+    assert scan("skill and skilled workers") == []
+
+def test_pii_confirmation():
+    matches = {m.label: m for m in scan(
+        "ssn 123-45-6789, card 4111 1111 1111 1111, mail a.b@example.com, version 1.2.3.4"
+    )}
+    assert matches["ssn"].confirmed
+    assert matches["credit_card"].confirmed
+    assert not matches["email"].confirmed
+    assert not matches["ipv4"].confirmed
+
+def test_invalid_card_numbers_are_ignored():
+    assert [m.label for m in scan("order 1234 5678 9012 3456")] == []
+
+def test_windows_merge_nearby_matches():
+    scanner = ContentScanner(DEFAULT_LEXICONS, context_chars=10)
+    text = "kill " + "x" * 5 + " murder" + " " * 50 + "bomb"
+    windows = scanner.windows(text, scanner.scan(text))
+    assert [len(matches) for _, _, matches in windows] == [2, 1]
+    assert windows[0][0] == 0 and windows[-1][1] == len(text)
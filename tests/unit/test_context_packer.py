@@ -0,0 +1,56 @@
+import re
+import pytest
+from app.llm import context_packer
+from app.llm.context_packer import ContextPacker
+
+class WordEncoding:
+    """Offline stand-in for a tiktoken encoding: one token per word or symbol"""
+
+    def encode(self, text, disallowed_special=()):
+        return re.findall(r"\w+|[^\w\s]|\s+", text)
+
+@pytest.fixture
+def packer(monkeypatch):
+    monkeypatch.setattr(context_packer.tiktoken, "encoding_for_model", lambda model: WordEncoding())
+    return ContextPacker(token_budget=1000, min_overlap=10)
+
+def result(text, score, source="a.pdf", page=1):
+    return {"text": text, "score": score, "metadata": {"source": source, "page": page}}
+
+def test_merges_overlapping_chunks(packer):
+    head = "Alpha beta gamma delta epsilon zeta eta theta iota kappa lambda mu."
+    tail = "iota kappa lambda mu. Nu xi omicron pi rho sigma tau upsilon."
+    packed = packer.pack([result(head, 0.9), result(tail, 0.8)])
+    assert packed.merged == 1
+    assert packed.text == head + " Nu xi omicron pi rho sigma tau upsilon."
+    assert packed.chunks[0]["score"] == 0.9
+
+def test_does_not_merge_across_pages(packer):
+    head = "Alpha beta gamma delta epsilon zeta eta theta iota kappa lambda mu."
+    tail = "iota kappa lambda mu. Nu xi omicron pi rho sigma tau upsilon."
+    packed = packer.pack([result(head, 0.9, page=1), result(tail, 0.8, page=2)])
+    assert packed.merged == 0
+    assert len(packed.chunks) == 2
+
+def test_drops_near_duplicates_keeping_the_best(packer):
+    text = " ".join(f"word{i}" for i in range(100))
+    packed = packer.pack([
+        result(text, 0.5, source="a.pdf"),
+        result(text + " extra", 0.9, source="b.pdf")
+    ])
+    assert packed.duplicates_dropped == 1
+    assert [chunk["metadata"]["source"] for chunk in packed.chunks] == ["b.pdf"]
+
+def test_packs_by_relevance_within_budget(packer):
+    chunks = [result(" ".join(f"c{n}w{i}" for i in range(40)), score, source=f"{n}.pdf")
+              for n, score in enumerate([0.2, 0.9, 0.5])]
+    packed = packer.pack(chunks, token_budget=170)
+    assert [chunk["score"] for chunk in packed.chunks] == [0.9, 0.5]
+    assert packed.over_budget_dropped == 1
+    assert packed.tokens_used <= 170
+    assert packed.tokens_used == packer.count_tokens(packed.text)
+    assert packed.tokens_saved == packed.tokens_before - packed.tokens_used
+
+def test_empty_results(packer):
+    packed = packer.pack([])
+    assert packed.text == "" and packed.tokens_used == 0 and packed.chunks == []
@@ -0,0 +1,96 @@
+import numpy as np
+import pytest
+from app.processing.dedup import MinHasher, NearDuplicateIndex, lsh_params
+
+TEXT = (
+    "The quarterly report covers revenue growth across all regions, with the strongest "
+    "results in the northern markets and steady performance in the remaining territories "
+    "despite higher logistics costs and currency headwinds during the period."
+)
+NEAR_DUPLICATE = TEXT.replace("steady", "stable")
+UNRELATED = (
+    "Install the agent on every host, then register it with the control plane using the "
+    "token from the settings page and restart the service to pick up the configuration."
+)
+
+def test_lsh_params_factor_num_perm():
+    bands, rows = lsh_params(128, 0.9)
+    assert bands * rows == 128
+    assert abs((1 / bands) ** (1 / rows) - 0.9) < 0.1
+
+def test_signature_estimates_jaccard():
+    hasher = MinHasher(num_perm=256)
+    same = np.mean(hasher.signature(TEXT) == hasher.signature(TEXT))
+    near = np.mean(hasher.signature(TEXT) == hasher.signature(NEAR_DUPLICATE))
+    far = np.mean(hasher.signature(TEXT) == hasher.signature(UNRELATED))
+    assert same == 1.0
+    assert 0.6 < near < 1.0
+    assert far < 0.1
+
+def test_short_texts_have_one_shingle():
+    assert MinHasher(shingle_size=5).shingles("Two words") == {b"two words"}
+
+def test_exact_duplicates_match_once_confirmed():
+    index = NearDuplicateIndex(threshold=0.9)
+    assert index.find_or_add("", "doc1", "doc1#0", TEXT) is None
+    # Pending entries only match chunks of their own document
+    assert index.find_or_add("", "doc2", "doc2#0", TEXT) is None
+    index.forget("", "doc2")
+    index.confirm("", ["doc1#0"])
+    match = index.find_or_add("", "doc3", "doc3#0", TEXT)
+    assert match.vector_id == "doc1#0" and match.document_id == "doc1"
+    assert match.similarity == 1.0
+    stats = index.stats()
+    assert stats["duplicates"] == 1 and stats["stored_chunks"] == 1
+
+def test_same_document_matches_while_pending():
+    index = NearDuplicateIndex()
+    index.find_or_add("", "doc1", "doc1#0", TEXT)
+    assert index.find_or_add("", "doc1", "doc1#1", TEXT).vector_id == "doc1#0"
+
+def test_threshold_and_namespaces():
+    index = NearDuplicateIndex(threshold=0.95)
+    index.find_or_add("a", "doc1", "doc1#0", TEXT)
+    index.confirm("a", ["doc1#0"])
+    assert index.find_or_add("a", "doc2", "doc2#0", UNRELATED) is None
+    assert index.find_or_add("b", "doc3", "doc3#0", TEXT) is None
+
+def test_forget_hands_vectors_over():
+    index = NearDuplicateIndex()
+    index.find_or_add("", "doc1", "doc1#0", TEXT)
+    index.find_or_add("", "doc1", "doc1#1", UNRELATED)
+    index.confirm("", ["doc1#0", "doc1#1"])
+    index.forget("", "doc1", handed_over={"doc1#0": "doc2"})
+    match = index.find_or_add("", "doc3", "doc3#0", TEXT)
+    assert match.document_id == "doc2"
+    assert index.find_or_add("", "doc3", "doc3#1", UNRELATED) is None
+
+def test_forget_vectors():
+    index = NearDuplicateIndex()
+    index.find_or_add("", "doc1", "doc1#0", TEXT)
+    index.confirm("", ["doc1#0"])
+    index.forget_vectors("", ["doc1#0"])
+    assert index.find_or_add("", "doc2", "doc2#0", TEXT) is None
+
+def test_evicts_least_recently_used():
+    index = NearDuplicateIndex(max_entries=2)
+    texts = [f"{TEXT} variant number {i} " + "filler words " * i for i in range(3)]
+    for i, text in enumerate(texts[:2]):
+        index.find_or_add("", "doc1", f"doc1#{i}", text)
+    index.confirm("", ["doc1#0", "doc1#1"])
+    # Matching doc1#0 makes doc1#1 the least recently used
+    assert index.find_or_add("", "doc2", "doc2#0", texts[0]) is not None
+    index.find_or_add("", "doc2", "doc2#1", texts[2])
+    assert index.stats()["evictions"] == 1
+    assert index.find_or_add("", "doc3", "doc3#0", texts[1]) is None
+
+@pytest.mark.parametrize("threshold", [0.8, 0.9])
+def test_near_duplicates_match(threshold):
+    words = [f"word{i}" for i in range(400)]
+    edited = list(words)
+    edited[200] = "changed"
+    index = NearDuplicateIndex(threshold=threshold)
+    index.find_or_add("", "doc1", "doc1#0", " ".join(words))
+    index.confirm("", ["doc1#0"])
+    match = index.find_or_add("", "doc2", "doc2#0", " ".join(edited))
+    assert match is not None and threshold <= match.similarity < 1.0
@@ -0,0 +1,56 @@
+import threading
+import pytest
+from app.core.micro_batch import MicroBatcher
+from app.core.rate_limit import Priority, current_priority, priority_scope
+
+def test_results_map_back_to_callers():
+    batcher = MicroBatcher(lambda items: [item * 2 for item in items], max_batch_size=8)
+    futures = [batcher.submit(i) for i in range(20)]
+    assert [future.result(timeout=5) for future in futures] == [i * 2 for i in range(20)]
+    stats = batcher.stats()
+    assert stats["items"] == 20
+    assert 1 <= stats["batches"] <= 20
+
+def test_concurrent_calls_are_batched():
+    sizes = []
+    gate = threading.Event()
+
+    def batch_fn(items):
+        gate.wait(5)
+        sizes.append(len(items))
+        return items
+
+    batcher = MicroBatcher(batch_fn, max_batch_size=16, max_wait_ms=50, max_concurrent_batches=1)
+    # The first batch blocks the only worker, so the rest queue up behind it
+    first = batcher.submit(-1)
+    futures = [batcher.submit(i) for i in range(32)]
+    gate.set()
+    first.result(timeout=5)
+    assert [future.result(timeout=5) for future in futures] == list(range(32))
+    assert max(sizes) > 1
+    assert all(size <= 16 for size in sizes)
+
+def test_lone_request_is_not_delayed():
+    batcher = MicroBatcher(lambda items: items, max_wait_ms=5)
+    assert batcher.call("only", timeout=5) == "only"
+    assert batcher.stats()["window_ms"] == 0.0
+
+def test_batch_errors_reach_every_caller():
+    def batch_fn(items):
+        raise RuntimeError("backend down")
+
+    batcher = MicroBatcher(batch_fn)
+    with pytest.raises(RuntimeError):
+        batcher.call("a", timeout=5)
+
+def test_result_count_mismatch_is_an_error():
+    batcher = MicroBatcher(lambda items: [])
+    with pytest.raises(ValueError):
+        batcher.call("a", timeout=5)
+
+def test_batch_runs_in_the_callers_context():
+    seen = []
+    batcher = MicroBatcher(lambda items: seen.append(current_priority()) or items)
+    with priority_scope(Priority.INTERACTIVE):
+        batcher.call("a", timeout=5)
+    assert seen == [Priority.INTERACTIVE]
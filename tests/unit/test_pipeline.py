@@ -0,0 +1,46 @@
+import threading
+import time
+import pytest
+from app.processing.pipeline import run_pipeline
+
+def double(items):
+    for item in items:
+        yield item * 2
+
+def test_items_flow_through_stages_in_order():
+    assert list(run_pipeline(range(100), [double, double, lambda items: items])) == [i * 4 for i in range(100)]
+
+def test_stage_failures_reach_the_caller():
+    def fail(items):
+        for item in items:
+            if item == 3:
+                raise ValueError("bad item")
+            yield item
+
+    with pytest.raises(ValueError):
+        list(run_pipeline(range(10), [fail, lambda items: items]))
+
+def test_closing_early_stops_every_stage():
+    before = threading.active_count()
+    pipeline = run_pipeline(iter(range(10 ** 9)), [double, lambda items: items], queue_size=2)
+    assert next(pipeline) == 0
+    pipeline.close()
+    assert threading.active_count() == before
+
+def test_teardown_does_not_wait_for_wedged_stages():
+    release = threading.Event()
+
+    def wedged(items):
+        for item in items:
+            release.wait(10)
+            yield item
+
+    def fail(items):
+        raise RuntimeError("downstream failed")
+        yield
+
+    start = time.monotonic()
+    with pytest.raises(RuntimeError):
+        list(run_pipeline(range(3), [wedged, fail], join_timeout=0.2))
+    assert time.monotonic() - start < 5
+    release.set()
@@ -0,0 +1,147 @@
+import threading
+import time
+import pytest
+from botocore.exceptions import ClientError
+from app.core.rate_limit import (
+    AdaptiveRateLimiter, Priority, RateLimitExceeded, TokenBucket, is_throttling_error
+)
+
+def throttling_client_error() -> ClientError:
+    return ClientError(
+        {"Error": {"Code": "ThrottlingException", "Message": "Rate exceeded"},
+         "ResponseMetadata": {"HTTPStatusCode": 400}},
+        "InvokeModel"
+    )
+
+def bedrock_wrapped(error: Exception) -> ValueError:
+    # langchain's Bedrock wrappers re-raise inside their except block
+    try:
+        try:
+            raise error
+        except Exception as e:
+            raise ValueError(f"Error raised by bedrock service: {e}")
+    except ValueError as wrapped:
+        return wrapped
+
+class TestIsThrottlingError:
+    def test_client_error(self):
+        assert is_throttling_error(throttling_client_error())
+
+    def test_wrapped_client_error(self):
+        assert is_throttling_error(bedrock_wrapped(throttling_client_error()))
+
+    def test_explicit_cause(self):
+        error = RuntimeError("wrapped")
+        error.__cause__ = throttling_client_error()
+        assert is_throttling_error(error)
+
+    def test_status_code(self):
+        error = Exception("too many requests")
+        error.status_code = 429
+        assert is_throttling_error(error)
+
+    def test_other_errors(self):
+        access_denied = ClientError({"Error": {"Code": "AccessDeniedException"}}, "InvokeModel")
+        assert not is_throttling_error(access_denied)
+        assert not is_throttling_error(bedrock_wrapped(access_denied))
+        assert not is_throttling_error(ValueError("bad input"))
+
+    def test_cyclic_chain(self):
+        first, second = ValueError("a"), ValueError("b")
+        first.__context__, second.__context__ = second, first
+        assert not is_throttling_error(first)
+
+class TestTokenBucket:
+    def test_wait_time(self):
+        bucket = TokenBucket(capacity=10, refill_per_second=10)
+        assert bucket.wait_time(10) == 0.0
+        bucket.consume(10)
+        assert 0.5 < bucket.wait_time(10) <= 1.0
+
+    def test_refill_is_capped(self):
+        bucket = TokenBucket(capacity=5, refill_per_second=1000)
+        time.sleep(0.01)
+        bucket.wait_time(1)
+        assert bucket.tokens == 5
+
+class TestAdaptiveRateLimiter:
+    def limiter(self, **kwargs) -> AdaptiveRateLimiter:
+        options = dict(requests_per_minute=6000, tokens_per_minute=10 ** 6,
+                       max_concurrency=8, backoff_base=0.001, backoff_max=0.01)
+        options.update(kwargs)
+        return AdaptiveRateLimiter("test", **options)
+
+    def test_retries_wrapped_bedrock_throttle(self):
+        limiter = self.limiter()
+        calls = []
+
+        def call():
+            calls.append(1)
+            if len(calls) < 3:
+                raise bedrock_wrapped(throttling_client_error())
+            return "ok"
+
+        assert limiter.call(call) == "ok"
+        assert len(calls) == 3
+        assert limiter.stats()["throttled"] == 2
+        assert limiter.concurrency_limit == pytest.approx(4.25)
+
+    def test_gives_up_after_max_retries(self):
+        limiter = self.limiter(max_retries=1)
+
+        def call():
+            raise bedrock_wrapped(throttling_client_error())
+
+        with pytest.raises(RateLimitExceeded):
+            limiter.call(call)
+        assert limiter.stats()["in_flight"] == 0
+
+    def test_other_errors_are_not_retried(self):
+        limiter = self.limiter()
+        calls = []
+
+        def call():
+            calls.append(1)
+            raise KeyError("missing")
+
+        with pytest.raises(KeyError):
+            limiter.call(call)
+        assert len(calls) == 1
+        assert limiter.concurrency_limit == 8
+
+    def test_additive_increase(self):
+        limiter = self.limiter()
+        limiter.concurrency_limit = 2.0
+        limiter.call(lambda: None)
+        limiter.call(lambda: None)
+        assert limiter.concurrency_limit == pytest.approx(2.5 + 1 / 2.5)
+
+    def test_acquire_times_out(self):
+        limiter = self.limiter(max_concurrency=1, max_wait=0.05)
+        limiter.acquire()
+        with pytest.raises(RateLimitExceeded):
+            limiter.acquire()
+        limiter.release()
+
+    def test_interactive_is_admitted_before_bulk(self):
+        limiter = self.limiter(max_concurrency=1)
+        limiter.acquire()
+        order = []
+
+        def waiter(priority):
+            limiter.acquire(priority=priority)
+            order.append(priority)
+            limiter.release()
+
+        bulk = threading.Thread(target=waiter, args=(Priority.BULK,))
+        bulk.start()
+        while limiter.stats()["waiting"] < 1:
+            time.sleep(0.001)
+        interactive = threading.Thread(target=waiter, args=(Priority.INTERACTIVE,))
+        interactive.start()
+        while limiter.stats()["waiting"] < 2:
+            time.sleep(0.001)
+        limiter.release()
+        bulk.join(5)
+        interactive.join(5)
+        assert order == [Priority.INTERACTIVE, Priority.BULK]
@@ -0,0 +1,120 @@
+import io
+import random
+import numpy as np
+import pytest
+from app.processing.snapshot import (
+    SnapshotError, SnapshotUnsupported, export_snapshot, import_snapshot, load_snapshot
+)
+from app.processing.vector_index import InMemoryVectorIndex
+
+DIMENSION = 16
+
+@pytest.fixture
+def index():
+    rng = np.random.default_rng(0)
+    index = InMemoryVectorIndex(dimension=DIMENSION)
+    for namespace, count in (("", 40), ("tenant-a", 25)):
+        index.upsert([
+            (f"{namespace}doc{i % 3}#{i}", rng.normal(size=DIMENSION).tolist(),
+             {"document_id": f"doc{i % 3}", "text": f"chunk {i} " * 20})
+            for i in range(count)
+        ], namespace=namespace)
+    return index
+
+def snapshot_bytes(index, **kwargs) -> bytes:
+    out = io.BytesIO()
+    export_snapshot(index, out, **kwargs)
+    return out.getvalue()
+
+def assert_same_contents(original, restored, atol=1e-6):
+    assert sorted(restored.namespaces()) == sorted(original.namespaces())
+    for namespace in original.namespaces():
+        expected = {i: (v, m) for ids, vectors, metadata in original.scan(namespace)
+                    for i, v, m in zip(ids, vectors, metadata)}
+        actual = {i: (v, m) for ids, vectors, metadata in restored.scan(namespace)
+                  for i, v, m in zip(ids, vectors, metadata)}
+        assert expected.keys() == actual.keys()
+        for vector_id, (vector, metadata) in expected.items():
+            assert actual[vector_id][1] == metadata
+            np.testing.assert_allclose(actual[vector_id][0], vector, atol=atol)
+
+def test_export_summary(index):
+    summary = export_snapshot(index, io.BytesIO())
+    assert summary == {"namespaces": 2, "vectors": 65, "documents": 6}
+
+def test_import_round_trip(index):
+    restored = InMemoryVectorIndex(dimension=DIMENSION)
+    summary = import_snapshot(io.BytesIO(snapshot_bytes(index)), restored)
+    assert summary["vectors"] == 65
+    assert_same_contents(index, restored)
+
+def test_load_round_trip(index, tmp_path):
+    path = tmp_path / "index.snap"
+    path.write_bytes(snapshot_bytes(index))
+    restored = load_snapshot(str(path))
+    assert_same_contents(index, restored)
+    query = index.scan("tenant-a").__next__()[1][0]
+    assert restored.query(query.tolist(), top_k=1, namespace="tenant-a")["matches"][0]["score"] == pytest.approx(1.0)
+
+def test_quantized_round_trip(index, tmp_path):
+    data = snapshot_bytes(index, quantize=True)
+    assert len(data) < len(snapshot_bytes(index))
+    path = tmp_path / "index.snap"
+    path.write_bytes(data)
+    assert_same_contents(index, load_snapshot(str(path)), atol=0.02)
+
+def test_namespace_map(index):
+    restored = InMemoryVectorIndex(dimension=DIMENSION)
+    import_snapshot(io.BytesIO(snapshot_bytes(index)), restored, namespace_map={"tenant-a": "tenant-b"})
+    assert sorted(restored.namespaces()) == ["", "tenant-b"]
+
+def test_unsupported_index():
+    class Remote:
+        dimension = DIMENSION
+
+    with pytest.raises(SnapshotUnsupported):
+        export_snapshot(Remote(), io.BytesIO())
+
+def test_rejects_other_files(tmp_path):
+    with pytest.raises(SnapshotError):
+        import_snapshot(io.BytesIO(b"not a snapshot at all"), InMemoryVectorIndex(dimension=DIMENSION))
+    path = tmp_path / "empty.snap"
+    path.write_bytes(b"")
+    with pytest.raises(SnapshotError):
+        load_snapshot(str(path))
+
+def test_rejects_truncation(index, tmp_path):
+    data = snapshot_bytes(index)
+    for size in (10, len(data) // 3, len(data) - 1):
+        with pytest.raises(SnapshotError):
+            import_snapshot(io.BytesIO(data[:size]), InMemoryVectorIndex(dimension=DIMENSION))
+        path = tmp_path / "truncated.snap"
+        path.write_bytes(data[:size])
+        with pytest.raises(SnapshotError):
+            load_snapshot(str(path))
+
+def test_rejects_corruption(index, tmp_path):
+    """Any flipped bit is rejected, except in alignment padding, which holds no data"""
+    data = snapshot_bytes(index)
+    rng = random.Random(0)
+    path = tmp_path / "corrupt.snap"
+    rejected = 0
+    for _ in range(200):
+        corrupt = bytearray(data)
+        position = rng.randrange(8, len(corrupt))
+        corrupt[position] ^= 1 << rng.randrange(8)
+        restored = InMemoryVectorIndex(dimension=DIMENSION)
+        try:
+            import_snapshot(io.BytesIO(bytes(corrupt)), restored)
+        except SnapshotError:
+            rejected += 1
+        else:
+            assert_same_contents(index, restored)
+        path.write_bytes(bytes(corrupt))
+        try:
+            loaded = load_snapshot(str(path))
+        except SnapshotError:
+            pass
+        else:
+            assert_same_contents(index, loaded)
+    assert rejected > 180
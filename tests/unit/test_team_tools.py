@@ -0,0 +1,127 @@
+import threading
+import pytest
+from botocore.exceptions import ClientError, EndpointConnectionError
+from app.collaboration.team_tools import TeamCollaboration, TeamMember, TeamRole
+
+ACCOUNT_ID = "123456789012"
+
+def member_arn(email):
+    return f"arn:aws:chime:us-east-1:{ACCOUNT_ID}:user/{email}"
+
+def client_error(code, status):
+    return ClientError({"Error": {"Code": code, "Message": code},
+                        "ResponseMetadata": {"HTTPStatusCode": status}}, "Operation")
+
+class StubChime:
+    """Records membership batches; `errors` maps member ARNs to error codes to report once each"""
+
+    def __init__(self, errors=None, raises=None):
+        self.errors = dict(errors or {})
+        self.raises = list(raises or [])
+        self.batches = []
+        self._lock = threading.Lock()
+
+    def create_channel(self, **kwargs):
+        return {"ChannelArn": "arn:aws:chime:channel/team"}
+
+    def batch_create_channel_membership(self, ChannelArn, Type, MemberArns):
+        with self._lock:
+            self.batches.append(list(MemberArns))
+            if self.raises:
+                raise self.raises.pop(0)
+            errors = []
+            for arn in MemberArns:
+                code = self.errors.get(arn)
+                if code is not None:
+                    if code != "Forbidden":
+                        del self.errors[arn]
+                    errors.append({"MemberArn": arn, "ErrorCode": code, "ErrorMessage": "failed"})
+        return {"Errors": errors}
+
+class StubSNS:
+    def __init__(self, raises=None):
+        self.raises = dict(raises or {})
+        self.subscribed = []
+        self._lock = threading.Lock()
+
+    def create_topic(self, Name):
+        return {"TopicArn": f"arn:aws:sns:topic/{Name}"}
+
+    def subscribe(self, TopicArn, Protocol, Endpoint):
+        with self._lock:
+            errors = self.raises.get(Endpoint)
+            if errors:
+                raise errors.pop(0)
+            self.subscribed.append(Endpoint)
+
+def team(count):
+    return [TeamMember(f"Member {i}", TeamRole.ML_ENGINEER, f"member{i}@example.com", []) for i in range(count)]
+
+def collaboration(chime=None, sns=None, **kwargs):
+    clients = {"chime": chime or StubChime(), "sns": sns or StubSNS()}
+    collab = TeamCollaboration(
+        client_factory=lambda name: clients.get(name, object()), retry_backoff=0, **kwargs
+    )
+    collab.get_account_id = lambda: ACCOUNT_ID
+    return collab
+
+def test_members_are_added_in_batches_of_100():
+    chime = StubChime()
+    report = collaboration(chime).provision_channel_members("channel", team(250))
+    assert sorted(len(batch) for batch in chime.batches) == [50, 100, 100]
+    assert len(report.succeeded) == 250 and not report.failed
+    assert report.succeeded[0].endswith("@example.com")
+    assert report.attempts == 1
+
+def test_throttled_members_are_retried():
+    members = team(5)
+    chime = StubChime(errors={member_arn(members[1].email): "Throttled"})
+    report = collaboration(chime).provision_channel_members("channel", members)
+    assert not report.failed
+    assert report.attempts == 2
+    assert chime.batches[-1] == [member_arn(members[1].email)]
+
+def test_forbidden_members_fail_without_retry():
+    members = team(3)
+    chime = StubChime(errors={member_arn(members[0].email): "Forbidden"})
+    report = collaboration(chime).provision_channel_members("channel", members)
+    assert list(report.failed) == [members[0].email]
+    assert report.failed[members[0].email].startswith("Forbidden")
+    assert report.attempts == 1
+
+def test_whole_batch_errors():
+    members = team(3)
+    throttled = collaboration(StubChime(raises=[client_error("ThrottlingException", 400)]))
+    assert not throttled.provision_channel_members("channel", members).failed
+
+    unavailable = collaboration(StubChime(raises=[EndpointConnectionError(endpoint_url="https://chime")]))
+    assert not unavailable.provision_channel_members("channel", members).failed
+
+    bad_request = StubChime(raises=[client_error("BadRequestException", 400)])
+    report = collaboration(bad_request).provision_channel_members("channel", members)
+    assert len(report.failed) == 3 and len(bad_request.batches) == 1
+
+def test_programming_errors_are_not_retried():
+    chime = StubChime(raises=[TypeError("unexpected keyword")])
+    report = collaboration(chime).provision_channel_members("channel", team(2))
+    assert len(report.failed) == 2
+    assert len(chime.batches) == 1
+
+def test_retries_stop_after_max_attempts():
+    chime = StubChime(raises=[client_error("ServiceUnavailable", 503)] * 5)
+    report = collaboration(chime, max_attempts=3).provision_channel_members("channel", team(2))
+    assert report.attempts == 3
+    assert len(report.failed) == 2
+
+def test_topic_subscriptions():
+    members = team(4)
+    sns = StubSNS(raises={
+        members[0].email: [client_error("Throttling", 400)],
+        members[1].email: [client_error("InvalidParameter", 400)]
+    })
+    report = collaboration(sns=sns).provision_topic_subscriptions("topic", members)
+    assert sorted(report.succeeded) == sorted(m.email for m in members if m is not members[1])
+    assert list(report.failed) == [members[1].email]
+
+def test_create_team_channel_returns_the_arn():
+    assert collaboration().create_team_channel("team", team(2)) == "arn:aws:chime:channel/team"
@@ -0,0 +1,82 @@
+import threading
+import time
+import pytest
+from app.core.rate_limit import RateLimitExceeded
+from app.core.tenancy import (
+    InvalidTenant, StorageQuotaExceeded, TenantAuthenticationError, TenantKeys, TenantQuota,
+    TenantQuotas, namespace_for
+)
+
+class StubIndex:
+    def __init__(self, counts=None, delay=0.0):
+        self.counts = dict(counts or {})
+        self.delay = delay
+        self.calls = 0
+
+    def describe_index_stats(self):
+        self.calls += 1
+        time.sleep(self.delay)
+        return {"namespaces": {name: {"vector_count": count} for name, count in self.counts.items()}}
+
+def test_namespace_for():
+    assert namespace_for(None) == ""
+    assert namespace_for("acme-1") == "acme-1"
+    with pytest.raises(InvalidTenant):
+        namespace_for("../other")
+
+def test_keys_resolve_tenants():
+    keys = TenantKeys({"acme": ["k1", "k2"], "globex": "k3"})
+    assert keys.resolve("k2") == "acme"
+    assert keys.resolve("k3") == "globex"
+    for key in (None, "unknown"):
+        with pytest.raises(TenantAuthenticationError):
+            keys.resolve(key)
+    assert TenantKeys().resolve(None) is None
+
+def test_query_rate_limit():
+    quotas = TenantQuotas(StubIndex(), default=TenantQuota(queries_per_second=1, burst=2))
+    quotas.check_query("acme")
+    quotas.check_query("acme")
+    with pytest.raises(RateLimitExceeded):
+        quotas.check_query("acme")
+    quotas.check_query("globex")
+
+def test_storage_quota_counts_reservations():
+    quotas = TenantQuotas(StubIndex({"acme": 50}), default=TenantQuota(max_vectors=100))
+    quotas.reserve_vectors("acme", 30)
+    with pytest.raises(StorageQuotaExceeded):
+        quotas.reserve_vectors("acme", 30)
+    assert quotas.usage("acme")["vectors"] == 80
+
+def test_release_returns_the_exact_reservation():
+    quotas = TenantQuotas(StubIndex(), default=TenantQuota(max_vectors=100))
+    first = quotas.reserve_vectors("acme", 30)
+    quotas.reserve_vectors("acme", 40)
+    quotas.release_vectors("acme", first)
+    assert quotas.usage("acme")["vectors"] == 40
+    quotas.release_vectors("acme", first)
+    assert quotas.usage("acme")["vectors"] == 40
+
+def test_reservations_are_kept_until_stats_catch_up():
+    index = StubIndex({"acme": 0})
+    quotas = TenantQuotas(index, default=TenantQuota(max_vectors=100), stats_ttl=0)
+    quotas.reserve_vectors("acme", 30)
+    quotas.reserve_vectors("acme", 20)
+    assert quotas.usage("acme")["vectors"] == 50
+    index.counts["acme"] = 30
+    assert quotas.usage("acme")["vectors"] == 50
+    index.counts["acme"] = 50
+    assert quotas.usage("acme")["vectors"] == 50
+
+def test_queries_do_not_wait_for_stats_refresh():
+    index = StubIndex({"acme": 0}, delay=0.5)
+    quotas = TenantQuotas(index, default=TenantQuota(max_vectors=100, queries_per_second=1000), stats_ttl=0)
+    quotas.usage("acme")
+    refresh = threading.Thread(target=quotas.usage, args=("acme",))
+    refresh.start()
+    time.sleep(0.05)
+    start = time.monotonic()
+    quotas.check_query("acme")
+    quotas.reserve_vectors("acme", 1)
+    assert time.monotonic() - start < 0.25
+    refresh.join()